@@ -14,7 +14,7 @@ sont déposés dans le répertoire `ai/artifacts/`.
 import os
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 # Racine du projet
@@ -30,19 +30,30 @@ class ArtifactPaths:
     Gère les chemins vers les fichiers de modèles et les objets de prétraitement pré-entraînés.
     Cette classe fournit des propriétés pour accéder facilement aux emplacements des fichiers .keras et .pkl
     nécessaires au pipeline d'inférence.
+
+    Une instance dédiée peut pointer vers un autre jeu d'artifacts (version du registre
+    `model_versions`) : `base_dir` contient les .pkl, et les chemins des modèles Keras
+    peuvent être surchargés individuellement.
     """
 
     base_dir: Path = ARTIFACTS_DIR
+    supervised_path: Optional[Path] = None
+    unsupervised_path: Optional[Path] = None
 
     @property
     def supervised_model(self) -> Path:
         """Chemin vers le modèle de classification supervisée (.keras)."""
-        return self.base_dir / "model_supervised.keras"
+        return self.supervised_path or self.base_dir / "model_supervised.keras"
 
     @property
     def unsupervised_model(self) -> Path:
         """Chemin vers le modèle d'autoencodeur non supervisé (.keras)."""
-        return self.base_dir / "model_unsupervised.keras"
+        return self.unsupervised_path or self.base_dir / "model_unsupervised.keras"
+
+    @property
+    def threshold_stats(self) -> Path:
+        """Chemin vers les statistiques de seuil de l'autoencodeur (.pkl, optionnel)."""
+        return self.unsupervised_model.parent / "threshold_stats.pkl"
 
     @property
     def scaler(self) -> Path:
@@ -120,6 +131,27 @@ class InferenceConfig:
     # Permet de traiter plusieurs flux simultanément pour améliorer le débit.
     batch_size: int = 64
 
+    # Nombre de probabilités de classes conservées (top-k) dans les résultats persistés.
+    # Les probabilités complètes ne sont jamais matérialisées en dict sur le hot-path.
+    top_k_probabilities: int = 3
+
+    # Cache des sorties d'inférence (LRU + TTL) indexé sur le vecteur préprocessé quantifié.
+    # Évite de rejouer les deux modèles pour les flux identiques (scans, floods, health-checks).
+    cache_enabled: bool = True
+    cache_max_entries: int = 10000
+    cache_ttl_seconds: float = 300.0
+    # Pas de quantification appliqué aux features normalisées avant hash (0 = égalité stricte).
+    cache_quantization: float = 1e-3
+
+    # Mode cascade (early-exit) : l'autoencoder est ignoré lorsque le modèle supervisé
+    # est très confiant ET que le vecteur reste dans la plage vue à l'entraînement.
+    # Désactivé par défaut ; mesurer l'impact avec ai.healthcheck.cascade_evaluator.
+    cascade_enabled: bool = False
+    cascade_benign_confidence: float = 0.99   # BENIGN avec confiance >= seuil → pas d'autoencoder
+    cascade_attack_confidence: float = 0.99   # Attaque connue avec confiance >= seuil → pas d'autoencoder
+    # Contrôle de cohérence : |feature normalisée| maximale tolérée (z-score) pour sortir tôt.
+    cascade_max_abs_feature: float = 6.0
+
     # Indicateur pour effectuer un "warm-up" (chauffage) du modèle au démarrage.
     # Exécute une inférence fictive pour charger le graphe TensorFlow en mémoire et éviter la latence à la première requête.
     warmup_on_load: bool = True
@@ -0,0 +1,175 @@
+"""
+Évaluation hors ligne du mode cascade (early-exit).
+
+Rejoue un jeu de features brutes à travers le chemin hybride complet ET le
+chemin cascade, puis mesure la proportion de flux qui auraient évité
+l'autoencoder et combien de décisions / sévérités changent.
+
+Usage:
+    python -m ai.healthcheck.cascade_evaluator replay.npy
+    python -m ai.healthcheck.cascade_evaluator replay.csv --benign-confidence 0.995
+"""
+
+import argparse
+import json
+import logging
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from ai.config.model_config import inference_config
+from ai.inference import cascade
+from ai.inference import hybrid_decision_engine
+from ai.inference import supervised_predictor
+from ai.inference import unsupervised_predictor
+from ai.inference.detection_result import DetectionResult
+from ai.inference.model_loader import ModelLoader
+
+logger = logging.getLogger(__name__)
+
+
+def load_replay_set(path: str) -> np.ndarray:
+    """Charge un jeu de replay (.npy ou .csv sans en-tête) en matrice 2D float32."""
+    replay_path = Path(path)
+    if replay_path.suffix == ".npy":
+        features = np.load(str(replay_path))
+    else:
+        features = np.loadtxt(str(replay_path), delimiter=",", dtype=np.float32)
+    features = np.asarray(features, dtype=np.float32)
+    return features.reshape(1, -1) if features.ndim == 1 else features
+
+
+def _decide(engine, class_names, threshold, ip_reputation, index, confidence, is_attack, error, score, anomalous, skipped):
+    """Applique le moteur hybride à une ligne du replay."""
+    record = DetectionResult(
+        class_index=int(index),
+        confidence=float(confidence),
+        is_attack=bool(is_attack),
+        reconstruction_error=float(error),
+        anomaly_score=float(score),
+        is_anomaly=bool(anomalous),
+        threshold=threshold,
+        class_names=class_names,
+        anomaly_skipped=skipped,
+    )
+    return hybrid_decision_engine.decide_record(engine, record, ip_reputation)
+
+
+def evaluate_cascade(
+    raw_features: np.ndarray,
+    loader: Optional[ModelLoader] = None,
+    ip_reputation: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Compare les décisions du chemin complet et du chemin cascade sur un jeu de replay.
+
+    Args:
+        raw_features: Matrice 2D de features brutes (avant preprocessing).
+        loader: ModelLoader déjà chargé (sinon chargé depuis ai/artifacts/).
+        ip_reputation: Réputation IP appliquée uniformément au replay.
+
+    Returns:
+        Dict avec le taux de sortie anticipée, le nombre de décisions/sévérités
+        modifiées, les transitions observées et les temps d'inférence.
+    """
+    if loader is None:
+        loader = ModelLoader()
+        if not loader.load_all():
+            return {"success": False, "error": "Artifacts AI non disponibles"}
+
+    sup = supervised_predictor.create_predictor(loader.supervised_model, loader.pipeline.class_names)
+    unsup = unsupervised_predictor.create_predictor(loader.unsupervised_model)
+    full_engine = hybrid_decision_engine.create_engine()
+    cascade_engine = cascade.create_cascade_engine(full_engine)
+
+    processed = loader.pipeline.transform(raw_features)
+    n_samples = processed.shape[0]
+
+    # Chemin complet : les deux modèles sur tout le replay
+    started = time.perf_counter()
+    indices, confidences, is_attack, _ = supervised_predictor.predict_arrays(sup, processed)
+    supervised_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    errors, scores, is_anomaly = unsupervised_predictor.score_arrays(unsup, processed)
+    autoencoder_seconds = time.perf_counter() - started
+
+    # Chemin cascade : autoencoder uniquement sur les flux non écartés
+    is_benign = supervised_predictor.benign_flags(sup, indices)
+    skipped = cascade.skip_mask(confidences, is_attack, is_benign, processed)
+    kept = ~skipped
+    started = time.perf_counter()
+    if kept.any():
+        unsupervised_predictor.score_arrays(unsup, processed[kept])
+    cascade_autoencoder_seconds = time.perf_counter() - started
+
+    decision_changes: Counter = Counter()
+    severity_changed = 0
+    for i in range(n_samples):
+        full = _decide(
+            full_engine, sup["class_names"], unsup["threshold"], ip_reputation,
+            indices[i], confidences[i], is_attack[i], errors[i], scores[i], is_anomaly[i], False,
+        )
+        if skipped[i]:
+            fast = _decide(
+                cascade_engine, sup["class_names"], unsup["threshold"], ip_reputation,
+                indices[i], confidences[i], is_attack[i], 0.0, 0.0, False, True,
+            )
+        else:
+            fast = full
+
+        if fast.decision_code != full.decision_code:
+            decision_changes[f"{full.decision}->{fast.decision}"] += 1
+        if fast.severity != full.severity:
+            severity_changed += 1
+
+    changed = sum(decision_changes.values())
+    n_skipped = int(skipped.sum())
+    return {
+        "success": True,
+        "samples": n_samples,
+        "thresholds": {
+            "benign_confidence": inference_config.cascade_benign_confidence,
+            "attack_confidence": inference_config.cascade_attack_confidence,
+            "max_abs_feature": inference_config.cascade_max_abs_feature,
+        },
+        "skipped": n_skipped,
+        "skipped_benign": int((skipped & is_benign).sum()),
+        "skipped_attack": int((skipped & is_attack).sum()),
+        "skip_ratio": round(n_skipped / n_samples, 4) if n_samples else 0.0,
+        "decisions_changed": changed,
+        "decision_change_rate": round(changed / n_samples, 6) if n_samples else 0.0,
+        "decision_transitions": dict(decision_changes),
+        "severity_changed": severity_changed,
+        "timing_ms": {
+            "supervised": round(supervised_seconds * 1000, 2),
+            "autoencoder_full": round(autoencoder_seconds * 1000, 2),
+            "autoencoder_cascade": round(cascade_autoencoder_seconds * 1000, 2),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Évalue le mode cascade sur un jeu de replay.")
+    parser.add_argument("replay", help="Fichier de features brutes (.npy ou .csv)")
+    parser.add_argument("--benign-confidence", type=float, default=inference_config.cascade_benign_confidence)
+    parser.add_argument("--attack-confidence", type=float, default=inference_config.cascade_attack_confidence)
+    parser.add_argument("--max-abs-feature", type=float, default=inference_config.cascade_max_abs_feature)
+    parser.add_argument("--ip-reputation", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-8s | %(message)s")
+
+    inference_config.cascade_benign_confidence = args.benign_confidence
+    inference_config.cascade_attack_confidence = args.attack_confidence
+    inference_config.cascade_max_abs_feature = args.max_abs_feature
+
+    report = evaluate_cascade(load_replay_set(args.replay), ip_reputation=args.ip_reputation)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
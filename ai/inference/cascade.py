@@ -0,0 +1,59 @@
+"""
+Scoring en cascade (early-exit).
+
+Le modèle supervisé (MLP) est exécuté en premier. Si sa prédiction est très
+confiante — BENIGN ou attaque connue — et que le vecteur passe un contrôle de
+cohérence bon marché (aucune feature normalisée hors de ±k écarts-types),
+l'autoencoder est ignoré. Sinon le chemin hybride complet est exécuté.
+
+Quand l'autoencoder est ignoré, le risque est calculé avec des poids
+renormalisés sur les composantes disponibles (supervisé + réputation).
+"""
+
+from typing import Dict
+
+import numpy as np
+
+from ai.config.model_config import inference_config
+
+
+def skip_mask(
+    confidences: np.ndarray,
+    is_attack: np.ndarray,
+    is_benign: np.ndarray,
+    processed_features: np.ndarray,
+) -> np.ndarray:
+    """
+    Détermine, pour chaque échantillon, si l'autoencoder peut être ignoré.
+
+    Args:
+        confidences: Confiances argmax du modèle supervisé.
+        is_attack: Masque "attaque confirmée" du modèle supervisé.
+        is_benign: Masque "classe BENIGN" (supervised_predictor.benign_flags).
+        processed_features: Features préprocessées 2D (n_samples, n_features).
+
+    Returns:
+        Masque booléen (True = sortie anticipée).
+    """
+    confident_benign = is_benign & (confidences >= inference_config.cascade_benign_confidence)
+    confident_attack = is_attack & (confidences >= inference_config.cascade_attack_confidence)
+
+    # Contrôle de cohérence : un vecteur hors distribution doit passer par l'autoencoder
+    in_range = np.max(np.abs(processed_features), axis=1) <= inference_config.cascade_max_abs_feature
+
+    return (confident_benign | confident_attack) & in_range
+
+
+def create_cascade_engine(engine: Dict[str, float]) -> Dict[str, float]:
+    """
+    Dérive du moteur hybride une variante sans composante non-supervisée
+    (poids supervisé et réputation renormalisés pour sommer à 1).
+    """
+    total = engine["w_sup"] + engine["w_rep"]
+    if total <= 0:
+        return {"w_sup": 1.0, "w_unsup": 0.0, "w_rep": 0.0}
+    return {
+        "w_sup": engine["w_sup"] / total,
+        "w_unsup": 0.0,
+        "w_rep": engine["w_rep"] / total,
+    }
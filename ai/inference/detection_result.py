@@ -0,0 +1,211 @@
+"""
+Enregistrement compact du résultat de détection d'un flux.
+
+Remplace les dictionnaires imbriqués (supervised / unsupervised / decision)
+par un objet à `__slots__` qui transite tel quel de l'inférence vers la
+persistance et l'alerting. Les probabilités par classe ne sont pas
+matérialisées : `top_k()` construit la vue à la demande depuis la ligne
+du tableau NumPy produit par le modèle.
+"""
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ai.config.model_config import inference_config
+
+
+# ---- Codes de décision (ordre croissant de gravité) ----
+DECISION_NORMAL = 0
+DECISION_SUSPICIOUS = 1
+DECISION_UNKNOWN_ANOMALY = 2
+DECISION_CONFIRMED_ATTACK = 3
+
+DECISION_LABELS = ("normal", "suspicious", "unknown_anomaly", "confirmed_attack")
+DECISION_CODES = {label: code for code, label in enumerate(DECISION_LABELS)}
+
+
+class DetectionResult:
+    """
+    Résultat hybride d'un flux : classe argmax, confiance, erreur et score
+    d'anomalie, risque final et code de décision.
+    """
+
+    __slots__ = (
+        "class_index",
+        "confidence",
+        "is_attack",
+        "reconstruction_error",
+        "anomaly_score",
+        "is_anomaly",
+        "threshold",
+        "anomaly_skipped",
+        "ip_reputation",
+        "risk",
+        "decision_code",
+        "severity",
+        "priority",
+        "probabilities",
+        "class_names",
+        "flow_metadata",
+        "model_version",
+        "features",
+    )
+
+    def __init__(
+        self,
+        class_index: int,
+        confidence: float,
+        is_attack: bool,
+        reconstruction_error: float,
+        anomaly_score: float,
+        is_anomaly: bool,
+        threshold: float,
+        probabilities: Optional[np.ndarray] = None,
+        class_names: Sequence[str] = (),
+        anomaly_skipped: bool = False,
+    ):
+        self.class_index = class_index
+        self.confidence = confidence
+        self.is_attack = is_attack
+        self.reconstruction_error = reconstruction_error
+        self.anomaly_score = anomaly_score
+        self.is_anomaly = is_anomaly
+        self.threshold = threshold
+        # True si l'autoencoder a été ignoré (mode cascade) : erreur et score valent 0
+        self.anomaly_skipped = anomaly_skipped
+        self.probabilities = probabilities
+        self.class_names = class_names
+
+        # Renseignés par hybrid_decision_engine.decide_record()
+        self.ip_reputation = 0.0
+        self.risk = 0.0
+        self.decision_code = DECISION_NORMAL
+        self.severity = "low"
+        self.priority = 5
+
+        # Renseignés par detection_service (IPs, ports... et version des modèles utilisés)
+        self.flow_metadata: Optional[Dict[str, Any]] = None
+        self.model_version: Optional[str] = None
+        # Vecteur de features brut (float32, avant preprocessing), conservé pour la persistance
+        self.features: Optional[np.ndarray] = None
+
+    # ---- Vues dérivées ----
+
+    def _class_name(self, index: int) -> str:
+        if self.class_names and index < len(self.class_names):
+            return self.class_names[index]
+        return f"class_{index}"
+
+    @property
+    def predicted_label(self) -> str:
+        """Nom de la classe argmax (y compris BENIGN)."""
+        return self._class_name(self.class_index)
+
+    @property
+    def attack_type(self) -> Optional[str]:
+        """Type d'attaque retenu, None si le flux n'est pas classé attaque."""
+        return self.predicted_label if self.is_attack else None
+
+    @property
+    def decision(self) -> str:
+        return DECISION_LABELS[self.decision_code]
+
+    @property
+    def is_alert(self) -> bool:
+        """True si la décision doit lever une alerte."""
+        return self.decision_code != DECISION_NORMAL
+
+    @property
+    def supervised_risk(self) -> float:
+        return self.confidence if self.is_attack else 1.0 - self.confidence
+
+    @property
+    def reasoning(self) -> str:
+        """Explication textuelle courte de la décision."""
+        return (
+            f"decision={self.decision}; "
+            f"severity={self.severity}; "
+            f"is_attack={self.is_attack}; "
+            f"is_anomaly={self.is_anomaly}"
+        )
+
+    def top_k_arrays(self, k: Optional[int] = None) -> Optional[Tuple[List[int], List[float]]]:
+        """
+        Indices et probabilités (float32) des k classes les plus probables,
+        triés par probabilité décroissante — forme compacte persistée.
+
+        Returns:
+            (indices, probabilités), ou None si les probabilités n'ont pas été conservées.
+        """
+        if self.probabilities is None:
+            return None
+
+        k = inference_config.top_k_probabilities if k is None else k
+        probs = self.probabilities
+        k = max(1, min(k, probs.shape[0]))
+
+        if k < probs.shape[0]:
+            indices = np.argpartition(probs, -k)[-k:]
+        else:
+            indices = np.arange(probs.shape[0])
+        indices = indices[np.argsort(probs[indices])[::-1]]
+
+        return [int(i) for i in indices], probs[indices].astype(np.float32).tolist()
+
+    def top_k(self, k: Optional[int] = None) -> Optional[Dict[str, float]]:
+        """
+        Construit à la demande les k probabilités les plus élevées.
+
+        Returns:
+            Dict {classe: probabilité} trié par probabilité décroissante,
+            ou None si les probabilités n'ont pas été conservées.
+        """
+        arrays = self.top_k_arrays(k)
+        if arrays is None:
+            return None
+        indices, probs = arrays
+        return {self._class_name(i): round(p, 6) for i, p in zip(indices, probs)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Format historique imbriqué (supervised / unsupervised / decision).
+        Réservé aux chemins hors hot-path (API /analyze, diagnostic).
+        """
+        result = {
+            "supervised": {
+                "attack_type": self.predicted_label,
+                "probability": round(self.confidence, 6),
+                "is_attack": self.is_attack,
+                "predicted_index": self.class_index,
+                "class_probabilities": self.top_k(),
+            },
+            "unsupervised": {
+                "anomaly_score": round(self.anomaly_score, 6),
+                "is_anomaly": self.is_anomaly,
+                "reconstruction_error": round(self.reconstruction_error, 8),
+                "threshold": round(self.threshold, 8),
+                "skipped": self.anomaly_skipped,
+            },
+            "decision": {
+                "attack_type": self.attack_type,
+                "probability": round(self.confidence, 6),
+                "anomaly_score": round(self.anomaly_score, 6),
+                "final_risk_score": self.risk,
+                "severity": self.severity,
+                "decision": self.decision,
+                "priority": self.priority,
+                "details": {
+                    "supervised_risk": round(self.supervised_risk, 6),
+                    "unsupervised_anomaly": round(self.anomaly_score, 6),
+                    "ip_reputation": round(self.ip_reputation, 4),
+                    "is_attack": self.is_attack,
+                    "is_anomaly": self.is_anomaly,
+                },
+            },
+        }
+        if self.flow_metadata is not None:
+            result["flow_metadata"] = self.flow_metadata
+        if self.model_version is not None:
+            result["model_version"] = self.model_version
+        return result
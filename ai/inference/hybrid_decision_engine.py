@@ -13,9 +13,10 @@ Sortie :
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 from ai.config.model_config import inference_config, severity_config
+from ai.inference.detection_result import DetectionResult, DECISION_CODES
 
 logger = logging.getLogger(__name__)
 
@@ -78,19 +79,20 @@ def _compute_priority(severity: str, decision: str) -> int:
     return priority_map.get((severity, decision), 5)
 
 
-def decide(
+def _fuse(
     engine: Dict[str, float],
-    supervised_result: Dict[str, Any],
-    unsupervised_result: Dict[str, Any],
-    ip_reputation: float = 0.0,
-) -> Dict[str, Any]:
-    sup_score = supervised_result.get("probability", 0.0)
-    is_attack = supervised_result.get("is_attack", False)
-    attack_type = supervised_result.get("attack_type", "Unknown")
-    anomaly_score = unsupervised_result.get("anomaly_score", 0.0)
-    is_anomaly = unsupervised_result.get("is_anomaly", False)
-    reputation_score = min(1.0, max(0.0, float(ip_reputation)))
-
+    sup_score: float,
+    is_attack: bool,
+    anomaly_score: float,
+    is_anomaly: bool,
+    reputation_score: float,
+) -> Tuple[float, float, str, str, int]:
+    """
+    Cœur scalaire du moteur : pondération, décision, sévérité et priorité.
+
+    Returns:
+        Tuple (supervised_risk, final_risk_score, decision, severity, priority).
+    """
     supervised_risk = sup_score if is_attack else 1.0 - sup_score
 
     final_risk_score = (
@@ -109,6 +111,25 @@ def decide(
 
     severity = severity_config.get_severity(final_risk_score)
     priority = _compute_priority(severity, decision)
+    return supervised_risk, final_risk_score, decision, severity, priority
+
+
+def decide(
+    engine: Dict[str, float],
+    supervised_result: Dict[str, Any],
+    unsupervised_result: Dict[str, Any],
+    ip_reputation: float = 0.0,
+) -> Dict[str, Any]:
+    sup_score = supervised_result.get("probability", 0.0)
+    is_attack = supervised_result.get("is_attack", False)
+    attack_type = supervised_result.get("attack_type", "Unknown")
+    anomaly_score = unsupervised_result.get("anomaly_score", 0.0)
+    is_anomaly = unsupervised_result.get("is_anomaly", False)
+    reputation_score = min(1.0, max(0.0, float(ip_reputation)))
+
+    supervised_risk, final_risk_score, decision, severity, priority = _fuse(
+        engine, sup_score, is_attack, anomaly_score, is_anomaly, reputation_score
+    )
 
     return {
         "attack_type": attack_type if is_attack else None,
@@ -131,3 +152,31 @@ def decide(
             },
         },
     }
+
+
+def decide_record(
+    engine: Dict[str, float],
+    record: DetectionResult,
+    ip_reputation: float = 0.0,
+) -> DetectionResult:
+    """
+    Équivalent de decide() pour le hot-path : complète le DetectionResult
+    en place (risque, code de décision, sévérité, priorité) sans créer de dict.
+    """
+    reputation_score = min(1.0, max(0.0, float(ip_reputation)))
+
+    _, final_risk_score, decision, severity, priority = _fuse(
+        engine,
+        record.confidence,
+        record.is_attack,
+        record.anomaly_score,
+        record.is_anomaly,
+        reputation_score,
+    )
+
+    record.ip_reputation = reputation_score
+    record.risk = final_risk_score
+    record.decision_code = DECISION_CODES[decision]
+    record.severity = severity
+    record.priority = priority
+    return record
@@ -0,0 +1,127 @@
+"""
+Cache de résultats d'inférence (LRU + TTL).
+
+Les scans de ports, floods et health-checks produisent énormément de flux dont
+le vecteur de features préprocessé est identique (ou quasi identique). La clé
+de cache est un hash du vecteur quantifié (pas configurable) : sur un hit, les
+deux modèles Keras sont court-circuités et seule la fusion hybride (réputation
+IP propre au flux) est recalculée.
+
+Usage:
+    cache = InferenceCache(max_entries=10000, ttl_seconds=300, quantization=1e-3)
+    key = cache.make_key(processed_row)
+    entry = cache.get(key)
+    if entry is None:
+        ...  # inférence complète
+        cache.put(key, entry, inference_seconds)
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+# (class_index, confidence, is_attack, reconstruction_error, anomaly_score, is_anomaly, probabilities, anomaly_skipped)
+CachedOutputs = Tuple[int, float, bool, float, float, bool, Optional[np.ndarray], bool]
+
+
+class InferenceCache:
+    """
+    Mémoïsation des sorties supervisée + non-supervisée par signature de features.
+    Thread-safe (verrou unique, sections critiques très courtes).
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0, quantization: float = 1e-3):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.quantization = float(quantization)
+        self._entries: "OrderedDict[bytes, Tuple[float, float, CachedOutputs]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        # Statistiques
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.saved_seconds = 0.0
+
+    def make_key(self, processed_row: np.ndarray) -> bytes:
+        """
+        Calcule la signature d'un vecteur préprocessé (1D).
+        Avec quantization > 0, les valeurs sont arrondies au pas choisi avant hash,
+        ce qui regroupe les vecteurs quasi identiques.
+        """
+        if self.quantization > 0:
+            quantized = np.rint(processed_row / self.quantization).astype(np.int64)
+        else:
+            quantized = np.ascontiguousarray(processed_row, dtype=np.float32)
+        return hashlib.blake2b(quantized.tobytes(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[CachedOutputs]:
+        """Retourne les sorties en cache (et les marque récemment utilisées), ou None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            created_at, inference_seconds, outputs = entry
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += inference_seconds
+            return outputs
+
+    def put(self, key: bytes, outputs: CachedOutputs, inference_seconds: float, generation: Optional[int] = None) -> None:
+        """
+        Insère un résultat. `generation` (lu via `generation` avant l'inférence)
+        permet d'ignorer un résultat calculé avec des artifacts invalidés entre-temps.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic(), inference_seconds, outputs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @property
+    def generation(self) -> int:
+        """Compteur incrémenté à chaque invalidation (rechargement d'artifacts)."""
+        return self._generation
+
+    def clear(self) -> None:
+        """Invalide toutes les entrées (à appeler quand les artifacts sont rechargés)."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques pour le monitoring (hit ratio, temps d'inférence économisé)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "quantization": self.quantization,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "saved_inference_ms": round(self.saved_seconds * 1000, 2),
+                "generation": self._generation,
+            }
@@ -6,14 +6,20 @@ Usage:
     loader = ModelLoader()
     if loader.load_all():
         # les modèles sont prêts pour l'inférence
+
+    # Jeu d'artifacts versionné (registre model_versions)
+    candidate = ModelLoader(paths=ArtifactPaths(base_dir=Path("/srv/models/v2")), version="v2")
 """
 
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List
 
 import numpy as np
 
-from ai.config.model_config import artifact_paths, inference_config
+from ai.config.model_config import ArtifactPaths, artifact_paths, inference_config
 from ai.preprocessing.feature_pipeline import FeaturePipeline
 
 logger = logging.getLogger(__name__)
@@ -25,16 +31,24 @@ class ModelLoader:
     Aucun entraînement : uniquement chargement de fichiers pré-entraînés.
     """
 
-    def __init__(self):
+    def __init__(self, paths: ArtifactPaths = artifact_paths, version: Optional[str] = None):
+        self.paths = paths
+        self.version = version
+        self.fingerprint: Optional[str] = None
         self.supervised_model = None
         self.unsupervised_model = None
-        self.pipeline = FeaturePipeline()
+        self.pipeline = FeaturePipeline(paths)
+        # Profil du dernier chargement (ms) : import TF, chaque artifact, warm-up
+        self.timings: Dict[str, float] = {}
         self._is_ready = False
 
-    def load_all(self) -> bool:
+    def load_all(self, warmup: Optional[bool] = None) -> bool:
         """
         Charge tous les artifacts : modèles Keras + pipeline preprocessing.
 
+        Args:
+            warmup: Force (ou désactive) le warm-up ; défaut = inference_config.warmup_on_load.
+
         Returns:
             True si tous les composants critiques sont chargés.
         """
@@ -43,7 +57,7 @@ class ModelLoader:
         logger.info("=" * 60)
 
         # Vérification préalable
-        missing = artifact_paths.missing_artifacts()
+        missing = self.paths.missing_artifacts()
         if missing:
             logger.error(f"✗ Artifacts manquants : {missing}")
             logger.error(
@@ -52,42 +66,70 @@ class ModelLoader:
             return False
 
         success = True
+        self.timings = {}
+        started = time.perf_counter()
 
         # 1. Charger le pipeline de preprocessing
-        if not self.pipeline.load():
+        with self._timed("pipeline"):
+            pipeline_ok = self.pipeline.load()
+        if not pipeline_ok:
             logger.error("✗ Échec du chargement du pipeline de preprocessing")
             success = False
 
-        # 2. Charger le modèle supervisé
+        # 2. Import TensorFlow (souvent l'étape la plus longue à froid)
         try:
-            import tensorflow as tf
-            self.supervised_model = tf.keras.models.load_model(
-                str(artifact_paths.supervised_model),
-                compile=False,   # Pas besoin de l'optimizer en inférence
-            )
-            logger.info(f"✓ Modèle supervisé chargé : {artifact_paths.supervised_model.name}")
+            with self._timed("tensorflow_import"):
+                import tensorflow as tf
+        except Exception as e:
+            logger.error(f"✗ Import TensorFlow impossible : {e}")
+            self.timings["total"] = self._elapsed_ms(started)
+            return False
+
+        # 3. Charger le modèle supervisé
+        try:
+            with self._timed("supervised_model"):
+                self.supervised_model = tf.keras.models.load_model(
+                    str(self.paths.supervised_model),
+                    compile=False,   # Pas besoin de l'optimizer en inférence
+                )
+            logger.info(f"✓ Modèle supervisé chargé : {self.paths.supervised_model.name}")
             logger.info(f"  Input shape: {self.supervised_model.input_shape}")
             logger.info(f"  Output shape: {self.supervised_model.output_shape}")
         except Exception as e:
             logger.error(f"✗ Erreur chargement modèle supervisé : {e}")
             success = False
 
-        # 3. Charger le modèle non-supervisé (autoencoder)
+        # 4. Charger le modèle non-supervisé (autoencoder)
         try:
-            import tensorflow as tf
-            self.unsupervised_model = tf.keras.models.load_model(
-                str(artifact_paths.unsupervised_model),
-                compile=False,
-            )
-            logger.info(f"✓ Modèle non-supervisé chargé : {artifact_paths.unsupervised_model.name}")
+            with self._timed("unsupervised_model"):
+                self.unsupervised_model = tf.keras.models.load_model(
+                    str(self.paths.unsupervised_model),
+                    compile=False,
+                )
+            logger.info(f"✓ Modèle non-supervisé chargé : {self.paths.unsupervised_model.name}")
             logger.info(f"  Input shape: {self.unsupervised_model.input_shape}")
         except Exception as e:
             logger.error(f"✗ Erreur chargement modèle non-supervisé : {e}")
             success = False
 
-        # 4. Warm-up (pré-charge le graphe TensorFlow)
-        if success and inference_config.warmup_on_load:
-            self._warmup()
+        # 5. Warm-up (pré-charge le graphe TensorFlow)
+        if warmup is None:
+            warmup = inference_config.warmup_on_load
+        if success and warmup:
+            with self._timed("warmup"):
+                self._warmup()
+
+        if success:
+            with self._timed("fingerprint"):
+                self.fingerprint = self._compute_fingerprint()
+            if not self.version:
+                self.version = f"local-{self.fingerprint}"
+
+        self.timings["total"] = self._elapsed_ms(started)
+        logger.info(
+            "  Profil de chargement (ms) : "
+            + ", ".join(f"{step}={ms}" for step, ms in self.timings.items())
+        )
 
         self._is_ready = success
 
@@ -100,6 +142,19 @@ class ModelLoader:
 
         return success
 
+    @staticmethod
+    def _elapsed_ms(started: float) -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    @contextmanager
+    def _timed(self, step: str):
+        """Mesure la durée d'une étape de chargement dans self.timings."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[step] = self._elapsed_ms(started)
+
     def _warmup(self):
         """Pré-charge les graphes TF avec un sample factice."""
         try:
@@ -117,6 +172,45 @@ class ModelLoader:
         except Exception as e:
             logger.warning(f"⚠ Warm-up échoué (non bloquant) : {e}")
 
+    def _compute_fingerprint(self) -> str:
+        """Empreinte courte (SHA-256) du modèle supervisé, utilisée comme version par défaut."""
+        digest = hashlib.sha256()
+        with open(self.paths.supervised_model, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()[:12]
+
+    def check_compatibility(self) -> List[str]:
+        """
+        Vérifie en mémoire la cohérence des artifacts chargés (sans rechargement disque) :
+        sortie du pipeline ↔ entrée des modèles, classes de l'encoder ↔ sortie supervisée,
+        sortie de l'autoencoder ↔ son entrée.
+
+        Returns:
+            Liste des incohérences détectées (vide si compatible).
+        """
+        errors = []
+        if self.supervised_model is None or self.unsupervised_model is None:
+            return ["Modèles Keras non chargés"]
+
+        n_features = self.pipeline.get_info().get("n_features_out")
+        sup_in = self.supervised_model.input_shape[-1]
+        unsup_in = self.unsupervised_model.input_shape[-1]
+        if n_features is not None and sup_in is not None and sup_in != n_features:
+            errors.append(f"Entrée modèle supervisé ({sup_in}) ≠ sortie pipeline ({n_features})")
+        if n_features is not None and unsup_in is not None and unsup_in != n_features:
+            errors.append(f"Entrée autoencoder ({unsup_in}) ≠ sortie pipeline ({n_features})")
+
+        sup_out = self.supervised_model.output_shape[-1]
+        if self.pipeline.num_classes and sup_out is not None and sup_out != self.pipeline.num_classes:
+            errors.append(f"Sortie modèle supervisé ({sup_out}) ≠ classes encoder ({self.pipeline.num_classes})")
+
+        unsup_out = self.unsupervised_model.output_shape[-1]
+        if unsup_in is not None and unsup_out is not None and unsup_out != unsup_in:
+            errors.append(f"Sortie autoencoder ({unsup_out}) ≠ entrée ({unsup_in})")
+
+        return errors
+
     @property
     def is_ready(self) -> bool:
         return self._is_ready
@@ -125,33 +219,36 @@ class ModelLoader:
         """Retourne le statut détaillé de tous les artifacts."""
         return {
             "is_ready": self._is_ready,
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "load_timings_ms": self.timings,
             "artifacts": {
                 "supervised_model": {
                     "loaded": self.supervised_model is not None,
-                    "path": str(artifact_paths.supervised_model),
-                    "exists": artifact_paths.supervised_model.exists(),
+                    "path": str(self.paths.supervised_model),
+                    "exists": self.paths.supervised_model.exists(),
                 },
                 "unsupervised_model": {
                     "loaded": self.unsupervised_model is not None,
-                    "path": str(artifact_paths.unsupervised_model),
-                    "exists": artifact_paths.unsupervised_model.exists(),
+                    "path": str(self.paths.unsupervised_model),
+                    "exists": self.paths.unsupervised_model.exists(),
                 },
                 "scaler": {
                     "loaded": self.pipeline.scaler is not None,
-                    "path": str(artifact_paths.scaler),
-                    "exists": artifact_paths.scaler.exists(),
+                    "path": str(self.paths.scaler),
+                    "exists": self.paths.scaler.exists(),
                 },
                 "encoder": {
                     "loaded": self.pipeline.encoder is not None,
-                    "path": str(artifact_paths.encoder),
-                    "exists": artifact_paths.encoder.exists(),
+                    "path": str(self.paths.encoder),
+                    "exists": self.paths.encoder.exists(),
                 },
                 "feature_selector": {
                     "loaded": self.pipeline.feature_selector is not None,
-                    "path": str(artifact_paths.feature_selector),
-                    "exists": artifact_paths.feature_selector.exists(),
+                    "path": str(self.paths.feature_selector),
+                    "exists": self.paths.feature_selector.exists(),
                 },
             },
             "pipeline": self.pipeline.get_info(),
-            "missing": artifact_paths.missing_artifacts(),
+            "missing": self.paths.missing_artifacts(),
         }
@@ -3,11 +3,11 @@ Prédicteur supervisé pour la classification d'attaques réseau.
 Utilise un modèle Keras pré-entraîné (MLP ou CNN-1D).
 
 Entrée : features préprocessées (scaled + selected).
-Sortie : attack_type, probability, class_probabilities.
+Sortie : attack_type, probability, class_probabilities (ou tableaux NumPy via predict_arrays).
 """
 
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 import numpy as np
 
@@ -29,10 +29,13 @@ def create_predictor(model, class_names: Optional[List[str]] = None) -> Dict[str
     Returns:
         Dictionnaire contenant le modèle et ses paramètres de configuration.
     """
+    class_names = class_names or []
     return {
         "model": model,
-        "class_names": class_names or [],
+        "class_names": class_names,
         "min_confidence": inference_config.min_classification_confidence,
+        # Masque précalculé : évite de comparer des chaînes pour chaque flux
+        "benign_mask": np.array([_is_benign_label(name) for name in class_names], dtype=bool),
     }
 
 
@@ -107,6 +110,47 @@ def predict(predictor: Dict[str, Any], features: np.ndarray) -> Dict[str, Any]:
     }
 
 
+def predict_arrays(
+    predictor: Dict[str, Any], features: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Variante vectorisée sans dictionnaires, utilisée par le hot-path.
+
+    Args:
+        features: Array 1D ou 2D (n_samples, n_features).
+
+    Returns:
+        Tuple (indices argmax, confiances, masque is_attack, probabilités 2D).
+    """
+    features = _to_2d(features)
+    probabilities = predictor["model"].predict(
+        features,
+        batch_size=inference_config.batch_size,
+        verbose=0,
+    )
+    if probabilities.ndim == 1:
+        probabilities = probabilities.reshape(1, -1)
+
+    indices = np.argmax(probabilities, axis=1)
+    confidences = probabilities[np.arange(len(indices)), indices].astype(np.float64)
+
+    is_benign = benign_flags(predictor, indices)
+    is_attack = ~is_benign & (confidences >= predictor["min_confidence"])
+    return indices, confidences, is_attack, probabilities
+
+
+def benign_flags(predictor: Dict[str, Any], indices: np.ndarray) -> np.ndarray:
+    """
+    Masque booléen indiquant si chaque index de classe correspond à du trafic normal.
+    Les index hors encoder ("class_N") ne sont jamais considérés comme bénins.
+    """
+    benign_mask = predictor["benign_mask"]
+    is_benign = np.zeros(len(indices), dtype=bool)
+    known = indices < len(benign_mask)
+    is_benign[known] = benign_mask[indices[known]]
+    return is_benign
+
+
 def predict_batch(predictor: Dict[str, Any], features: np.ndarray) -> List[Dict[str, Any]]:
     """
     Effectue des prédictions sur un lot (batch) de features.
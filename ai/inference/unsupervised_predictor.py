@@ -8,7 +8,8 @@ Seuil adaptatif =μ + kσ (calibré pendant l'entraînement).
 """
 
 import logging
-from typing import Dict, Any, List
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Optional
 
 import numpy as np
 import joblib
@@ -18,10 +19,14 @@ from ai.config.model_config import inference_config, artifact_paths
 logger = logging.getLogger(__name__)
 
 
-def create_predictor(model) -> Dict[str, Any]:
+def create_predictor(model, threshold_path: Optional[Path] = None) -> Dict[str, Any]:
     """
     Initialise le prédicteur non-supervisé (Autoencoder).
     Charge les statistiques seuils (moyenne/écart-type de l'erreur bénigne) pour la détection d'anomalies.
+
+    Args:
+        model: L'autoencoder Keras chargé.
+        threshold_path: threshold_stats.pkl du jeu d'artifacts (défaut : ai/artifacts/).
     """
     predictor = {
         "model": model,
@@ -30,7 +35,7 @@ def create_predictor(model) -> Dict[str, Any]:
         "baseline_std": 1.0,
         "threshold": 0.0,
     }
-    _load_threshold_stats(predictor)
+    _load_threshold_stats(predictor, threshold_path or artifact_paths.threshold_stats)
     return predictor
 
 
@@ -47,9 +52,8 @@ def _set_default_threshold(predictor: Dict[str, Any]) -> None:
     predictor["threshold"] = predictor["baseline_mean"] + predictor["threshold_k"] * predictor["baseline_std"]
 
 
-def _load_threshold_stats(predictor: Dict[str, Any]) -> None:
+def _load_threshold_stats(predictor: Dict[str, Any], threshold_path: Path) -> None:
     """Charge les statistiques d'erreur de reconstruction depuis l'entraînement."""
-    threshold_path = artifact_paths.base_dir / "threshold_stats.pkl"
     if threshold_path.exists():
         try:
             stats = joblib.load(str(threshold_path))
@@ -146,6 +150,28 @@ def predict_batch(predictor: Dict[str, Any], features: np.ndarray) -> List[Dict[
     return results
 
 
+def score_arrays(
+    predictor: Dict[str, Any], features: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Variante vectorisée sans dictionnaires, utilisée par le hot-path.
+
+    Returns:
+        Tuple (erreurs de reconstruction, scores normalisés, masque is_anomaly).
+    """
+    features = _to_2d(features)
+    errors = _compute_reconstruction_error(predictor, features).astype(np.float64)
+
+    baseline_std = predictor["baseline_std"]
+    if baseline_std > 0:
+        z_scores = (errors - predictor["baseline_mean"]) / baseline_std
+        scores = np.clip(z_scores / (predictor["threshold_k"] * 2), 0.0, 1.0)
+    else:
+        scores = np.zeros_like(errors)
+
+    return errors, scores, errors > predictor["threshold"]
+
+
 def update_threshold_k(predictor: Dict[str, Any], new_k: float) -> None:
     """Permet d'ajuster dynamiquement la sensibilité de la détection."""
     predictor["threshold_k"] = new_k
@@ -13,7 +13,7 @@ import numpy as np
 import joblib
 
 from ai.preprocessing.data_validator import DataValidator, DataValidationError
-from ai.config.model_config import artifact_paths
+from ai.config.model_config import ArtifactPaths, artifact_paths
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +27,9 @@ class FeaturePipeline:
     Elle assure la cohérence entre les transformations appliquées lors de l'entraînement et celles appliquées en production.
     """
 
-    def __init__(self):
-        """Initialise le pipeline avec des composants vides."""
+    def __init__(self, paths: ArtifactPaths = artifact_paths):
+        """Initialise le pipeline avec des composants vides (artifacts lus depuis `paths`)."""
+        self.paths = paths
         self.scaler = None
         self.feature_selector = None
         self.encoder = None
@@ -49,7 +50,7 @@ class FeaturePipeline:
         try:
             # 1. Charger le Scaler (StandardScaler)
             # Indispensable pour normaliser les données (moyenne=0, écart-type=1).
-            scaler_path = artifact_paths.scaler
+            scaler_path = self.paths.scaler
             if scaler_path.exists():
                 self.scaler = joblib.load(str(scaler_path))
                 logger.info(f"✓ Scaler chargé depuis {scaler_path.name}")
@@ -59,7 +60,7 @@ class FeaturePipeline:
 
             # 2. Charger le Feature Selector (Optionnel mais recommandé)
             # Réduit la dimensionnalité en ne gardant que les fonctionnalités les plus pertinentes.
-            selector_path = artifact_paths.feature_selector
+            selector_path = self.paths.feature_selector
             if selector_path.exists():
                 self.feature_selector = joblib.load(str(selector_path))
                 logger.info(f"✓ Feature selector chargé depuis {selector_path.name}")
@@ -68,7 +69,7 @@ class FeaturePipeline:
 
             # 3. Charger l'Encoder (LabelEncoder)
             # Permet de mapper les prédictions numériques (0, 1, 2...) vers des noms d'attaques lisibles (DDoS, Botnet...).
-            encoder_path = artifact_paths.encoder
+            encoder_path = self.paths.encoder
             if encoder_path.exists():
                 self.encoder = joblib.load(str(encoder_path))
                 # Extraire les noms de classes pour un accès rapide
@@ -0,0 +1,161 @@
+"""
+Benchmark d'encodage des alertes temps réel (tempête d'alertes, sans réseau).
+
+Génère des alertes de la forme publiée par alert_service (unitaires et en lots
+alert_batch) et compare, pour chaque encodage :
+- le temps CPU d'encodage (et de décodage pour le canal Redis) ;
+- les octets produits, bruts puis après permessage-deflate simulé
+  (deflate brut, SYNC_FLUSH, avec et sans conservation du contexte).
+
+Références : json.dumps de la bibliothèque standard (ancien publish_alert et
+send_json de Starlette).
+
+Usage:
+    python -m backend.api.encoding_benchmark --alerts 20000 --batch-size 50
+"""
+
+import argparse
+import json
+import random
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Callable, Union
+
+from backend.core.serialization import (
+    HAS_MSGPACK, HAS_ORJSON, encode_ws, pack_message, unpack_message,
+)
+
+_ATTACKS = ("DDoS", "PortScan", "BruteForce", "Botnet", "WebAttack")
+_SEVERITIES = ("low", "medium", "high", "critical")
+_DECISIONS = ("confirmed_attack", "suspicious", "unknown_anomaly")
+
+
+def storm_alerts(n: int, sources: int = 200) -> List[Dict[str, Any]]:
+    """Alertes synthétiques (TEST-NET-3) de la forme publiée sur le canal temps réel."""
+    rng = random.Random(42)
+    start = datetime.utcnow()
+    alerts = []
+    for i in range(n):
+        src_ip = f"203.0.113.{rng.randrange(sources) % 254 + 1}"
+        alerts.append({
+            "flow_id": f"{rng.getrandbits(128):032x}",
+            "timestamp": (start + timedelta(milliseconds=i)).isoformat(),
+            "severity": rng.choice(_SEVERITIES),
+            "attack_type": rng.choice(_ATTACKS),
+            "threat_score": round(rng.random(), 6),
+            "decision": rng.choice(_DECISIONS),
+            "status": "open",
+            "src_ip": src_ip,
+            "dst_ip": "10.0.0.5",
+            "dst_port": rng.choice((22, 80, 443, 3389)),
+            "protocol": 6,
+            "src_country_code": "FR",
+            "alert_metadata": {
+                "src_ip": src_ip,
+                "dst_ip": "10.0.0.5",
+                "priority": rng.randint(1, 5),
+                "reasoning": "Score hybride supérieur au seuil",
+                "supervised_confidence": round(rng.random(), 6),
+                "anomaly_score": round(rng.random(), 6),
+            },
+        })
+    return alerts
+
+
+def storm_batches(alerts: List[Dict[str, Any]], batch_size: int) -> List[Dict[str, Any]]:
+    """Lots alert_batch tels que produits par alert_coalescer (une entrée par alerte)."""
+    batches = []
+    for start in range(0, len(alerts), batch_size):
+        entries = [
+            {**alert, "count": 1, "first_seen": alert["timestamp"], "last_seen": alert["timestamp"]}
+            for alert in alerts[start:start + batch_size]
+        ]
+        batches.append({"type": "alert_batch", "count": len(entries), "window_ms": 250, "alerts": entries})
+    return batches
+
+
+def _deflated_size(frames: List[bytes], context_takeover: bool) -> int:
+    """Taille après permessage-deflate (RFC 7692) : deflate brut, SYNC_FLUSH, 4 octets finaux retirés."""
+    total = 0
+    compressor = zlib.compressobj(wbits=-15)
+    for frame in frames:
+        if not context_takeover:
+            compressor = zlib.compressobj(wbits=-15)
+        data = compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        total += len(data) - 4
+    return total
+
+
+def _measure(messages: List[Dict[str, Any]], encode: Callable[[dict], Union[str, bytes]]) -> Dict[str, Any]:
+    started = time.process_time()
+    frames = [encode(message) for message in messages]
+    cpu_ms = (time.process_time() - started) * 1000
+    frames = [frame.encode() if isinstance(frame, str) else frame for frame in frames]
+    raw = sum(len(frame) for frame in frames)
+    return {
+        "cpu_ms": round(cpu_ms, 2),
+        "bytes": raw,
+        "bytes_per_alert": None,
+        "deflate_bytes": _deflated_size(frames, context_takeover=True),
+        "deflate_no_context_bytes": _deflated_size(frames, context_takeover=False),
+    }
+
+
+def _stdlib_ws(message: dict) -> str:
+    # Équivalent de WebSocket.send_json (Starlette)
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def run_benchmark(n: int, batch_size: int) -> Dict[str, Any]:
+    alerts = storm_alerts(n)
+    scenarios = {"single": alerts, "batched": storm_batches(alerts, batch_size)}
+
+    ws_encoders = {"json_stdlib": _stdlib_ws, "json": lambda m: encode_ws(m, "json"),
+                   "compact": lambda m: encode_ws(m, "compact")}
+    if HAS_MSGPACK:
+        ws_encoders["msgpack"] = lambda m: encode_ws(m, "msgpack")
+
+    websocket = {}
+    for scenario, messages in scenarios.items():
+        results = {}
+        for name, encode in ws_encoders.items():
+            entry = _measure(messages, encode)
+            entry["bytes_per_alert"] = round(entry["bytes"] / n, 1)
+            results[name] = entry
+        websocket[scenario] = results
+
+    redis_channel = {}
+    redis_encoders = {"json_stdlib": json.dumps, "json": lambda m: pack_message(m, "json")}
+    if HAS_MSGPACK:
+        redis_encoders["msgpack"] = lambda m: pack_message(m, "msgpack")
+    for name, encode in redis_encoders.items():
+        entry = _measure(alerts, encode)
+        frames = [encode(alert) for alert in alerts]
+        started = time.process_time()
+        for frame in frames:
+            json.loads(frame) if name == "json_stdlib" else unpack_message(frame)
+        entry["decode_cpu_ms"] = round((time.process_time() - started) * 1000, 2)
+        entry["bytes_per_alert"] = round(entry["bytes"] / n, 1)
+        redis_channel[name] = entry
+
+    return {
+        "alerts": n,
+        "batch_size": batch_size,
+        "orjson": HAS_ORJSON,
+        "msgpack": HAS_MSGPACK,
+        "websocket": websocket,
+        "redis_channel": redis_channel,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Coût CPU et octets des encodages d'alertes temps réel.")
+    parser.add_argument("--alerts", type=int, default=20000, help="Alertes de la tempête simulée")
+    parser.add_argument("--batch-size", type=int, default=50, help="Alertes par lot alert_batch")
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.alerts, args.batch_size), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 Routes API pour la gestion des alertes.
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
@@ -38,19 +38,33 @@ class AlertUpdateRequest(BaseModel):
 
 @router.get("/", response_model=List[AlertResponse])
 async def get_alerts(
+    response: Response,
     severity: Optional[str] = Query(None, description="Filtrer par sévérité (low, medium, high, critical)"),
     status: Optional[str] = Query(None, description="Filtrer par statut (open, acknowledged, resolved)"),
     limit: int = Query(50, ge=1, le=200, description="Nombre d'éléments par page"),
-    offset: int = Query(0, ge=0, description="Décalage pour la pagination"),
+    offset: int = Query(0, ge=0, description="Décalage pour la pagination (ignoré si `cursor` est fourni)"),
+    cursor: Optional[str] = Query(None, description="Curseur opaque de la page suivante (en-tête X-Next-Cursor)"),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Récupère la liste des alertes avec options de filtrage et pagination.
     Utilisé par la page 'Alertes' du dashboard.
+
+    Le corps reste une liste ; le curseur de la page suivante est renvoyé dans
+    l'en-tête `X-Next-Cursor` (absent sur la dernière page). Les filtres doivent
+    être répétés à l'identique d'une page à l'autre.
     """
+    try:
+        position = repository.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide.")
+
     alerts = await repository.get_alerts(
-        db=db, severity=severity, status=status, limit=limit, offset=offset
+        db=db, severity=severity, status=status, limit=limit, offset=offset, cursor=position
     )
+    token = repository.next_cursor(alerts, limit)
+    if token:
+        response.headers["X-Next-Cursor"] = token
     return [
         AlertResponse(
             id=str(a.id),
@@ -60,8 +74,8 @@ async def get_alerts(
             threat_score=a.threat_score,
             decision=a.decision,
             status=a.status,
-            src_ip=a.alert_metadata.get("src_ip") if a.alert_metadata else None,
-            dst_ip=a.alert_metadata.get("dst_ip") if a.alert_metadata else None,
+            src_ip=a.src_ip or (a.alert_metadata.get("src_ip") if a.alert_metadata else None),
+            dst_ip=a.dst_ip or (a.alert_metadata.get("dst_ip") if a.alert_metadata else None),
         )
         for a in alerts
     ]
@@ -5,42 +5,64 @@ Routes API pour le dashboard (statistiques et métriques).
 import asyncio
 
 from fastapi import APIRouter, Query
-from sqlalchemy import select, func
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Awaitable
 from datetime import datetime, timedelta
 
+from backend.core.config import get_settings
 from backend.database.connection import async_session_factory
 from backend.database import repository
-from backend.database.redis_client import get_threat_score, get_metric
-from backend.database.models import NetworkFlow, Alert
+from backend.database.redis_client import get_threat_score, get_metrics, get_gauges
+from backend.services.response_cache import cached
 
 router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
+settings = get_settings()
+
+_QUERY_TIMEOUT = 1.5
+_TOTALS_TABLES = ("network_flows", "alerts")
+
+
+async def _run_query(query: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+    """Exécute une requête du repository dans sa propre session (parallélisable via gather)."""
+    async with async_session_factory() as db:
+        return await asyncio.wait_for(query(db, *args, **kwargs), timeout=_QUERY_TIMEOUT)
 
 
 @router.get("/overview")
+@cached("dashboard.overview", ttl=5)
 async def get_dashboard_overview(
     hours: int = Query(24, ge=1, le=720, description="Période glissante en heures"),
+    estimate: bool = Query(False, description="Totaux estimés (pg_class.reltuples) au lieu des compteurs"),
 ) -> Dict[str, Any]:
     """
     Agrège les KPI principaux pour la vue 'Overview' du dashboard.
     Données temps réel + statistiques historiques.
+
+    Les totaux (`totals`) sont lus en temps constant depuis les compteurs
+    maintenus à l'écriture ; `exact` vaut False pour une estimation
+    (mode estimate ou compteur pas encore recalé).
     """
-    async with async_session_factory() as db:
-        try:
-            # Exécution parallèle des requêtes DB pour réduire la latence
-            alert_stats = await asyncio.wait_for(repository.get_alert_stats(db, hours=hours), timeout=1.5)
-            anomaly_rate = await asyncio.wait_for(repository.get_anomaly_rate(db, hours=hours), timeout=1.5)
-            total_flows = await asyncio.wait_for(repository.count_flows(db), timeout=1.5)
-        except Exception:
-            # Fallback en cas de timeout ou erreur DB pour ne pas casser le dashboard
-            alert_stats = {"total": 0, "by_severity": {}}
-            anomaly_rate = 0.0
-            total_flows = 0
+    mode = "estimate" if estimate else settings.totals_mode
 
-    try:
-        # Score de menace temps réel depuis Redis (calculé par AlertService)
-        threat_score = await get_threat_score()
-    except Exception:
+    # Exécution parallèle : une session par requête, plus le score Redis
+    alert_stats, anomaly_rate, totals, threat_score = await asyncio.gather(
+        _run_query(repository.get_alert_stats, hours=hours),
+        _run_query(repository.get_anomaly_rate, hours=hours),
+        _run_query(repository.get_table_totals, _TOTALS_TABLES, mode=mode),
+        get_threat_score(),  # Score de menace temps réel (calculé par AlertService)
+        return_exceptions=True,
+    )
+
+    # Fallback par indicateur en cas de timeout ou d'erreur, pour ne pas casser le dashboard
+    if isinstance(alert_stats, Exception):
+        alert_stats = {"total": 0, "by_severity": {}}
+    if isinstance(anomaly_rate, Exception):
+        anomaly_rate = 0.0
+    if isinstance(totals, Exception):
+        totals = {
+            table: {"count": 0, "exact": False, "source": "unavailable"}
+            for table in _TOTALS_TABLES
+        }
+    if isinstance(threat_score, Exception):
         threat_score = 0.0
 
     return {
@@ -48,12 +70,15 @@ async def get_dashboard_overview(
         "total_alerts": alert_stats.get("total", 0),
         "alerts_by_severity": alert_stats.get("by_severity", {}),
         "anomaly_rate": round(anomaly_rate, 4),
-        "total_flows_analyzed": total_flows,
+        "total_flows_analyzed": totals["network_flows"]["count"],
+        "total_flows_exact": totals["network_flows"]["exact"],
+        "totals": totals,
         "period_hours": hours,
     }
 
 
 @router.get("/attack-distribution")
+@cached("dashboard.attack_distribution", ttl=10)
 async def get_attack_distribution(
     hours: int = Query(24, ge=1, le=720),
 ):
@@ -69,6 +94,7 @@ async def get_attack_distribution(
 
 
 @router.get("/top-threats")
+@cached("dashboard.top_threats", ttl=10)
 async def get_top_threats(
     limit: int = Query(10, ge=1, le=50),
     hours: int = Query(24, ge=1, le=720),
@@ -105,95 +131,87 @@ async def get_recent_alerts(
             "threat_score": a.threat_score,
             "decision": a.decision,
             "status": a.status,
-            "src_ip": a.alert_metadata.get("src_ip") if a.alert_metadata else None,
+            "src_ip": a.src_ip or (a.alert_metadata.get("src_ip") if a.alert_metadata else None),
         }
         for a in alerts
     ]
 
 
+METRIC_COUNTERS = (
+    "packets_captured",
+    "packets_processed",
+    "flows_analyzed",
+    "predictions_made",
+    "anomalies_detected",
+    "alerts_generated",
+    "cache_hits",
+    "cache_misses",
+    "cache_recompute_ms",
+)
+METRIC_GAUGES = ("active_flows", "buffer_usage", "current_threat_score")
+
+
 @router.get("/metrics")
 async def get_system_metrics():
     """
-    Métriques techniques brutes depuis Redis (compteurs atomiques).
+    Métriques techniques brutes depuis Redis (compteurs agrégés de tous les workers,
+    publiés par metrics_service toutes les METRICS_FLUSH_INTERVAL_SECONDS).
     - packets_processed: performance capture
     - flows_analyzed: performance IA
     - alerts_generated: activité détection
+    - cache_hits / cache_misses / cache_recompute_ms: cache de réponses (response_cache)
     """
     try:
-        packets_processed = await get_metric("packets_processed")
-        flows_analyzed = await get_metric("flows_analyzed")
-        alerts_generated = await get_metric("alerts_generated")
+        counters, gauges = await asyncio.gather(
+            get_metrics(list(METRIC_COUNTERS)),
+            get_gauges(list(METRIC_GAUGES)),
+        )
     except Exception:
-        packets_processed = flows_analyzed = alerts_generated = 0
+        counters = dict.fromkeys(METRIC_COUNTERS, 0)
+        gauges = dict.fromkeys(METRIC_GAUGES)
 
+    lookups = counters.get("cache_hits", 0) + counters.get("cache_misses", 0)
     return {
-        "packets_processed": packets_processed,
-        "flows_analyzed": flows_analyzed,
-        "alerts_generated": alerts_generated,
+        **counters,
+        "cache_hit_ratio": round(counters.get("cache_hits", 0) / lookups, 4) if lookups else None,
+        "gauges": gauges,
     }
 
 
+# Séries du graphique principal : {nom: (dimension, clés retenues)}
+TIMESERIES_SERIES = {
+    "total": ("flows", None),
+    "suspicious": ("decision", ("suspicious", "unknown_anomaly")),
+    "attacks": ("decision", ("confirmed_attack",)),
+}
+
+
 @router.get("/traffic-timeseries")
+@cached("dashboard.traffic_timeseries", ttl=15)
 async def get_traffic_timeseries(
     hours: int = Query(24, ge=1, le=720),
 ):
     """
     Construit les séries temporelles pour le graphique principal.
     Superpose le trafic total, suspect et les attaques confirmées par heure.
+    Lu depuis les agrégats en un seul passage (agrégats conditionnels FILTER).
     """
     since = datetime.utcnow() - timedelta(hours=hours)
-    bucket = func.date_trunc("hour", NetworkFlow.timestamp)
-
-    # Requête 1: Trafic total par heure
-    total_q = (
-        select(bucket.label("bucket"), func.count(NetworkFlow.id).label("total"))
-        .where(NetworkFlow.timestamp >= since)
-        .group_by(bucket)
-        .order_by(bucket)
-    )
-
-    # Requête 2: Activité suspecte (Alerts low/medium)
-    suspicious_q = (
-        select(bucket.label("bucket"), func.count(Alert.id).label("count"))
-        .join(Alert, Alert.flow_id == NetworkFlow.id)
-        .where(NetworkFlow.timestamp >= since)
-        .where(Alert.decision.in_(["suspicious", "unknown_anomaly"]))
-        .group_by(bucket)
-        .order_by(bucket)
-    )
-
-    # Requête 3: Attaques confirmées (Alerts high/critical)
-    attacks_q = (
-        select(bucket.label("bucket"), func.count(Alert.id).label("count"))
-        .join(Alert, Alert.flow_id == NetworkFlow.id)
-        .where(NetworkFlow.timestamp >= since)
-        .where(Alert.decision == "confirmed_attack")
-        .group_by(bucket)
-        .order_by(bucket)
-    )
 
-    async with async_session_factory() as db:
-        try:
-            total_rows = await asyncio.wait_for(db.execute(total_q), timeout=1.5)
-            suspicious_rows = await asyncio.wait_for(db.execute(suspicious_q), timeout=1.5)
-            attack_rows = await asyncio.wait_for(db.execute(attacks_q), timeout=1.5)
-        except Exception:
-            return {"series": [], "period_hours": hours}
-
-    # Agrégation et formatage des données
-    totals = {row.bucket: int(row.total or 0) for row in total_rows}
-    suspicious = {row.bucket: int(row.count or 0) for row in suspicious_rows}
-    attacks = {row.bucket: int(row.count or 0) for row in attack_rows}
+    try:
+        rows = await _run_query(repository.get_rollup_series, since, TIMESERIES_SERIES)
+    except Exception:
+        return {"series": [], "period_hours": hours}
 
-    buckets = sorted(set(totals.keys()) | set(suspicious.keys()) | set(attacks.keys()))
+    # Formatage des données
     series = []
-    for b in buckets:
-        s = suspicious.get(b, 0)
-        a = attacks.get(b, 0)
-        normal = max(totals.get(b, 0) - s - a, 0)
+    for row in rows:
+        s = row["suspicious"]
+        a = row["attacks"]
+        normal = max(row["total"] - s - a, 0)
         series.append(
             {
-                "time": b.strftime("%H:00"),
+                "time": row["bucket"].strftime("%H:00"),
                 "normal": normal,
                 "suspicious": s,
                 "attacks": a,
@@ -213,22 +231,14 @@ async def get_protocol_distribution(
     since = datetime.utcnow() - timedelta(hours=hours)
     async with async_session_factory() as db:
         try:
-            rows = await asyncio.wait_for(
-                db.execute(
-                    select(NetworkFlow.protocol, func.count(NetworkFlow.id).label("count"))
-                    .where(NetworkFlow.timestamp >= since)
-                    .group_by(NetworkFlow.protocol)
-                    .order_by(func.count(NetworkFlow.id).desc())
-                ),
-                timeout=1.5,
-            )
+            rows = await asyncio.wait_for(repository.get_rollup(db, "protocol", since), timeout=1.5)
         except Exception:
             return {"distribution": [], "period_hours": hours}
 
     protocol_names = {1: "ICMP", 6: "TCP", 17: "UDP"}
     distribution = []
-    for row in rows:
-        raw_protocol = row.protocol
+    for row in sorted(rows, key=lambda r: r["count"], reverse=True):
+        raw_protocol = row["key"]
         if raw_protocol is None:
             name = "UNKNOWN"
         else:
@@ -241,7 +251,7 @@ async def get_protocol_distribution(
         distribution.append(
             {
                 "name": name,
-                "count": int(row.count or 0),
+                "count": row["count"],
             }
         )
 
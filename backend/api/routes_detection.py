@@ -12,17 +12,21 @@ from pydantic import BaseModel
 from typing import Optional, List
 import numpy as np
 
+from ai.inference.detection_result import DetectionResult
+from capture.feature_extractor import FEATURE_SCHEMA_VERSION
 from backend.core.config import get_settings
 from backend.database.connection import async_session_factory
-from backend.database import repository
-from backend.services import alert_service, capture_service, detection_service
+from backend.database import repository, feature_codec
+from backend.services import (
+    alert_service, capture_service, detection_service, kpi_service, model_version_service, persistence_service,
+)
+from monitoring.metrics import metrics
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 # ---- Configuration du module ----
 router = APIRouter(prefix="/api/detection", tags=["Detection"])
-_init_attempted = False
 _capture_task: Optional[asyncio.Task] = None
 
 # Configuration initiale de la capture (au chargement du module)
@@ -33,16 +37,15 @@ capture_service.configure_capture(
 )
 
 
-def ensure_detection_ready() -> bool:
+async def ensure_detection_ready(timeout: Optional[float] = None) -> bool:
     """
-    Vérifie et initialise le service de détection (Lazy Loading).
-    Évite de bloquer le démarrage de l'app si les modèles sont lourds.
+    Attend que les modèles soient prêts (préchargés en arrière-plan au démarrage).
+    Ne bloque jamais la boucle asyncio : au-delà du délai, retourne False.
+    Sans préchargement au démarrage, charge les versions actives du registre.
     """
-    global _init_attempted
-    if not detection_service.is_ready() and not _init_attempted:
-        _init_attempted = True
-        detection_service.initialize()
-    return detection_service.is_ready()
+    if timeout is None:
+        timeout = settings.model_ready_timeout_seconds
+    return await detection_service.wait_until_ready(timeout, model_version_service.resolve_active)
 
 
 class DetectionRequest(BaseModel):
@@ -79,7 +82,21 @@ def _build_reasoning(decision: dict) -> str:
     )
 
 
-def _build_flow_data(flow) -> dict:
+def _encoded_features(features: Optional[np.ndarray]) -> dict:
+    """Colonnes features / feature_schema_version (float32 compact, voir feature_codec)."""
+    if features is None or not settings.persistence_store_features:
+        return {"features": None, "feature_schema_version": None}
+    return {"features": feature_codec.encode_features(features), "feature_schema_version": FEATURE_SCHEMA_VERSION}
+
+
+def _top_k_columns(record: DetectionResult) -> dict:
+    """Colonnes top_k_indices / top_k_probabilities d'une prédiction."""
+    arrays = record.top_k_arrays()
+    indices, probabilities = arrays if arrays is not None else (None, None)
+    return {"top_k_indices": indices, "top_k_probabilities": probabilities}
+
+
+def _build_flow_data(flow, features: Optional[np.ndarray] = None) -> dict:
     """Convertit un objet Flow interne en dictionnaire pour la DB."""
     flow_dict = flow.to_dict()
     total_packets = max(1, flow.total_packets)
@@ -100,7 +117,7 @@ def _build_flow_data(flow) -> dict:
         "total_bwd_packets": flow.total_bwd_packets,
         "flow_bytes_per_s": (total_bytes / duration) if duration > 0 else total_bytes,
         "flow_packets_per_s": (total_packets / duration) if duration > 0 else float(total_packets),
-        "raw_features": None, # On ne stocke pas les raw features en DB pour gagner de la place (optionnel)
+        **_encoded_features(features),
     }
 
 
@@ -108,38 +125,39 @@ async def _persist_flow_only(flow) -> None:
     """Enregistre un flux sans analyse (si erreur ou service non prêt)."""
     async with async_session_factory() as db:
         try:
-            await repository.create_flow(db, _build_flow_data(flow))
+            await repository.create_flow(db, _build_flow_data(flow, detection_service.extract_features(flow)))
             await db.commit()
         except Exception as e:
             await db.rollback()
             logger.error(f"Erreur persistance flow: {e}")
 
 
-async def _persist_flow_result(flow, result: dict) -> None:
+async def _persist_flow_result(flow, record: DetectionResult) -> None:
     """
     Enregistre le flux ET les résultats de son analyse (Prédictions, Anomalies, Alertes).
-    Tout est fait dans une transaction atomique.
+    Tout est fait dans une transaction atomique ; les écritures Redis (alerte,
+    score de menace) partent en un pipeline après le commit.
     """
-    decision = result.get("decision", {})
-    supervised = result.get("supervised", {})
-    unsupervised = result.get("unsupervised", {})
-
+    pending = []
+    # Compteurs de lignes cumulés, appliqués une seule fois avant le commit
+    deltas = {}
     async with async_session_factory() as db:
         try:
             # 1. Création du Flux
-            created_flow = await repository.create_flow(db, _build_flow_data(flow))
+            created_flow = await repository.create_flow(db, _build_flow_data(flow, record.features), deltas=deltas)
 
-            # 2. Enregistrement Prédiction Supervisée
+            # 2. Enregistrement Prédiction Supervisée (top-k uniquement)
             await repository.create_prediction(
                 db,
                 {
                     "flow_id": created_flow.id,
                     "timestamp": datetime.utcnow(),
-                    "model_version": "latest",
-                    "predicted_label": supervised.get("attack_type") or "BENIGN",
-                    "confidence": float(supervised.get("probability", 0.0)),
-                    "class_probabilities": supervised.get("class_probabilities"),
+                    "model_version": record.model_version or "latest",
+                    "predicted_label": record.predicted_label,
+                    "confidence": record.confidence,
+                    **_top_k_columns(record),
                 },
+                deltas=deltas,
             )
 
             # 3. Enregistrement Score Anomalie
@@ -148,52 +166,115 @@ async def _persist_flow_result(flow, result: dict) -> None:
                 {
                     "flow_id": created_flow.id,
                     "timestamp": datetime.utcnow(),
-                    "reconstruction_error": float(unsupervised.get("reconstruction_error", 0.0)),
-                    "anomaly_score": float(unsupervised.get("anomaly_score", 0.0)),
-                    "threshold_used": float(unsupervised.get("threshold", 0.0)),
-                    "is_anomaly": bool(unsupervised.get("is_anomaly", False)),
+                    "reconstruction_error": record.reconstruction_error,
+                    "anomaly_score": record.anomaly_score,
+                    "threshold_used": record.threshold,
+                    "is_anomaly": record.is_anomaly,
                 },
+                deltas=deltas,
             )
 
             # 4. Création d'Alerte si nécessaire
-            if decision.get("decision") and decision.get("decision") != "normal":
+            if record.is_alert:
                 alert_payload = await alert_service.create_alert(
                     flow_id=created_flow.id,
-                    decision={
-                        "severity": decision.get("severity", "low"),
-                        "attack_type": decision.get("attack_type"),
-                        "threat_score": float(decision.get("final_risk_score", 0.0)),
-                        "decision": decision.get("decision", "normal"),
-                        "priority": decision.get("priority", 5),
-                        "reasoning": _build_reasoning(decision),
-                        "supervised_confidence": float(decision.get("probability", 0.0)),
-                        "anomaly_score": float(decision.get("anomaly_score", 0.0)),
-                    },
-                    flow_metadata=result.get("flow_metadata", {}),
+                    record=record,
+                    pending=pending,
                 )
-                await repository.create_alert(db, alert_payload)
+                await repository.create_alert(db, alert_payload, deltas=deltas)
 
-            # 5. MAJ Score Global de Menace
-            await alert_service.update_threat_score(float(decision.get("final_risk_score", 0.0)))
+            await repository.bump_row_counters(db, deltas)
             await db.commit()
         except Exception as e:
             await db.rollback()
             logger.error(f"Erreur persistance flow/result: {e}")
+            return
+
+    # 5. MAJ Score Global de Menace puis publication temps réel (hors transaction)
+    alert_service.observe_risk(record.risk)
+    await alert_service.flush_realtime(pending)
+
+
+def _build_result_rows(flow_id: str, timestamp: datetime, record: DetectionResult) -> tuple:
+    """Lignes predictions / anomaly_scores d'un résultat, rattachées au flow_id généré côté client."""
+    prediction = {
+        "id": repository.new_id(),
+        "flow_id": flow_id,
+        "timestamp": timestamp,
+        "model_version": record.model_version or "latest",
+        "predicted_label": record.predicted_label,
+        "confidence": record.confidence,
+        **_top_k_columns(record),
+    }
+    anomaly = {
+        "id": repository.new_id(),
+        "flow_id": flow_id,
+        "timestamp": timestamp,
+        "reconstruction_error": record.reconstruction_error,
+        "anomaly_score": record.anomaly_score,
+        "threshold_used": record.threshold,
+        "is_anomaly": record.is_anomaly,
+    }
+    return prediction, anomaly
+
+
+async def _persist_batch(flows: list, records: list) -> None:
+    """
+    Construit les lignes d'un lot (flux + prédictions + anomalies + alertes)
+    avec des IDs générés côté client, puis les confie au writer différé :
+    la capture n'attend jamais PostgreSQL. Sans writer démarré, le lot est
+    écrit immédiatement en une transaction. Les écritures Redis du lot
+    partent après le commit, en un seul pipeline (alert_service.flush_realtime,
+    appelé par persistence_service).
+    """
+    items = []
+    pending = []
+
+    for flow, record in zip(flows, records):
+        features = record.features if record is not None else detection_service.extract_features(flow)
+        flow_row = _build_flow_data(flow, features)
+        flow_row["id"] = repository.new_id()
+        if record is None:
+            items.append((flow_row, None, None, None))
+            continue
+
+        prediction, anomaly = _build_result_rows(flow_row["id"], flow_row["timestamp"], record)
+        alert_row = None
+        if record.is_alert:
+            alert_row = await alert_service.create_alert(flow_id=flow_row["id"], record=record, pending=pending)
+            alert_row["id"] = repository.new_id()
+        items.append((flow_row, prediction, anomaly, alert_row))
+        alert_service.observe_risk(record.risk)
+
+    if not persistence_service.enqueue(items, realtime=pending):
+        await persistence_service.flush_now(items, realtime=pending)
 
 
 async def _persist_completed_flows(flows: list) -> None:
-    """Traite un lot de flux terminés : analyse et persistance."""
+    """
+    Traite un lot de flux terminés : analyse et persistance.
+    Le lot entier est analysé avec le même jeu de modèles (rechargement à chaud).
+    """
     if detection_service.is_ready():
-        for flow in flows:
-            result = detection_service.analyze_flow(flow)
-            if "error" in result:
-                await _persist_flow_only(flow)
-            else:
-                await _persist_flow_result(flow, result)
+        records = detection_service.analyze_flows(flows)
+        analyzed = [record for record in records if record is not None]
+        metrics.increment("flows_analyzed", len(analyzed))
+        metrics.increment("predictions_made", len(analyzed))
+        metrics.increment("anomalies_detected", sum(1 for record in analyzed if record.is_anomaly))
     else:
         # Fallback si le service d'IA n'est pas prêt
-        for flow in flows:
+        records = [None] * len(flows)
+    kpi_service.observe_flows(flows, records)
+
+    if settings.persistence_bulk_enabled:
+        await _persist_batch(flows, records)
+        return
+
+    for flow, record in zip(flows, records):
+        if record is None:
             await _persist_flow_only(flow)
+        else:
+            await _persist_flow_result(flow, record)
 
 
 async def _capture_loop() -> None:
@@ -202,7 +283,8 @@ async def _capture_loop() -> None:
     Récupère les paquets, construit les flux, et les envoie à l'analyse par lots.
     """
     logger.info("Boucle de capture démarrée")
-    ensure_detection_ready()
+    # Pas d'attente des modèles : tant qu'ils chargent, _persist_completed_flows
+    # persiste les flux sans analyse au lieu de laisser déborder le buffer de capture
     last_force_flush = time.time()
 
     while capture_service.is_running():
@@ -244,8 +326,13 @@ async def analyze_features(request: DetectionRequest):
     Analyse un vecteur de features via le pipeline hybride.
     Endpoint utilisé principalement pour le replay ou les tests unitaires.
     """
-    if not ensure_detection_ready():
-        raise HTTPException(status_code=503, detail="Modèles non chargés")
+    if not await ensure_detection_ready():
+        readiness = detection_service.get_readiness()
+        raise HTTPException(
+            status_code=503,
+            detail=f"Modèles non chargés (état : {readiness['state']})",
+            headers={"Retry-After": "5"} if readiness["state"] == "loading" else None,
+        )
 
     features = np.array(request.features, dtype=np.float32)
     result = detection_service.analyze_features(features, request.ip_reputation)
@@ -270,15 +357,23 @@ async def analyze_features(request: DetectionRequest):
 @router.get("/status")
 async def detection_status():
     """Retourne l'état complet du service de détection (modèles chargés, statut...)."""
-    ensure_detection_ready()
     status_data = detection_service.get_status()
+    readiness = status_data["readiness"]
     return {
         "status": "running" if status_data.get("is_ready") else "degraded",
         "models_loaded": status_data.get("is_ready", False),
+        "readiness": readiness["state"],
+        "readiness_details": readiness,
+        "model_version": status_data.get("model_version"),
         "artifacts": status_data.get("artifacts", {}),
+        "inference_cache": status_data.get("inference_cache", {}),
+        "cascade": status_data.get("cascade", {}),
+        "persistence": persistence_service.get_stats(),
         "message": (
             "Service de détection opérationnel"
             if status_data.get("is_ready")
+            else "Chargement des modèles en cours"
+            if readiness["state"] == "loading"
             else "Service démarré, modèles non chargés"
         ),
     }
@@ -313,6 +408,10 @@ async def start_capture():
             },
         }
 
+    # Chargement des modèles (versions actives) sans attente : lancé s'il ne l'a
+    # jamais été ou relancé après un échec ; la capture persiste sans analyse d'ici là
+    if not detection_service.is_ready():
+        detection_service.start_preload(model_version_service.resolve_active)
     _capture_task = asyncio.create_task(_capture_loop())
     status = capture_service.get_status()
     return {
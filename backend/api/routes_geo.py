@@ -10,9 +10,10 @@ from pydantic import BaseModel
 from typing import Optional, List
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.database.connection import get_db
+from backend.database.connection import async_session_factory, get_db
 from backend.database import repository
 from backend.services import geo_service
+from backend.services.response_cache import cached
 
 router = APIRouter(prefix="/api/geo", tags=["Geolocation"])
 logger = logging.getLogger(__name__)
@@ -79,16 +80,18 @@ async def locate_batch(ips: List[str]):
 
 
 @router.get("/attack-map")
-async def get_attack_map(
-    db: AsyncSession = Depends(get_db),
-):
+@cached("geo.attack_map", ttl=30)
+async def get_attack_map():
     """
     Fournit les données agrégées pour la carte mondiale des cyberattaques.
     Croise les IPs les plus menaçantes avec leurs coordonnées géographiques.
+    Session ouverte dans le calcul : partagé par les requêtes regroupées du cache,
+    il ne dépend pas de la session (Depends) du premier demandeur.
     """
     try:
         # 1. Récupération du Top 50 des attaquants (24h)
-        top_ips = await repository.get_top_alert_ips(db, limit=50, hours=24)
+        async with async_session_factory() as db:
+            top_ips = await repository.get_top_alert_ips(db, limit=50, hours=24)
     except Exception as e:
         logger.warning(f"Attack map indisponible (DB): {e}")
         return {
@@ -1,15 +1,21 @@
 """
 Routes pour le statut des modèles AI.
-En mode production, les modèles sont figés (pas de versioning dynamique).
+Les versions du registre model_versions peuvent être activées à chaud :
+le candidat est chargé et validé à côté du jeu actif avant la bascule.
 Inclut les endpoints de healthcheck : fichiers, chargement, inférence, compatibilité.
 """
 
 import asyncio
 import logging
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any
 
 from ai.config.model_config import artifact_paths, inference_config
+from backend.database.connection import get_db
+from backend.database import repository
+from backend.services import detection_service
+from backend.services import model_version_service
 
 router = APIRouter(prefix="/api/models", tags=["Models"])
 logger = logging.getLogger(__name__)
@@ -55,9 +61,73 @@ async def get_inference_config() -> Dict[str, Any]:
         },
         "batch_size": inference_config.batch_size,
         "warmup_on_load": inference_config.warmup_on_load,
+        "top_k_probabilities": inference_config.top_k_probabilities,
+        "cache": {
+            "enabled": inference_config.cache_enabled,
+            "max_entries": inference_config.cache_max_entries,
+            "ttl_seconds": inference_config.cache_ttl_seconds,
+            "quantization": inference_config.cache_quantization,
+        },
+        "cascade": {
+            "enabled": inference_config.cascade_enabled,
+            "benign_confidence": inference_config.cascade_benign_confidence,
+            "attack_confidence": inference_config.cascade_attack_confidence,
+            "max_abs_feature": inference_config.cascade_max_abs_feature,
+        },
+    }
+
+
+# =========================================================================
+#  VERSIONS & RECHARGEMENT À CHAUD
+# =========================================================================
+
+@router.get("/active")
+async def get_active_models() -> Dict[str, Any]:
+    """Version des modèles servant actuellement l'inférence."""
+    status = detection_service.get_status()
+    return {
+        "is_ready": status["is_ready"],
+        "model_version": status["model_version"],
+        "fingerprint": status["artifacts"].get("fingerprint"),
+        "reload": status["reload"],
     }
 
 
+@router.get("/versions")
+async def list_model_versions(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
+    """Historique du registre des versions, par type de modèle."""
+    return {
+        model_type: [
+            model_version_service.serialize_version(v)
+            for v in await repository.get_model_versions(db, model_type)
+        ]
+        for model_type in ("supervised", "unsupervised")
+    }
+
+
+@router.post("/versions/{model_id}/activate")
+async def activate_model_version(model_id: str) -> Dict[str, Any]:
+    """
+    Active une version du registre sans interrompre la détection.
+    Le registre n'est modifié que si le candidat se charge et passe les contrôles de compatibilité.
+    """
+    result = await model_version_service.activate_version(model_id)
+    if result["status"] == "not_found":
+        raise HTTPException(status_code=404, detail="Version de modèle introuvable")
+    if result["status"] == "failed":
+        raise HTTPException(status_code=409, detail=result["errors"])
+    return result
+
+
+@router.post("/reload")
+async def reload_models() -> Dict[str, Any]:
+    """Recharge à chaud les versions actives du registre (ou ai/artifacts/ par défaut)."""
+    result = await model_version_service.reload_active()
+    if result["status"] == "failed":
+        raise HTTPException(status_code=409, detail=result["errors"])
+    return result
+
+
 # =========================================================================
 #  HEALTHCHECK ENDPOINTS — Diagnostic complet des modèles IA
 # =========================================================================
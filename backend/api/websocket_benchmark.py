@@ -0,0 +1,168 @@
+"""
+Test de charge de la diffusion WebSocket (sans réseau ni Redis).
+
+Des clients simulés (envoi instantané pour les rapides, `--slow-delay-ms`
+par message pour les lents) sont branchés sur un ConnectionManager ; on
+mesure, pour un nombre croissant de clients lents :
+- la durée d'un appel à broadcast() ;
+- le délai de livraison aux clients rapides (broadcast → send_json terminé).
+
+Avec des files bornées et une tâche d'écriture par client, ces deux mesures
+doivent rester plates quand on ajoute des clients lents. `--subscription`
+abonne tous les clients à un filtre : seuls les messages retenus sont envoyés.
+
+Usage:
+    python -m backend.api.websocket_benchmark --fast 10 --slow 0,10,50,100 --messages 200
+    python -m backend.api.websocket_benchmark --subscription '{"min_severity": "critical"}'
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, Any, List, Optional
+
+from backend.api.websocket_handler import ConnectionManager
+from backend.api.websocket_filters import SubscriptionFilter
+from backend.core.serialization import json_loads, unpack_message
+
+_SEVERITIES = ("low", "medium", "high", "critical")
+
+
+class _SimulatedSocket:
+    """Socket factice : chaque envoi prend `delay` secondes."""
+
+    client = None
+
+    def __init__(self, delay: float, deliveries: List[float] = None):
+        self.delay = delay
+        self.deliveries = deliveries
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        await self._deliver(data, json_loads)
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self._deliver(data, unpack_message)
+
+    async def _deliver(self, data, decode) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.deliveries is not None:
+            message = decode(data)
+            if isinstance(message, dict) and "sent_at" in message:
+                self.deliveries.append((time.perf_counter() - message["sent_at"]) * 1000)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        pass
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    values = sorted(values)
+    return {
+        "p50_ms": round(values[len(values) // 2], 3),
+        "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        "max_ms": round(values[-1], 3),
+    }
+
+
+async def _run_scenario(
+    fast: int, slow: int, messages: int, interval: float, slow_delay: float, queue_size: int, policy: str,
+    subscription: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    manager = ConnectionManager(queue_size, policy)
+    deliveries: List[float] = []
+    sockets = [_SimulatedSocket(0.0, deliveries) for _ in range(fast)]
+    sockets += [_SimulatedSocket(slow_delay) for _ in range(slow)]
+    for socket in sockets:
+        client = await manager.connect(socket)
+        if subscription:
+            client.subscription = SubscriptionFilter(subscription)
+
+    reference = SubscriptionFilter(subscription) if subscription else None
+    broadcast_ms = []
+    matching = 0
+    for i in range(messages):
+        started = time.perf_counter()
+        message = {
+            "type": "alert",
+            "severity": _SEVERITIES[i % len(_SEVERITIES)],
+            "attack_type": "PortScan",
+            "src_ip": f"10.0.{i % 4}.{i % 250 + 1}",
+            "seq": i,
+            "sent_at": started,
+        }
+        manager.broadcast(message)
+        broadcast_ms.append((time.perf_counter() - started) * 1000)
+        matching += 1 if reference is None or reference.match(message) else 0
+        await asyncio.sleep(interval)
+    await asyncio.sleep(0.05)  # Laisse les clients rapides vider leur file
+
+    stats = manager.get_stats()
+    for socket in sockets:
+        manager.disconnect(socket)
+    return {
+        "slow_clients": slow,
+        "broadcast": _percentiles(broadcast_ms),
+        "fast_delivery": _percentiles(deliveries),
+        "fast_delivered": len(deliveries),
+        "expected_fast_deliveries": fast * matching,
+        "totals": stats["totals"],
+    }
+
+
+async def run_load_test(
+    fast: int, slow_counts: List[int], messages: int, rate: float, slow_delay_ms: float, queue_size: int, policy: str,
+    subscription: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Un scénario par nombre de clients lents."""
+    scenarios = [
+        await _run_scenario(fast, slow, messages, 1.0 / rate, slow_delay_ms / 1000, queue_size, policy, subscription)
+        for slow in slow_counts
+    ]
+    baseline = scenarios[0]["fast_delivery"]["p95_ms"] or None
+    for scenario in scenarios:
+        if baseline:
+            scenario["fast_p95_vs_baseline"] = round(scenario["fast_delivery"]["p95_ms"] / baseline, 2)
+    return {
+        "fast_clients": fast,
+        "messages": messages,
+        "rate_per_s": rate,
+        "slow_delay_ms": slow_delay_ms,
+        "queue_size": queue_size,
+        "policy": policy,
+        "subscription": subscription,
+        "mean_fast_p95_ms": round(statistics.fmean(s["fast_delivery"]["p95_ms"] for s in scenarios), 3),
+        "scenarios": scenarios,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latence de diffusion WebSocket en présence de clients lents.")
+    parser.add_argument("--fast", type=int, default=10, help="Clients rapides")
+    parser.add_argument("--slow", default="0,10,50,100", help="Nombres de clients lents (séparés par des virgules)")
+    parser.add_argument("--messages", type=int, default=200, help="Messages diffusés par scénario")
+    parser.add_argument("--rate", type=float, default=200.0, help="Messages par seconde")
+    parser.add_argument("--slow-delay-ms", type=float, default=50.0, help="Durée d'un envoi pour un client lent")
+    parser.add_argument("--queue-size", type=int, default=64, help="Taille de la file par client")
+    parser.add_argument("--policy", default="coalesce", help="drop_oldest, coalesce ou disconnect")
+    parser.add_argument("--subscription", default=None, help="Filtre d'abonnement JSON appliqué à tous les clients")
+    args = parser.parse_args()
+
+    slow_counts = [int(value) for value in args.slow.split(",") if value.strip()]
+    report = asyncio.run(
+        run_load_test(
+            args.fast, slow_counts, args.messages, args.rate, args.slow_delay_ms, args.queue_size, args.policy,
+            json.loads(args.subscription) if args.subscription else None,
+        )
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
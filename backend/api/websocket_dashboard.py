@@ -0,0 +1,231 @@
+"""
+WebSocket /ws/dashboard : KPI de la vue d'ensemble poussés par le serveur.
+
+Remplace le polling de /api/dashboard/overview : une tâche par processus
+(démarrée dans le lifespan) lit les KPI tenus en mémoire par kpi_service à
+cadence fixe (DASHBOARD_PUSH_INTERVAL_MS) et ne diffuse que les champs qui ont
+changé. Le delta est calculé et encodé une seule fois pour tous les clients ;
+aucun écran ne déclenche de requête PostgreSQL.
+
+Messages :
+- {"type": "kpi_snapshot", "seq": n, "kpis": {...}} : état complet (connexion,
+  commande "snapshot", ou client qui n'a pas suivi) ;
+- {"type": "kpi_delta", "seq": n, "changed": {...}} : champs modifiés depuis seq n-1
+  (un champ dictionnaire, comme alerts_by_severity, est renvoyé en entier) ;
+- {"type": "heartbeat", "seq": n} : aucune modification depuis un moment.
+Un client qui constate un trou dans seq demande {"type": "snapshot"}.
+
+Un client dont l'envoi précédent n'est pas terminé saute le tick et recevra
+un snapshot au suivant : l'état le plus récent remplace les deltas manqués.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from backend.core.config import get_settings
+from backend.core.serialization import json_dumps, json_loads
+from backend.services import kpi_service
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_HEARTBEAT_SECONDS = 15.0
+_SEND_TIMEOUT = 5.0
+
+
+class DashboardClient:
+    """Connexion /ws/dashboard : un envoi à la fois (verrou), snapshot dû si un tick est sauté."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.lock = asyncio.Lock()
+        self.needs_snapshot = True
+        self.sent = 0
+        self.skipped = 0
+
+    async def send(self, frame: str) -> bool:
+        """Envoie une trame ; False si le client est injoignable."""
+        async with self.lock:
+            try:
+                await asyncio.wait_for(self.websocket.send_text(frame), timeout=_SEND_TIMEOUT)
+            except Exception:
+                return False
+        self.sent += 1
+        return True
+
+
+_clients: Set[DashboardClient] = set()
+_sends: Set[asyncio.Task] = set()
+_task: Optional[asyncio.Task] = None
+_stop_event: Optional[asyncio.Event] = None
+
+# Dernier état diffusé et son numéro
+_state: Dict[str, Any] = {}
+_seq = 0
+
+_stats: Dict[str, Any] = {
+    "ticks": 0,
+    "deltas": 0,
+    "snapshots": 0,
+    "fields_changed": 0,
+    "disconnected": 0,
+    "last_error": None,
+}
+
+
+def _snapshot_frame() -> str:
+    return json_dumps({"type": "kpi_snapshot", "seq": _seq, "kpis": _state})
+
+
+async def _deliver(client: DashboardClient, frame: str) -> None:
+    if not await client.send(frame):
+        if client in _clients:
+            _clients.discard(client)
+            _stats["disconnected"] += 1
+
+
+def _dispatch(client: DashboardClient, frame: str) -> None:
+    task = asyncio.create_task(_deliver(client, frame))
+    _sends.add(task)
+    task.add_done_callback(_sends.discard)
+
+
+def tick() -> Dict[str, Any]:
+    """Un cycle : KPI courants, delta avec l'état diffusé, envoi aux clients disponibles."""
+    global _seq
+
+    current = kpi_service.snapshot()
+    changed = {key: value for key, value in current.items() if _state.get(key) != value}
+    if changed:
+        _state.update(changed)
+        _seq += 1
+        _stats["fields_changed"] += len(changed)
+
+    delta_frame = json_dumps({"type": "kpi_delta", "seq": _seq, "changed": changed}) if changed else None
+    snapshot_frame = None
+    for client in list(_clients):
+        if client.lock.locked():
+            # Envoi précédent en cours : ce client repartira d'un snapshot
+            client.needs_snapshot = True
+            client.skipped += 1
+            continue
+        if client.needs_snapshot:
+            snapshot_frame = snapshot_frame or _snapshot_frame()
+            client.needs_snapshot = False
+            _stats["snapshots"] += 1
+            _dispatch(client, snapshot_frame)
+        elif delta_frame:
+            _stats["deltas"] += 1
+            _dispatch(client, delta_frame)
+
+    _stats["ticks"] += 1
+    return changed
+
+
+async def _push_loop() -> None:
+    """Boucle de fond : amorçage des KPI, puis un tick par intervalle."""
+    await kpi_service.seed()
+    interval = max(0.1, settings.dashboard_push_interval_ms / 1000)
+    last_change = time.monotonic()
+
+    while _stop_event and not _stop_event.is_set():
+        try:
+            await asyncio.wait_for(_stop_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            if tick():
+                last_change = time.monotonic()
+            elif _clients and time.monotonic() - last_change >= _HEARTBEAT_SECONDS:
+                last_change = time.monotonic()
+                frame = json_dumps({"type": "heartbeat", "seq": _seq})
+                for client in list(_clients):
+                    if not client.lock.locked():
+                        _dispatch(client, frame)
+        except Exception as e:
+            _stats["last_error"] = str(e)
+            logger.warning(f"KPI dashboard : cycle de diffusion en échec ({e})")
+
+
+def start_pusher() -> bool:
+    """Démarre la diffusion des KPI (idempotent)."""
+    global _task, _stop_event
+
+    if not settings.dashboard_push_enabled:
+        logger.info("Diffusion des KPI du dashboard désactivée par configuration")
+        return False
+
+    if _task and not _task.done():
+        return True
+
+    _stop_event = asyncio.Event()
+    _task = asyncio.create_task(_push_loop())
+    return True
+
+
+async def stop_pusher() -> None:
+    """Arrête la diffusion (les connexions ouvertes sont fermées par uvicorn)."""
+    global _task, _stop_event
+
+    if _stop_event:
+        _stop_event.set()
+
+    if _task and not _task.done():
+        try:
+            await asyncio.wait_for(_task, timeout=5)
+        except asyncio.TimeoutError:
+            _task.cancel()
+            logger.warning("Diffusion des KPI arrêtée de force (Timeout)")
+
+    _task = None
+    _stop_event = None
+
+
+def get_status() -> Dict[str, Any]:
+    """État de la diffusion des KPI et compteurs par client."""
+    return {
+        "enabled": settings.dashboard_push_enabled,
+        "running": bool(_task and not _task.done()),
+        "interval_ms": settings.dashboard_push_interval_ms,
+        "seq": _seq,
+        "clients": len(_clients),
+        "per_client": [{"sent": c.sent, "skipped": c.skipped} for c in _clients],
+        **_stats,
+        "kpis": kpi_service.get_stats(),
+    }
+
+
+async def dashboard_endpoint(websocket: WebSocket):
+    """Endpoint WebSocket des KPI du dashboard (snapshot puis deltas)."""
+    await websocket.accept()
+    client = DashboardClient(websocket)
+    _clients.add(client)
+    if _state:
+        client.needs_snapshot = False
+        _stats["snapshots"] += 1
+        _dispatch(client, _snapshot_frame())
+
+    try:
+        while True:
+            data = await websocket.receive_text()
+            try:
+                command = json_loads(data)
+            except ValueError:
+                command = data
+            command_type = command.get("type") if isinstance(command, dict) else command
+            if command_type == "ping":
+                await client.send(json_dumps({"type": "pong"}))
+            elif command_type == "snapshot":
+                client.needs_snapshot = True
+            else:
+                await client.send(json_dumps({"type": "error", "detail": f"Commande inconnue : {command_type}"}))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Erreur WebSocket dashboard: {e}")
+    finally:
+        _clients.discard(client)
@@ -0,0 +1,167 @@
+"""
+Filtres d'abonnement du WebSocket d'alertes.
+
+Un client envoie {"type": "subscribe", "filters": {...}} avec tout ou partie de :
+- min_severity : sévérité minimale (low < medium < high < critical) ;
+- decisions : décisions acceptées (confirmed_attack, suspicious, ...) ;
+- attack_types : types d'attaque acceptés ;
+- src_cidrs : réseaux source acceptés ("10.0.0.0/8", "2001:db8::/32", IP seule).
+
+Le filtre est compilé une fois à l'abonnement en une liste de prédicats (seuls
+les critères fournis sont évalués) ; les réseaux source sont rangés dans un
+trie binaire par famille d'adresse, interrogé en au plus 32 / 128 pas quel que
+soit le nombre de réseaux. Le hub applique le filtre avant la mise en file :
+un client ne reçoit, n'encode et n'envoie que ce qu'il affiche.
+"""
+
+import ipaddress
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Callable, Tuple
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+# Bornes d'un abonnement (protection contre un client malveillant)
+MAX_FILTER_VALUES = 64
+MAX_FILTER_CIDRS = 1024
+
+
+@lru_cache(maxsize=8192)
+def _parse_ip(value: str) -> Optional[Tuple[int, int]]:
+    """(version, entier) d'une adresse IP ; None si invalide. Cache : une IP source revient souvent."""
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    return address.version, int(address)
+
+
+class CidrTrie:
+    """Trie binaire de préfixes IPv4 / IPv6 : appartenance d'une IP à l'un des réseaux."""
+
+    def __init__(self):
+        # Nœud : [enfant 0, enfant 1, terminal]
+        self._roots = {4: [None, None, False], 6: [None, None, False]}
+        self._width = {4: 32, 6: 128}
+        self.size = 0
+
+    def add(self, network: ipaddress._BaseNetwork) -> None:
+        node = self._roots[network.version]
+        width = self._width[network.version]
+        value = int(network.network_address)
+        for depth in range(network.prefixlen):
+            if node[2]:
+                return  # Déjà couvert par un préfixe plus court
+            bit = (value >> (width - 1 - depth)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, False]
+            node = node[bit]
+        node[0] = node[1] = None  # Les préfixes plus longs deviennent inutiles
+        node[2] = True
+        self.size += 1
+
+    def contains(self, ip: Optional[str]) -> bool:
+        parsed = _parse_ip(ip) if ip else None
+        if parsed is None:
+            return False
+        version, value = parsed
+        node = self._roots[version]
+        width = self._width[version]
+        for depth in range(width):
+            if node[2]:
+                return True
+            node = node[(value >> (width - 1 - depth)) & 1]
+            if node is None:
+                return False
+        return node[2]
+
+
+def _string_set(filters: Dict[str, Any], field: str) -> Optional[frozenset]:
+    values = filters.get(field)
+    if values is None:
+        return None
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError(f"{field} doit être une liste de chaînes")
+    if len(values) > MAX_FILTER_VALUES:
+        raise ValueError(f"{field} : {MAX_FILTER_VALUES} valeurs maximum")
+    return frozenset(values) or None
+
+
+class SubscriptionFilter:
+    """Filtre compilé d'un client WebSocket (immuable ; `key` identifie les filtres équivalents)."""
+
+    def __init__(self, filters: Dict[str, Any]):
+        if not isinstance(filters, dict):
+            raise ValueError("filters doit être un objet")
+        unknown = set(filters) - {"min_severity", "decisions", "attack_types", "src_cidrs"}
+        if unknown:
+            raise ValueError(f"Critères inconnus : {', '.join(sorted(unknown))}")
+
+        min_severity = filters.get("min_severity")
+        if min_severity is not None and min_severity not in SEVERITY_RANK:
+            raise ValueError(f"min_severity invalide (attendu : {', '.join(SEVERITY_RANK)})")
+        decisions = _string_set(filters, "decisions")
+        attack_types = _string_set(filters, "attack_types")
+
+        cidrs = filters.get("src_cidrs")
+        networks: List[ipaddress._BaseNetwork] = []
+        if cidrs is not None:
+            if isinstance(cidrs, str):
+                cidrs = [cidrs]
+            if not isinstance(cidrs, list) or len(cidrs) > MAX_FILTER_CIDRS:
+                raise ValueError(f"src_cidrs doit être une liste de {MAX_FILTER_CIDRS} réseaux maximum")
+            try:
+                networks = sorted({ipaddress.ip_network(str(cidr), strict=False) for cidr in cidrs},
+                                  key=lambda net: (net.version, net.prefixlen, int(net.network_address)))
+            except ValueError as e:
+                raise ValueError(f"src_cidrs invalide : {e}")
+
+        predicates: List[Callable[[Dict[str, Any]], bool]] = []
+        if min_severity is not None:
+            threshold = SEVERITY_RANK[min_severity]
+            predicates.append(lambda alert: SEVERITY_RANK.get(alert.get("severity"), -1) >= threshold)
+        if decisions:
+            predicates.append(lambda alert: alert.get("decision") in decisions)
+        if attack_types:
+            predicates.append(lambda alert: alert.get("attack_type") in attack_types)
+        if networks:
+            trie = CidrTrie()
+            for network in networks:
+                trie.add(network)
+            predicates.append(lambda alert: trie.contains(alert.get("src_ip")))
+        self._predicates = tuple(predicates)
+
+        self.filters = {
+            key: value for key, value in {
+                "min_severity": min_severity,
+                "decisions": sorted(decisions) if decisions else None,
+                "attack_types": sorted(attack_types) if attack_types else None,
+                "src_cidrs": [str(network) for network in networks] or None,
+            }.items() if value is not None
+        }
+        self.key = tuple((key, tuple(value) if isinstance(value, list) else value) for key, value in self.filters.items())
+
+    def match(self, alert: Dict[str, Any]) -> bool:
+        for predicate in self._predicates:
+            if not predicate(alert):
+                return False
+        return True
+
+    def apply(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Message à mettre en file pour ce client, ou None s'il ne le concerne pas.
+        Un lot (alert_batch) est réduit à ses entrées retenues ; les messages
+        de service (pong, backlog_summary...) passent toujours.
+        """
+        message_type = message.get("type")
+        if message_type == "alert_batch":
+            kept = [entry for entry in message["alerts"] if self.match(entry)]
+            if not kept:
+                return None
+            if len(kept) == len(message["alerts"]):
+                return message
+            return {**message, "alerts": kept, "count": sum(entry.get("count", 1) for entry in kept)}
+        if message_type not in (None, "alert"):
+            return message
+        return message if self.match(message) else None
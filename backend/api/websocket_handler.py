@@ -1,79 +1,619 @@
 """
 WebSocket handler pour broadcast temps réel des alertes.
+
+Un seul lecteur du stream Redis des alertes par processus (démarré dans le
+lifespan) lit les entrées par lots (XREAD BLOCK), décode chacune une fois et la
+dépose dans la file bornée de chaque connexion ; une tâche d'envoi par
+connexion vide sa file vers le client, si bien qu'un client lent ne retarde
+jamais les autres.
+
+Chaque alerte porte son identifiant de stream (`stream_id`). Un client qui se
+reconnecte avec /ws/alerts?last_id=<id> (ou {"type": "resume", "last_id": ...})
+rejoue les entrées manquées par lots XRANGE, sans requête PostgreSQL ; le
+direct reçu pendant le rattrapage est retenu puis dédoublonné.
+
+Un client peut restreindre son flux ({"type": "subscribe", "filters": {...}},
+voir websocket_filters) : le filtre est appliqué avant la mise en file.
+
+L'encodage est négocié à la connexion (/ws/alerts?encoding=json|compact|msgpack,
+voir core.serialization) ; chaque message est encodé une seule fois par
+encodage, quel que soit le nombre de clients. La compression permessage-deflate
+est négociée par uvicorn (--ws-per-message-deflate, activée par défaut).
 """
 
-import json
+import time
 import asyncio
 import logging
-from typing import Set
+from typing import Dict, Any, Optional, Union, List, Tuple
 
 from fastapi import WebSocket, WebSocketDisconnect
 
-from backend.database.redis_client import get_alert_subscriber
+from backend.core.config import get_settings
+from backend.core.serialization import (
+    available_ws_encodings, encode_ws, json_loads, schema_message, unpack_message,
+)
+from backend.database.redis_client import (
+    get_alert_stream_bounds, read_alert_range, read_alert_stream, stream_id_key,
+)
+from backend.api.websocket_filters import SubscriptionFilter
+from backend.services import response_cache
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Délai maximal entre deux tentatives de lecture Redis après erreur (secondes)
+_MAX_RETRY_DELAY = 30.0
+# Attente maximale de place dans la file pendant un rattrapage avant d'appliquer la politique (secondes)
+_REPLAY_STALL_SECONDS = 10.0
+
+
+class Frame:
+    """Message diffusé et ses trames déjà encodées (partagées entre les clients du même encodage)."""
+
+    __slots__ = ("message", "_encoded")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._encoded: Dict[str, Union[str, bytes]] = {}
+
+    def encode(self, encoding: str) -> Union[str, bytes]:
+        payload = self._encoded.get(encoding)
+        if payload is None:
+            payload = self._encoded[encoding] = encode_ws(self.message, encoding)
+        return payload
+
+
+class ClientConnection:
+    """
+    Connexion d'un client : file d'envoi bornée vidée par sa propre tâche
+    d'écriture, compteurs de retard et de pertes.
+
+    Quand la file est pleine (client lent), la politique s'applique :
+    - drop_oldest : le message le plus ancien est écarté ;
+    - coalesce : les messages en attente sont remplacés par un résumé
+      (type "backlog_summary" : nombre, sévérités, types d'attaque, période,
+      dernier stream_id) ;
+    - disconnect : le client est déconnecté (code 1013, à reconnecter).
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue: int, policy: str, encoding: str = "json"):
+        self.websocket = websocket
+        self.policy = policy if policy in SLOW_CONSUMER_POLICIES else "drop_oldest"
+        self.encoding = encoding
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(2, max_queue))
+        client = websocket.client
+        self.label = f"{client.host}:{client.port}" if client else "unknown"
+        self.connected_at = time.time()
+        self.sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.filtered = 0
+        self.subscription: Optional[SubscriptionFilter] = None
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.closing = False
+        # Rattrapage en cours : le direct est retenu jusqu'à la fin du rejeu
+        # (au plus la taille de la file ; au-delà, il sera relu depuis le stream)
+        self.replaying = False
+        self.held: List[Frame] = []
+        self.held_overflow = False
+        self.replay_task: Optional[asyncio.Task] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._writer_task = asyncio.create_task(self._writer())
+
+    async def _writer(self) -> None:
+        """Tâche d'écriture : un seul envoi en cours par socket, sans bloquer les autres clients."""
+        try:
+            while True:
+                enqueued_at, frame = await self.queue.get()
+                payload = frame.encode(self.encoding)
+                if isinstance(payload, bytes):
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+                lag_ms = (time.monotonic() - enqueued_at) * 1000
+                self.sent += 1
+                self.bytes_sent += len(payload)
+                self.last_lag_ms = lag_ms
+                self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.closing = True
+            logger.debug(f"Envoi WebSocket interrompu ({self.label}): {e}")
+
+    def deliver(self, frame: Frame) -> None:
+        """Message du stream : retenu pendant un rattrapage, mis en file sinon."""
+        if self.replaying:
+            if self.held_overflow or len(self.held) >= self.queue.maxsize:
+                # Retenue pleine : ce message et les suivants seront relus par le rattrapage
+                self.held_overflow = True
+            else:
+                self.held.append(frame)
+        else:
+            self.enqueue(frame)
+
+    def enqueue(self, message: Union[dict, Frame]) -> None:
+        """Dépose un message sans attendre ; applique la politique si la file est pleine."""
+        if self.closing:
+            return
+        item = (time.monotonic(), message if isinstance(message, Frame) else Frame(message))
+        try:
+            self.queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == "disconnect":
+            self.dropped += self.queue.qsize() + 1
+            logger.warning(f"WebSocket {self.label} déconnecté : client trop lent")
+            self.close(code=1013, reason="slow consumer")
+        elif self.policy == "coalesce":
+            self._coalesce()
+            self.queue.put_nowait(item)
+        else:
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.queue.put_nowait(item)
+
+    async def put(self, message: Union[dict, Frame]) -> None:
+        """
+        Dépose un message en attendant qu'il y ait de la place (contre-pression du rattrapage) ;
+        la politique ne s'applique que si la file ne se vide plus pendant _REPLAY_STALL_SECONDS.
+        """
+        if self.closing:
+            return
+        item = (time.monotonic(), message if isinstance(message, Frame) else Frame(message))
+        try:
+            async with asyncio.timeout(_REPLAY_STALL_SECONDS):
+                await self.queue.put(item)
+        except TimeoutError:
+            # Client bloqué (ou tâche d'écriture arrêtée) : politique habituelle
+            self.enqueue(item[1])
+
+    def _coalesce(self) -> None:
+        """Remplace les messages en attente par un résumé unique."""
+        pending = []
+        while not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+
+        summary = {
+            "type": "backlog_summary",
+            "count": 0,
+            "by_severity": {},
+            "by_attack_type": {},
+            "since": None,
+            "until": None,
+            "last_id": None,  # Dernière entrée du stream résumée (reprise possible après)
+        }
+        for _, frame in pending:
+            message = frame.message
+            entry_id = message.get("last_id") if message.get("type") == "backlog_summary" else message.get("stream_id")
+            if entry_id and (summary["last_id"] is None or stream_id_key(entry_id) > stream_id_key(summary["last_id"])):
+                summary["last_id"] = entry_id
+            if message.get("type") == "backlog_summary":
+                # Résumé précédent encore en file : fusion
+                summary["count"] += message["count"]
+                for field in ("by_severity", "by_attack_type"):
+                    for key, count in message[field].items():
+                        summary[field][key] = summary[field].get(key, 0) + count
+                timestamps = (message["since"], message["until"])
+            else:
+                # Alerte unitaire ou lot regroupé (alert_batch : entrées avec compteur)
+                entries = message.get("alerts") if message.get("type") == "alert_batch" else [message]
+                first, last = None, None
+                for entry in entries:
+                    count = entry.get("count", 1)
+                    severity = entry.get("severity") or "unknown"
+                    attack_type = entry.get("attack_type") or "unknown"
+                    summary["count"] += count
+                    summary["by_severity"][severity] = summary["by_severity"].get(severity, 0) + count
+                    summary["by_attack_type"][attack_type] = summary["by_attack_type"].get(attack_type, 0) + count
+                    seen = (entry.get("first_seen") or entry.get("timestamp"), entry.get("last_seen") or entry.get("timestamp"))
+                    if seen[0] and (first is None or seen[0] < first):
+                        first = seen[0]
+                    if seen[1] and (last is None or seen[1] > last):
+                        last = seen[1]
+                timestamps = (first, last)
+            if timestamps[0] and (summary["since"] is None or timestamps[0] < summary["since"]):
+                summary["since"] = timestamps[0]
+            if timestamps[1] and (summary["until"] is None or timestamps[1] > summary["until"]):
+                summary["until"] = timestamps[1]
+
+        self.coalesced += len(pending)
+        self.queue.put_nowait((pending[0][0] if pending else time.monotonic(), Frame(summary)))
+
+    def close(self, code: int = 1000, reason: str = "") -> None:
+        """Arrête l'écriture et ferme la socket (la boucle de réception se termine alors)."""
+        self.closing = True
+        self.stop()
+        asyncio.create_task(self._close_socket(code, reason))
+
+    async def _close_socket(self, code: int, reason: str) -> None:
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def stop(self) -> None:
+        if self.replay_task and not self.replay_task.done():
+            self.replay_task.cancel()
+        if self._writer_task and not self._writer_task.done():
+            self._writer_task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Compteurs du client : en attente, envoyés, perdus, retard d'envoi."""
+        return {
+            "client": self.label,
+            "connected_seconds": round(time.time() - self.connected_at, 1),
+            "encoding": self.encoding,
+            "queued": self.queue.qsize(),
+            "sent": self.sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "filtered": self.filtered,
+            "subscription": self.subscription.filters if self.subscription else None,
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+        }
 
 
 class ConnectionManager:
-    """Gère les connexions WebSocket des clients dashboard."""
+    """Gère les connexions WebSocket des clients dashboard (une file bornée par connexion)."""
 
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+    def __init__(self, max_queue: int = 256, policy: str = "coalesce"):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        # Cumul des clients déconnectés
+        self._closed_totals = {"sent": 0, "bytes_sent": 0, "dropped": 0, "coalesced": 0, "filtered": 0}
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, encoding: str = "json") -> ClientConnection:
         await websocket.accept()
-        self.active_connections.add(websocket)
+        client = ClientConnection(websocket, self.max_queue, self.policy, encoding)
+        if encoding != "json":
+            client.enqueue(schema_message(encoding))
+        client.start()
+        self.active_connections[websocket] = client
         logger.info(f"WebSocket connecté. Total: {len(self.active_connections)}")
+        return client
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
+        client = self.active_connections.pop(websocket, None)
+        if client is not None:
+            client.stop()
+            for key in self._closed_totals:
+                self._closed_totals[key] += getattr(client, key)
         logger.info(f"WebSocket déconnecté. Total: {len(self.active_connections)}")
 
-    async def broadcast(self, message: dict):
-        """Envoie un message à tous les clients connectés."""
-        disconnected = set()
-        for ws in self.active_connections:
-            try:
-                await ws.send_json(message)
-            except Exception:
-                disconnected.add(ws)
+    def broadcast(self, message: dict):
+        """
+        Dépose un message (déjà décodé) dans la file de chaque client, sans
+        attendre aucun envoi, après application de son filtre d'abonnement.
+        Le résultat d'un filtre (et ses trames encodées) est partagé entre les
+        clients au filtre identique.
+        """
+        frame = Frame(message)
+        filtered: Dict[tuple, Optional[Frame]] = {}
+        for client in list(self.active_connections.values()):
+            subscription = client.subscription
+            if subscription is None:
+                client.deliver(frame)
+                continue
+            if subscription.key not in filtered:
+                outgoing = subscription.apply(message)
+                filtered[subscription.key] = (
+                    None if outgoing is None else frame if outgoing is message else Frame(outgoing)
+                )
+            outgoing = filtered[subscription.key]
+            if outgoing is None:
+                client.filtered += 1
+            else:
+                client.deliver(outgoing)
 
-        # Nettoyer les connexions mortes
-        for ws in disconnected:
-            self.active_connections.discard(ws)
+    def get_stats(self) -> Dict[str, Any]:
+        clients = [client.get_stats() for client in self.active_connections.values()]
+        totals = {
+            key: value + sum(client[key] for client in clients)
+            for key, value in self._closed_totals.items()
+        }
+        return {
+            "policy": self.policy,
+            "max_queue": self.max_queue,
+            "connections": len(clients),
+            "totals": totals,
+            "max_lag_ms": max((client["max_lag_ms"] for client in clients), default=0.0),
+            "clients": clients,
+        }
 
 
-manager = ConnectionManager()
+manager = ConnectionManager(settings.ws_send_queue_size, settings.ws_slow_consumer_policy)
 
+_task: Optional[asyncio.Task] = None
+_stop_event: Optional[asyncio.Event] = None
+_stats: Dict[str, Any] = {
+    "messages_received": 0,
+    "read_batches": 0,
+    "decode_errors": 0,
+    "reconnects": 0,
+    "last_id": None,
+    "replays": 0,
+    "replayed": 0,
+    "last_error": None,
+}
 
-async def websocket_endpoint(websocket: WebSocket):
-    """Endpoint WebSocket pour le streaming d'alertes."""
-    await manager.connect(websocket)
 
+def _decode_entry(entry_id: str, data: bytes) -> Optional[dict]:
+    """Message d'une entrée du stream, complété de son identifiant (None si illisible)."""
+    try:
+        message = unpack_message(data)
+    except (TypeError, ValueError):
+        message = None
+    if not isinstance(message, dict):
+        _stats["decode_errors"] += 1
+        return None
+    message["stream_id"] = entry_id
+    return message
+
+
+async def _subscriber_loop() -> None:
+    """Lecteur unique du stream : lots XREAD bloquants, décodage puis diffusion dans les files."""
+    delay = 1.0
+    last_id: Optional[str] = None
+    while _stop_event and not _stop_event.is_set():
+        try:
+            if last_id is None:
+                # Point de départ : dernière entrée existante (les suivantes sont du direct)
+                _, newest = await get_alert_stream_bounds()
+                last_id = newest or "0-0"
+                response_cache.invalidate(last_id)
+            entries = await read_alert_stream(last_id, settings.alert_stream_read_count, settings.alert_stream_block_ms)
+            delay = 1.0
+            if entries:
+                _stats["read_batches"] += 1
+            for entry_id, data in entries:
+                last_id = entry_id
+                _stats["messages_received"] += 1
+                message = _decode_entry(entry_id, data)
+                if message is not None:
+                    manager.broadcast(message)
+            if entries:
+                # Nouvelles alertes : les réponses du dashboard en cache deviennent obsolètes
+                response_cache.invalidate(last_id)
+            _stats["last_id"] = last_id
+            continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _stats["last_error"] = str(e)
+            _stats["reconnects"] += 1
+            logger.error(f"Erreur lecture du stream d'alertes Redis: {e}")
+
+        # Nouvelle tentative avec attente croissante (reprise après last_id, sans perte)
+        try:
+            await asyncio.wait_for(_stop_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(delay * 2, _MAX_RETRY_DELAY)
+
+
+async def _replay(client: ClientConnection, after_id: str) -> None:
+    """
+    Rattrapage d'un client : entrées postérieures à after_id par lots XRANGE
+    (filtre d'abonnement appliqué), puis libération du direct retenu entre-temps
+    sans doublon. Termine par {"type": "replay_done"} ; "replay_gap" signale que
+    des entrées ont déjà été évincées du stream (MAXLEN), à compléter via l'API.
+    """
     try:
-        # Listener Redis pub/sub
-        subscriber = await get_alert_subscriber()
+        await _replay_entries(client, after_id)
+    finally:
+        client.held, client.held_overflow, client.replaying = [], False, False
+
 
-        # Tâche de réception Redis
-        async def redis_listener():
+async def _replay_entries(client: ClientConnection, after_id: str) -> None:
+    # Mises en file avec attente (client.put) : un rattrapage de plusieurs milliers
+    # d'entrées suit le rythme du client au lieu de déclencher la politique client lent.
+    # Le direct retenu est borné : s'il déborde, le rattrapage reprend depuis son
+    # curseur jusqu'à la tête du stream, dans la limite d'ALERT_STREAM_REPLAY_MAX.
+    cursor, replayed, stopped = after_id, 0, None
+    try:
+        oldest, _ = await get_alert_stream_bounds()
+        if oldest and stream_id_key(after_id) < stream_id_key(oldest):
+            await client.put({"type": "replay_gap", "last_id": after_id, "oldest_id": oldest})
+        cursor, replayed, stopped = await _read_range(client, cursor, replayed)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        stopped = "error"
+        logger.warning(f"Rattrapage WebSocket interrompu ({client.label}): {e}")
+        client.enqueue({"type": "error", "detail": "Rattrapage interrompu (Redis indisponible)"})
+
+    done_sent = False
+    while True:
+        if stopped == "truncated":
+            # Le direct retenu suit un trou : le client reprend après replay_done.last_id
+            client.held = []
+        cursor = await _release_held(client, cursor)
+        if client.held_overflow and stopped is None:
+            # Direct non retenu : relu depuis le stream à partir du dernier message mis en file
+            client.held_overflow = False
             try:
-                async for message in subscriber.listen():
-                    if message["type"] == "message":
-                        data = json.loads(message["data"])
-                        await manager.broadcast(data)
+                cursor, replayed, stopped = await _read_range(client, cursor, replayed)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Erreur Redis listener: {e}")
+                stopped = "error"
+                logger.warning(f"Rattrapage WebSocket interrompu ({client.label}): {e}")
+            continue
+        if done_sent:
+            break
+        _stats["replays"] += 1
+        await client.put({
+            "type": "replay_done", "count": replayed, "last_id": cursor, "truncated": stopped == "truncated",
+        })
+        done_sent = True
+
+    _stats["replayed"] += replayed
+    client.replaying = False
+
+
+async def _read_range(client: ClientConnection, cursor: str, replayed: int) -> Tuple[str, int, Optional[str]]:
+    """
+    Met en file les entrées postérieures à `cursor` jusqu'à la tête du stream.
+
+    Returns:
+        (dernier identifiant lu, total rejoué, "truncated" si ALERT_STREAM_REPLAY_MAX est atteint sinon None)
+    """
+    count = settings.alert_stream_read_count
+    while True:
+        entries = await read_alert_range(cursor, count)
+        for entry_id, data in entries:
+            cursor = entry_id
+            message = _decode_entry(entry_id, data)
+            if message is None:
+                continue
+            if client.subscription is not None:
+                message = client.subscription.apply(message)
+                if message is None:
+                    client.filtered += 1
+                    continue
+            await client.put(Frame(message))
+            replayed += 1
+        if len(entries) < count:
+            return cursor, replayed, None
+        if replayed >= settings.alert_stream_replay_max:
+            return cursor, replayed, "truncated"
+
+
+async def _release_held(client: ClientConnection, cursor: str) -> str:
+    """
+    Met en file le direct retenu postérieur à `cursor`, y compris celui reçu pendant l'attente.
+
+    Returns:
+        str: Identifiant du dernier message mis en file (nouveau curseur).
+    """
+    while client.held:
+        held, client.held = client.held, []
+        for frame in held:
+            entry_id = frame.message["stream_id"]
+            if stream_id_key(entry_id) > stream_id_key(cursor):
+                await client.put(frame)
+                cursor = entry_id
+    return cursor
+
+
+def _start_replay(client: ClientConnection, after_id: Optional[str]) -> None:
+    """Lance le rattrapage d'un client (identifiant vérifié ; un seul à la fois)."""
+    try:
+        stream_id_key(after_id or "")
+    except ValueError:
+        client.enqueue({"type": "error", "detail": f"last_id invalide : {after_id}"})
+        return
+    if client.replay_task and not client.replay_task.done():
+        client.enqueue({"type": "error", "detail": "Rattrapage déjà en cours"})
+        return
+    # Retenue du direct posée avant tout await : aucune entrée ne peut être perdue
+    client.replaying = True
+    client.replay_task = asyncio.create_task(_replay(client, after_id))
+
+
+def start_subscriber() -> bool:
+    """Démarre le lecteur partagé du stream d'alertes (idempotent)."""
+    global _task, _stop_event
 
-        # Lancer le listener en arrière-plan
-        listener_task = asyncio.create_task(redis_listener())
+    if _task and not _task.done():
+        return True
 
+    _stop_event = asyncio.Event()
+    _task = asyncio.create_task(_subscriber_loop())
+    return True
+
+
+async def stop_subscriber() -> None:
+    """Arrête le lecteur partagé (XREAD est bloquant : annulation directe)."""
+    global _task, _stop_event
+
+    if _stop_event:
+        _stop_event.set()
+
+    if _task and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    _task = None
+    _stop_event = None
+
+
+def get_status() -> Dict[str, Any]:
+    """État de la diffusion temps réel (lecteur du stream Redis et compteurs par client)."""
+    return {
+        "subscriber_running": bool(_task and not _task.done()),
+        **_stats,
+        **manager.get_stats(),
+    }
+
+
+def _handle_command(client: ClientConnection, data: str) -> None:
+    """Commande JSON d'un client : (dés)abonnement filtré, reprise ; réponse dans sa file."""
+    try:
+        command = json_loads(data)
+    except ValueError:
+        command = None
+    if not isinstance(command, dict):
+        client.enqueue({"type": "error", "detail": "Commande JSON attendue"})
+        return
+
+    command_type = command.get("type")
+    if command_type == "subscribe":
+        try:
+            client.subscription = SubscriptionFilter(command.get("filters") or {})
+        except ValueError as e:
+            client.enqueue({"type": "error", "detail": str(e)})
+            return
+        if not client.subscription.filters:
+            client.subscription = None
+        client.enqueue({"type": "subscribed", "filters": client.subscription.filters if client.subscription else {}})
+    elif command_type == "unsubscribe":
+        client.subscription = None
+        client.enqueue({"type": "subscribed", "filters": {}})
+    elif command_type == "resume":
+        _start_replay(client, command.get("last_id"))
+    elif command_type == "ping":
+        client.enqueue({"type": "pong"})
+    else:
+        client.enqueue({"type": "error", "detail": f"Commande inconnue : {command_type}"})
+
+
+async def websocket_endpoint(websocket: WebSocket):
+    """Endpoint WebSocket pour le streaming d'alertes (?encoding=json|compact|msgpack, ?last_id=)."""
+    encoding = websocket.query_params.get("encoding") or settings.ws_default_encoding
+    unsupported = encoding not in available_ws_encodings()
+    client = await manager.connect(websocket, "json" if unsupported else encoding)
+    if unsupported:
+        client.enqueue({"type": "error", "detail": f"Encodage non supporté : {encoding} (json utilisé)"})
+    last_id = websocket.query_params.get("last_id")
+    if last_id:
+        _start_replay(client, last_id)
+
+    try:
         # Garder la connexion ouverte et écouter les messages du client
         while True:
             try:
                 data = await websocket.receive_text()
-                # Les clients peuvent envoyer des commandes (ping, etc.)
+                # Les clients peuvent envoyer des commandes (ping, subscribe, unsubscribe, resume)
                 if data == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    client.enqueue({"type": "pong"})
+                else:
+                    _handle_command(client, data)
             except WebSocketDisconnect:
                 break
 
@@ -81,11 +621,3 @@ async def websocket_endpoint(websocket: WebSocket):
         logger.error(f"Erreur WebSocket: {e}")
     finally:
         manager.disconnect(websocket)
-        if 'listener_task' in locals():
-            listener_task.cancel()
-        if 'subscriber' in locals():
-            try:
-                await subscriber.unsubscribe()
-                await subscriber.aclose()
-            except Exception:
-                pass
@@ -62,6 +62,8 @@ class Settings(BaseSettings):
     supervised_model_version: str = Field(default="latest", description="Tag de version du modèle supervisé à utiliser")
     unsupervised_model_version: str = Field(default="latest", description="Tag de version du modèle non-supervisé à utiliser")
     anomaly_threshold_k: float = Field(default=3.0, description="Facteur de sensibilité pour la détection d'anomalies (seuil = μ + k*σ)")
+    model_preload_on_startup: bool = Field(default=True, description="Charge les modèles en arrière-plan dès le démarrage de l'API")
+    model_ready_timeout_seconds: float = Field(default=5.0, description="Attente maximale des modèles par une requête de détection avant réponse 503 (secondes)")
 
     # ---- Network Capture ----
     capture_interface: str = Field(default="auto", description="Interface réseau à écouter (ex: eth0, wlan0). 'auto' détecte la meilleure interface.")
@@ -83,8 +85,66 @@ class Settings(BaseSettings):
     retention_delete_batch_size: int = Field(default=5000, description="Nombre d'enregistrements à supprimer par lot (batch)")
     retention_keep_alerted_flows: bool = Field(
         default=True,
-        description="Si True, ne supprime jamais les flux associés à une alerte de sécurité",
+        description="Si True, les flux associés à une alerte sont archivés (network_flows_archive) avant suppression",
     )
+    retention_predictions_days: int = Field(default=30, description="Durée de conservation des prédictions supervisées (jours, 0 = illimitée)")
+    retention_anomalies_days: int = Field(default=30, description="Durée de conservation des scores d'anomalie (jours, 0 = illimitée)")
+    retention_alerts_days: int = Field(default=365, description="Durée de conservation des alertes (jours, 0 = illimitée)")
+    partition_premake_days: int = Field(default=7, description="Nombre de partitions journalières créées à l'avance")
+
+    # ---- Persistance ----
+    persistence_bulk_enabled: bool = Field(default=True, description="Écrit chaque lot de flux analysés en une seule transaction (écriture en masse)")
+    persistence_store_features: bool = Field(default=True, description="Conserve le vecteur de features brut de chaque flux (float32 compact) pour re-scoring")
+    persistence_use_copy: bool = Field(default=True, description="Utilise COPY (asyncpg) pour l'écriture en masse ; sinon INSERT multi-lignes (executemany)")
+    persistence_write_behind_enabled: bool = Field(default=True, description="Découple la capture de PostgreSQL via une file d'écriture différée")
+    persistence_queue_max_items: int = Field(default=20000, description="Taille maximale de la file d'écriture (flux) ; au-delà, débordement vers le spool")
+    persistence_flush_max_items: int = Field(default=500, description="Nombre de flux écrits par transaction")
+    persistence_flush_interval_seconds: float = Field(default=1.0, description="Délai maximal avant écriture d'un lot incomplet (secondes)")
+    persistence_spool_path: str = Field(default="./logs/persistence_spool.jsonl", description="Fichier spool local utilisé quand PostgreSQL est indisponible")
+    persistence_spool_max_mb: int = Field(default=512, description="Taille maximale du spool (Mo) ; au-delà, les flux sont perdus")
+    persistence_replay_interval_seconds: float = Field(default=10.0, description="Fréquence des tentatives de rejeu du spool (secondes)")
+
+    # ---- Agrégats (rollups) ----
+    rollup_enabled: bool = Field(default=True, description="Maintient les agrégats par minute / heure lus par le dashboard")
+    rollup_interval_seconds: int = Field(default=30, description="Fréquence du cycle d'agrégation (secondes)")
+    rollup_grace_seconds: int = Field(default=60, description="Délai avant qu'une minute soit agrégée (lignes en attente d'écriture)")
+    rollup_rewind_minutes: int = Field(default=5, description="Minutes recalculées avant le watermark à chaque cycle (lignes tardives)")
+    rollup_backfill_hours: int = Field(default=720, description="Historique agrégé au premier démarrage (heures)")
+    rollup_minute_retention_hours: int = Field(default=48, description="Conservation des agrégats par minute (heures)")
+
+    # ---- WebSocket temps réel ----
+    ws_send_queue_size: int = Field(default=256, description="Messages en attente d'envoi par client WebSocket")
+    ws_slow_consumer_policy: str = Field(default="coalesce", description="Client en retard (file pleine) : drop_oldest, coalesce (résumé des messages écartés) ou disconnect")
+    alert_batch_enabled: bool = Field(default=True, description="Regroupe les alertes temps réel en lots (rafales d'attaque)")
+    alert_batch_interval_ms: int = Field(default=250, description="Fenêtre de regroupement des alertes publiées (ms)")
+    alert_batch_max_size: int = Field(default=200, description="Entrées distinctes déclenchant la publication anticipée d'un lot")
+    realtime_encoding: str = Field(default="json", description="Encodage du stream Redis des alertes : json (orjson) ou msgpack")
+    ws_default_encoding: str = Field(default="json", description="Encodage /ws/alerts sans ?encoding= : json, compact ou msgpack")
+    alert_stream_maxlen: int = Field(default=10000, description="Entrées conservées (environ) dans le stream Redis des alertes")
+    alert_stream_read_count: int = Field(default=100, description="Entrées lues par XREAD / XRANGE (diffusion et rattrapage)")
+    alert_stream_block_ms: int = Field(default=1000, description="Attente maximale d'une lecture bloquante XREAD (ms)")
+    alert_stream_replay_max: int = Field(default=5000, description="Entrées rejouées au plus à un client qui reprend (last_id)")
+    threat_score_half_life_seconds: float = Field(default=120.0, description="Demi-vie du score de menace global (décroissance en l'absence de nouveau risque)")
+    threat_score_write_interval_seconds: float = Field(default=2.0, description="Intervalle minimal entre deux écritures Redis du score de menace")
+
+    # ---- Métriques applicatives ----
+    metrics_flush_enabled: bool = Field(default=True, description="Publie périodiquement les compteurs en mémoire dans Redis (INCRBY)")
+    metrics_flush_interval_seconds: float = Field(default=5.0, description="Intervalle de publication des métriques (secondes)")
+
+    # ---- Cache de réponses (dashboard, carte) ----
+    response_cache_enabled: bool = Field(default=True, description="Cache mémoire + Redis des routes d'agrégats du dashboard et de la carte")
+    response_cache_max_entries: int = Field(default=512, description="Entrées maximum du cache mémoire (LRU) de chaque processus")
+    response_cache_invalidate_min_interval_ms: int = Field(default=1000, description="Intervalle minimal entre deux invalidations du cache sur nouvelle alerte (ms)")
+
+    # ---- KPI du dashboard poussés (/ws/dashboard) ----
+    dashboard_push_enabled: bool = Field(default=True, description="Diffuse les KPI de la vue d'ensemble sur /ws/dashboard (deltas à cadence fixe)")
+    dashboard_push_interval_ms: int = Field(default=1000, description="Cadence de diffusion des KPI du dashboard (ms)")
+    kpi_window_hours: int = Field(default=24, description="Fenêtre glissante des KPI tenus en mémoire (heures)")
+
+    # ---- Totaux de lignes ----
+    totals_mode: str = Field(default="counter", description="Totaux du dashboard : counter (compteurs maintenus à l'écriture) ou estimate (pg_class.reltuples)")
+    counter_reconcile_enabled: bool = Field(default=True, description="Recale périodiquement les compteurs sur un COUNT(*) exact")
+    counter_reconcile_interval_minutes: int = Field(default=360, description="Fréquence du recalage des compteurs (minutes)")
 
     @property
     def cors_origins_list(self) -> List[str]:
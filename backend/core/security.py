@@ -53,4 +53,5 @@ def get_cors_config() -> dict:
         "allow_credentials": True, # Autorise les cookies et headers d'authentification
         "allow_methods": ["*"],    # Autorise toutes les méthodes HTTP (GET, POST, PUT, DELETE...)
         "allow_headers": ["*"],    # Autorise tous les headers
+        "expose_headers": ["X-Next-Cursor"],  # Curseur de pagination lisible par le frontend
     }
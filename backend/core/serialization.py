@@ -0,0 +1,141 @@
+"""
+Sérialisation des messages temps réel et du cache.
+
+- JSON : orjson (encodage natif des datetime / NumPy, ~5-10x plus rapide que
+  json) ; repli sur la bibliothèque standard si orjson est absent.
+- Stream Redis des alertes : JSON orjson (REALTIME_ENCODING=json, le moins
+  coûteux en CPU) ou MessagePack (msgpack, ~15 % d'octets en moins). Le
+  décodage reconnaît les deux formats (un objet JSON commence par "{"), si
+  bien que des processus de configurations différentes peuvent cohabiter.
+- WebSocket /ws/alerts : encodage négocié par le client (?encoding=) :
+    json    : objets JSON (défaut, forme historique) ;
+    compact : tableaux positionnels JSON, précédés d'un en-tête de schéma ;
+    msgpack : mêmes tableaux positionnels en trames binaires MessagePack.
+  Forme compacte : ["a", <champs ALERT_FIELDS>] pour une alerte,
+  ["b", count, window_ms, [[<champs BATCH_ENTRY_FIELDS>], ...], stream_id]
+  pour un lot ;
+  les messages de service (pong, subscribed, backlog_summary...) et les
+  alertes hors schéma restent des objets.
+"""
+
+import json
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # Dépendance de requirements.txt ; repli possible
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Dépendance de requirements.txt ; repli possible
+    msgpack = None
+
+HAS_ORJSON = orjson is not None
+HAS_MSGPACK = msgpack is not None
+
+SCHEMA_VERSION = 2
+
+_PAYLOAD_FIELDS = (
+    "flow_id", "timestamp", "severity", "attack_type", "threat_score", "decision", "status",
+    "src_ip", "dst_ip", "dst_port", "protocol", "src_country_code", "alert_metadata",
+)
+# stream_id : identifiant de l'entrée du stream Redis (reprise après reconnexion)
+ALERT_FIELDS = _PAYLOAD_FIELDS + ("stream_id",)
+BATCH_ENTRY_FIELDS = _PAYLOAD_FIELDS + ("count", "first_seen", "last_seen")
+
+_ALERT_KEYS = frozenset(ALERT_FIELDS)
+_BATCH_ENTRY_KEYS = frozenset(BATCH_ENTRY_FIELDS)
+_BATCH_KEYS = frozenset(("type", "count", "window_ms", "alerts", "stream_id"))
+
+WS_ENCODINGS = ("json", "compact", "msgpack")
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+# ---- JSON ----
+
+def json_dumpb(value: Any) -> bytes:
+    """JSON compact en octets (types inconnus : str)."""
+    if HAS_ORJSON:
+        return orjson.dumps(value, default=str, option=_ORJSON_OPTIONS)
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+
+def json_dumps(value: Any) -> str:
+    """JSON compact en texte."""
+    if HAS_ORJSON:
+        return orjson.dumps(value, default=str, option=_ORJSON_OPTIONS).decode()
+    return json.dumps(value, default=str, separators=(",", ":"))
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Décode du JSON (ValueError si invalide)."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# ---- Canal Redis ----
+
+def pack_message(message: Dict[str, Any], encoding: str = "json") -> bytes:
+    """Encode un message pour le stream Redis des alertes (MessagePack si disponible et demandé)."""
+    if encoding == "msgpack" and HAS_MSGPACK:
+        return msgpack.packb(message, default=str, use_bin_type=True)
+    return json_dumpb(message)
+
+
+def unpack_message(data: Union[str, bytes]) -> Any:
+    """Décode une entrée du stream Redis des alertes, quel que soit l'encodage de l'émetteur."""
+    if isinstance(data, str) or data[:1] in (b"{", b"["):
+        return json_loads(data)
+    if not HAS_MSGPACK:
+        raise ValueError("Message MessagePack reçu mais msgpack n'est pas installé")
+    return msgpack.unpackb(data, raw=False)
+
+
+# ---- WebSocket ----
+
+def available_ws_encodings() -> tuple:
+    return WS_ENCODINGS if HAS_MSGPACK else WS_ENCODINGS[:2]
+
+
+def schema_message(encoding: str) -> Dict[str, Any]:
+    """En-tête envoyé à la connexion : ordre des champs des formes positionnelles."""
+    return {
+        "type": "schema",
+        "version": SCHEMA_VERSION,
+        "encoding": encoding,
+        "alert": ["a", *ALERT_FIELDS],
+        "alert_batch": ["b", "count", "window_ms", "alerts", "stream_id"],
+        "alert_batch_entry": list(BATCH_ENTRY_FIELDS),
+    }
+
+
+def to_compact(message: Dict[str, Any]) -> Any:
+    """Forme positionnelle d'une alerte ou d'un lot ; le message inchangé sinon."""
+    message_type = message.get("type")
+    if message_type == "alert_batch":
+        entries = message["alerts"]
+        if message.keys() <= _BATCH_KEYS and all(entry.keys() <= _BATCH_ENTRY_KEYS for entry in entries):
+            return [
+                "b",
+                message.get("count"),
+                message.get("window_ms"),
+                [[entry.get(field) for field in BATCH_ENTRY_FIELDS] for entry in entries],
+                message.get("stream_id"),
+            ]
+    elif message_type is None and message.keys() <= _ALERT_KEYS:
+        return ["a", *(message.get(field) for field in ALERT_FIELDS)]
+    return message
+
+
+def encode_ws(message: Dict[str, Any], encoding: str) -> Union[str, bytes]:
+    """Trame WebSocket : texte pour json / compact, binaire pour msgpack."""
+    if encoding == "json":
+        return json_dumps(message)
+    compact = to_compact(message)
+    if encoding == "msgpack":
+        return msgpack.packb(compact, default=str, use_bin_type=True)
+    return json_dumps(compact)
@@ -0,0 +1,212 @@
+"""
+Benchmark de persistance : écriture unitaire (ORM, un commit par flux)
+contre écriture en masse (executemany / COPY, une transaction par lot).
+
+Les lignes synthétiques utilisent le bloc TEST-NET-2 (198.51.100.0/24) et
+sont supprimées à la fin de chaque mesure.
+
+Usage:
+    python -m backend.database.bulk_benchmark --rows 5000 --batch-size 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+from sqlalchemy import delete, text
+
+from backend.database.connection import async_session_factory, close_db, engine
+from backend.database.models import NetworkFlow, Prediction, AnomalyScore, Alert, PARTITIONED_TABLES
+from backend.database import repository, feature_codec
+from backend.database.feature_codec import FEATURE_SCHEMA_SIZES
+
+# (flux, prédiction, anomalie, alerte | None)
+Item = Tuple[dict, dict, dict, Any]
+
+
+def synthetic_items(n_rows: int, alert_ratio: float, spread_hours: float = 0.0) -> List[Item]:
+    """
+    Génère des lignes réalistes avec IDs client et clés étrangères déjà renseignées.
+    `spread_hours` répartit les horodatages sur la fenêtre passée (audit des plans).
+    """
+    items = []
+    for i in range(n_rows):
+        now = datetime.utcnow() - timedelta(hours=random.random() * spread_hours)
+        flow_id = repository.new_id()
+        flow = {
+            "id": flow_id,
+            "timestamp": now,
+            "src_ip": f"198.51.100.{i % 254 + 1}",
+            "dst_ip": "198.51.100.254",
+            "src_port": random.randint(1024, 65535),
+            "dst_port": random.choice((22, 53, 80, 443)),
+            "protocol": random.choice((6, 17)),
+            "duration": random.random() * 10,
+            "total_fwd_packets": random.randint(1, 500),
+            "total_bwd_packets": random.randint(0, 500),
+            "flow_bytes_per_s": random.random() * 1e6,
+            "flow_packets_per_s": random.random() * 1e3,
+            "features": feature_codec.encode_features(np.random.rand(FEATURE_SCHEMA_SIZES[1])),
+            "feature_schema_version": 1,
+        }
+        prediction = {
+            "id": repository.new_id(),
+            "flow_id": flow_id,
+            "timestamp": now,
+            "model_version": "benchmark",
+            "predicted_label": "BENIGN",
+            "confidence": 0.97,
+            "top_k_indices": [0, 2, 9],
+            "top_k_probabilities": [0.97, 0.02, 0.01],
+        }
+        anomaly = {
+            "id": repository.new_id(),
+            "flow_id": flow_id,
+            "timestamp": now,
+            "reconstruction_error": random.random() * 0.01,
+            "anomaly_score": random.random(),
+            "threshold_used": 0.01,
+            "is_anomaly": random.random() < alert_ratio,
+        }
+        alert = None
+        if random.random() < alert_ratio:
+            alert = {
+                "id": repository.new_id(),
+                "flow_id": flow_id,
+                "timestamp": now,
+                "severity": "medium",
+                "attack_type": "PortScan",
+                "threat_score": 0.5,
+                "decision": random.choice(("suspicious", "confirmed_attack")),
+                "status": "open",
+                "src_ip": flow["src_ip"],
+                "dst_ip": flow["dst_ip"],
+                "dst_port": flow["dst_port"],
+                "protocol": flow["protocol"],
+                "src_country_code": None,
+                "alert_metadata": {"src_ip": flow["src_ip"], "priority": 3},
+            }
+        items.append((flow, prediction, anomaly, alert))
+    return items
+
+
+def _without_id(row: dict) -> dict:
+    return {k: v for k, v in row.items() if k != "id"}
+
+
+async def _write_legacy(items: List[Item]) -> None:
+    """Chemin historique : une session, quatre flush et un commit par flux."""
+    for flow, prediction, anomaly, alert in items:
+        async with async_session_factory() as db:
+            deltas = {}
+            created = await repository.create_flow(db, _without_id(flow), deltas=deltas)
+            flow["id"] = created.id
+            await repository.create_prediction(db, {**_without_id(prediction), "flow_id": created.id}, deltas=deltas)
+            await repository.create_anomaly(db, {**_without_id(anomaly), "flow_id": created.id}, deltas=deltas)
+            if alert:
+                await repository.create_alert(db, {**_without_id(alert), "flow_id": created.id}, deltas=deltas)
+            await repository.bump_row_counters(db, deltas)
+            await db.commit()
+
+
+async def _write_bulk(items: List[Item], batch_size: int, use_copy: bool) -> None:
+    """Chemin en masse : une transaction par lot."""
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        async with async_session_factory() as db:
+            await repository.bulk_create_results(
+                db,
+                [flow for flow, _, _, _ in batch],
+                [prediction for _, prediction, _, _ in batch],
+                [anomaly for _, _, anomaly, _ in batch],
+                [alert for _, _, _, alert in batch if alert],
+                use_copy=use_copy,
+            )
+            await db.commit()
+
+
+async def cleanup_items(items: List[Item]) -> None:
+    """Supprime les lignes synthétiques (et les retire des compteurs)."""
+    flow_ids = [flow["id"] for flow, _, _, _ in items]
+    deleted = {}
+    async with async_session_factory() as db:
+        for start in range(0, len(flow_ids), 1000):
+            chunk = flow_ids[start:start + 1000]
+            for model in (Alert, AnomalyScore, Prediction):
+                result = await db.execute(delete(model).where(model.flow_id.in_(chunk)))
+                deleted[model.__tablename__] = deleted.get(model.__tablename__, 0) - (result.rowcount or 0)
+            result = await db.execute(delete(NetworkFlow).where(NetworkFlow.id.in_(chunk)))
+            deleted["network_flows"] = deleted.get("network_flows", 0) - (result.rowcount or 0)
+        await repository.bump_row_counters(db, deleted)
+        await db.commit()
+
+
+async def seed_items(n_rows: int, spread_hours: float, alert_ratio: float = 0.05) -> List[Item]:
+    """Peuple la base de flux synthétiques répartis sur la fenêtre, puis met à jour les statistiques."""
+    items = synthetic_items(n_rows, alert_ratio, spread_hours=spread_hours)
+    await _write_bulk(items, batch_size=1000, use_copy=True)
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in PARTITIONED_TABLES:
+            await conn.execute(text(f'ANALYZE "{table}"'))
+    return items
+
+
+async def run_benchmark(n_rows: int, batch_size: int, alert_ratio: float) -> Dict[str, Any]:
+    """Mesure chaque stratégie sur un jeu synthétique identique (en taille) et nettoie ensuite."""
+    strategies = {
+        "legacy_orm": _write_legacy,
+        "bulk_executemany": lambda items: _write_bulk(items, batch_size, use_copy=False),
+        "bulk_copy": lambda items: _write_bulk(items, batch_size, use_copy=True),
+    }
+
+    results = {}
+    for name, write in strategies.items():
+        items = synthetic_items(n_rows, alert_ratio)
+        total_rows = sum(3 + (1 if alert else 0) for _, _, _, alert in items)
+        started = time.perf_counter()
+        try:
+            await write(items)
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                "seconds": round(elapsed, 3),
+                "flows_per_s": round(n_rows / elapsed, 1),
+                "rows_per_s": round(total_rows / elapsed, 1),
+            }
+        except Exception as e:
+            results[name] = {"error": str(e)}
+        finally:
+            await cleanup_items(items)
+
+    baseline = results["legacy_orm"].get("flows_per_s")
+    if baseline:
+        for name, result in results.items():
+            if "flows_per_s" in result:
+                result["speedup"] = round(result["flows_per_s"] / baseline, 2)
+
+    return {"flows": n_rows, "batch_size": batch_size, "alert_ratio": alert_ratio, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare l'écriture unitaire et l'écriture en masse.")
+    parser.add_argument("--rows", type=int, default=2000, help="Nombre de flux synthétiques")
+    parser.add_argument("--batch-size", type=int, default=200, help="Flux par transaction (chemins en masse)")
+    parser.add_argument("--alert-ratio", type=float, default=0.05, help="Proportion de flux avec alerte")
+    args = parser.parse_args()
+
+    async def _run() -> Dict[str, Any]:
+        try:
+            return await run_benchmark(args.rows, args.batch_size, args.alert_ratio)
+        finally:
+            await close_db()
+
+    print(json.dumps(asyncio.run(_run()), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
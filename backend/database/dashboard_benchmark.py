@@ -0,0 +1,119 @@
+"""
+Benchmark de latence des endpoints du dashboard sur une base peuplée.
+
+Compare, pour chaque endpoint, l'ancienne stratégie à l'actuelle :
+- overview : requêtes enchaînées sur une seule session contre sessions
+  indépendantes exécutées en parallèle (asyncio.gather) ;
+- traffic-timeseries : une requête par dimension contre un seul passage à
+  agrégats conditionnels (FILTER).
+
+Les flux synthétiques (TEST-NET-2) sont agrégés par un cycle de rollup_service
+puis supprimés à la fin de la mesure (sauf --keep-seed).
+
+Usage:
+    python -m backend.database.dashboard_benchmark --seed 100000 --hours 24 --iterations 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Callable, Awaitable
+
+from backend.database.connection import async_session_factory, close_db
+from backend.database.redis_client import get_threat_score, close_redis
+from backend.database import repository
+from backend.database.bulk_benchmark import seed_items, cleanup_items
+
+
+async def _overview_sequential(hours: int) -> None:
+    """Stratégie historique : trois requêtes enchaînées sur une session, puis Redis."""
+    async with async_session_factory() as db:
+        await repository.get_alert_stats(db, hours=hours)
+        await repository.get_anomaly_rate(db, hours=hours)
+        await repository.get_table_totals(db, ("network_flows", "alerts"))
+    try:
+        await get_threat_score()
+    except Exception:
+        pass
+
+
+async def _timeseries_per_dimension(hours: int) -> None:
+    """Stratégie historique : une lecture d'agrégats par dimension."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    async with async_session_factory() as db:
+        await repository.get_rollup(db, "flows", since, by_hour=True)
+        await repository.get_rollup(db, "decision", since, by_hour=True)
+
+
+async def _measure(call: Callable[[], Awaitable[Any]], iterations: int) -> Dict[str, float]:
+    await call()  # Préchauffage (pool de connexions, plans)
+    timings: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "p50_ms": round(timings[len(timings) // 2], 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+    }
+
+
+async def run_benchmark(hours: int, iterations: int) -> Dict[str, Any]:
+    """Mesure chaque couple (avant, après) sur la base courante."""
+    from backend.api import routes_dashboard
+
+    pairs = {
+        "overview": (
+            lambda: _overview_sequential(hours),
+            lambda: routes_dashboard.get_dashboard_overview.uncached(hours=hours, estimate=False),
+        ),
+        "traffic_timeseries": (
+            lambda: _timeseries_per_dimension(hours),
+            lambda: routes_dashboard.get_traffic_timeseries.uncached(hours=hours),
+        ),
+    }
+
+    results = {}
+    for name, (before, after) in pairs.items():
+        entry = {"before": await _measure(before, iterations), "after": await _measure(after, iterations)}
+        if entry["after"]["p50_ms"]:
+            entry["speedup_p50"] = round(entry["before"]["p50_ms"] / entry["after"]["p50_ms"], 2)
+        results[name] = entry
+    return {"period_hours": hours, "iterations": iterations, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mesure la latence des endpoints du dashboard (avant / après).")
+    parser.add_argument("--seed", type=int, default=0, help="Flux synthétiques insérés avant la mesure")
+    parser.add_argument("--keep-seed", action="store_true", help="Conserve les flux synthétiques après la mesure")
+    parser.add_argument("--hours", type=int, default=24, help="Fenêtre des endpoints (et de répartition du seed)")
+    parser.add_argument("--iterations", type=int, default=30, help="Appels mesurés par variante")
+    args = parser.parse_args()
+
+    async def _run() -> Dict[str, Any]:
+        from backend.services import rollup_service
+
+        seeded = []
+        try:
+            if args.seed:
+                seeded = await seed_items(args.seed, args.hours)
+                await rollup_service.run_once()
+            return await run_benchmark(args.hours, args.iterations)
+        finally:
+            if seeded and not args.keep_seed:
+                await cleanup_items(seeded)
+                rollup_service.mark_dirty(min(flow["timestamp"] for flow, _, _, _ in seeded))
+                await rollup_service.run_once()
+            await close_redis()
+            await close_db()
+
+    print(json.dumps(asyncio.run(_run()), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Audit des plans d'exécution des requêtes chaudes (EXPLAIN ANALYZE).
+
+Deux modes :
+- comparaison (défaut) : chaque entrée de QUERIES oppose la forme historique
+  d'une requête (jointure alerts → network_flows → ip_geolocation) à sa forme
+  actuelle (colonnes dénormalisées, une seule table) ;
+- contrôle (--check) : exécute les fonctions du repository et du reporting
+  (hot_calls), capture les requêtes SQL réellement émises, les rejoue sous
+  EXPLAIN (ANALYZE, BUFFERS) et échoue (code 1) si un plan parcourt
+  séquentiellement une table volumineuse en écartant des lignes.
+  --seed N insère d'abord N flux synthétiques (TEST-NET-2) répartis sur la
+  fenêtre, supprimés en fin d'audit sauf --keep-seed.
+
+Tout est exécuté dans une transaction annulée.
+
+Usage:
+    python -m backend.database.explain_audit --hours 24
+    python -m backend.database.explain_audit --check --seed 50000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database.connection import async_session_factory, close_db, engine
+from backend.database import repository
+from backend.database.models import PARTITIONED_TABLES
+
+_ATTACK_DECISIONS = "('confirmed_attack', 'suspicious')"
+
+# nom → {"legacy": requête historique | None, "current": requête actuelle} ; paramètre :since
+QUERIES: Dict[str, Dict[str, Optional[str]]] = {
+    "top_alert_ips": {
+        "legacy": (
+            "SELECT f.src_ip, COUNT(a.id) AS alert_count, AVG(a.threat_score), MAX(a.attack_type) "
+            "FROM alerts a JOIN network_flows f ON a.flow_id = f.id "
+            "WHERE a.timestamp >= :since GROUP BY f.src_ip ORDER BY alert_count DESC LIMIT 10"
+        ),
+        "current": (
+            "SELECT src_ip, COUNT(id) AS alert_count, AVG(threat_score), MAX(attack_type) "
+            "FROM alerts WHERE timestamp >= :since AND src_ip IS NOT NULL "
+            "GROUP BY src_ip ORDER BY alert_count DESC LIMIT 10"
+        ),
+    },
+    "report_top_countries": {
+        "legacy": (
+            "SELECT g.country, COUNT(a.id) AS count FROM alerts a "
+            "JOIN network_flows f ON a.flow_id = f.id "
+            "JOIN ip_geolocation g ON f.src_ip = g.ip_address "
+            f"WHERE a.timestamp >= :since AND a.decision IN {_ATTACK_DECISIONS} "
+            "GROUP BY g.country ORDER BY count DESC LIMIT 5"
+        ),
+        "current": (
+            "SELECT src_country_code, COUNT(id) AS count FROM alerts "
+            f"WHERE timestamp >= :since AND decision IN {_ATTACK_DECISIONS} AND src_country_code IS NOT NULL "
+            "GROUP BY src_country_code ORDER BY count DESC LIMIT 5"
+        ),
+    },
+    "traffic_timeseries_attacks": {
+        "legacy": (
+            "SELECT date_trunc('hour', f.timestamp) AS bucket, COUNT(a.id) FROM network_flows f "
+            "JOIN alerts a ON a.flow_id = f.id "
+            "WHERE f.timestamp >= :since AND a.decision = 'confirmed_attack' GROUP BY 1 ORDER BY 1"
+        ),
+        "current": (
+            "SELECT date_trunc('hour', timestamp) AS bucket, COUNT(id) FROM alerts "
+            "WHERE timestamp >= :since AND decision = 'confirmed_attack' GROUP BY 1 ORDER BY 1"
+        ),
+    },
+}
+
+
+def _walk(node: Dict[str, Any], node_types: List[str]) -> None:
+    node_types.append(node.get("Node Type", "?"))
+    for child in node.get("Plans", []):
+        _walk(child, node_types)
+
+
+def _iter_nodes(node: Dict[str, Any]):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _iter_nodes(child)
+
+
+def _summarize(plan_json: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Résumé d'un plan JSON : temps, tampons lus et types de nœuds."""
+    root = plan_json[0]
+    plan = root["Plan"]
+    node_types: List[str] = []
+    _walk(plan, node_types)
+    return {
+        "execution_ms": round(root.get("Execution Time", 0.0), 3),
+        "planning_ms": round(root.get("Planning Time", 0.0), 3),
+        "shared_hit_blocks": plan.get("Shared Hit Blocks", 0),
+        "shared_read_blocks": plan.get("Shared Read Blocks", 0),
+        "joins": sum(1 for t in node_types if "Join" in t or t == "Nested Loop"),
+        "seq_scans": sum(1 for t in node_types if t == "Seq Scan"),
+        "nodes": node_types,
+    }
+
+
+async def _explain_plan(db: AsyncSession, sql: str, params: Any) -> List[Dict[str, Any]]:
+    """Plan JSON brut d'une requête déjà compilée (paramètres du driver)."""
+    connection = await db.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+    plan = result.scalar()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+async def explain(sql: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """EXPLAIN (ANALYZE, BUFFERS) d'une requête, dans une transaction annulée."""
+    async with async_session_factory() as db:
+        try:
+            result = await db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params)
+            plan = result.scalar()
+        finally:
+            await db.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return _summarize(plan)
+
+
+async def run_audit(hours: int, names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Compare les plans historique / actuel de chaque requête enregistrée."""
+    params = {"since": datetime.utcnow() - timedelta(hours=hours)}
+    results = {}
+    for name, variants in QUERIES.items():
+        if names and name not in names:
+            continue
+        entry = {}
+        for variant, sql in variants.items():
+            if sql is None:
+                continue
+            try:
+                entry[variant] = await explain(sql, params)
+            except Exception as e:
+                entry[variant] = {"error": str(e)}
+        legacy_ms = entry.get("legacy", {}).get("execution_ms")
+        current_ms = entry.get("current", {}).get("execution_ms")
+        if legacy_ms and current_ms:
+            entry["speedup"] = round(legacy_ms / current_ms, 2)
+        results[name] = entry
+    return {"period_hours": hours, "queries": results}
+
+
+# ---- Contrôle des requêtes du repository et du reporting ----
+
+# Tables volumineuses : la table mère, ses partitions journalières et sa partition par défaut
+LARGE_TABLES = PARTITIONED_TABLES + ("network_flows_archive",)
+
+_MAX_UUID = "ffffffff-ffff-ffff-ffff-ffffffffffff"
+
+HotCall = Callable[[AsyncSession], Awaitable[Any]]
+
+
+def hot_calls(hours: int) -> Dict[str, HotCall]:
+    """Appels audités (paramètres représentatifs du dashboard et du reporting)."""
+    from reporting.metrics_engine import get_period_metrics
+
+    now = datetime.utcnow()
+    since = now - timedelta(hours=hours)
+    cursor = (now - timedelta(hours=1), _MAX_UUID)
+    return {
+        "get_recent_flows": lambda db: repository.get_recent_flows(db, limit=100),
+        "get_recent_flows_cursor": lambda db: repository.get_recent_flows(db, limit=100, cursor=cursor),
+        "get_flow_features": lambda db: repository.get_flow_features(db, since, limit=1000),
+        "get_prediction_probabilities": lambda db: repository.get_prediction_probabilities(db, since, 16, limit=1000),
+        "get_prediction_by_flow": lambda db: repository.get_prediction_by_flow(db, _MAX_UUID),
+        "get_anomalies": lambda db: repository.get_anomalies(db, limit=50),
+        "get_alerts": lambda db: repository.get_alerts(db, limit=50),
+        "get_alerts_severity_cursor": lambda db: repository.get_alerts(db, severity="high", limit=50, cursor=cursor),
+        "get_alerts_status": lambda db: repository.get_alerts(db, status="open", limit=50),
+        "get_alert_stats": lambda db: repository.get_alert_stats(db, hours=hours),
+        "get_top_alert_ips": lambda db: repository.get_top_alert_ips(db, hours=hours),
+        "get_attack_distribution": lambda db: repository.get_attack_distribution(db, hours=hours),
+        "get_anomaly_rate": lambda db: repository.get_anomaly_rate(db, hours=hours),
+        "get_rollup_hourly": lambda db: repository.get_rollup(db, "flows", since, by_hour=True),
+        "refresh_rollup_minute": lambda db: repository.refresh_rollup_minute(db, now - timedelta(minutes=10), now),
+        "get_table_totals": lambda db: repository.get_table_totals(db),
+        "get_unused_feedback": lambda db: repository.get_unused_feedback(db),
+        "report_period_metrics": lambda db: get_period_metrics(db, since, now),
+    }
+
+
+# Requêtes émises pendant l'appel en cours (None : capture inactive)
+_captured: Optional[List[Tuple[str, Any]]] = None
+
+
+def _capture_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _captured is not None and not executemany:
+        _captured.append((statement, parameters))
+
+
+def _large_relation(name: str) -> bool:
+    return any(name == t or name.startswith(f"{t}_p") or name == f"{t}_default" for t in LARGE_TABLES)
+
+
+async def _relation_sizes(db: AsyncSession) -> Dict[str, float]:
+    result = await db.execute(text("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"))
+    return {name: float(rows) for name, rows in result.all() if _large_relation(name)}
+
+
+def _seq_scan_violations(plan_json: List[Dict[str, Any]], sizes: Dict[str, float], min_rows: int) -> List[str]:
+    """
+    Seq Scan sur une table volumineuse (≥ min_rows lignes estimées) qui écarte
+    des lignes par filtre. La lecture intégrale d'une partition entièrement
+    couverte par la fenêtre (aucune ligne écartée) reste le meilleur plan.
+    """
+    violations = []
+    for node in _iter_nodes(plan_json[0]["Plan"]):
+        if node.get("Node Type") != "Seq Scan":
+            continue
+        relation = node.get("Relation Name", "")
+        if not _large_relation(relation) or sizes.get(relation, 0) < min_rows:
+            continue
+        removed = node.get("Rows Removed by Filter", 0)
+        if "Filter" in node and removed > 0:
+            violations.append(
+                f"Seq Scan sur {relation} (~{int(sizes[relation])} lignes, {removed} écartées par le filtre)"
+            )
+    return violations
+
+
+async def run_check(
+    hours: int,
+    names: Optional[List[str]] = None,
+    min_rows: int = 10000,
+) -> Dict[str, Any]:
+    """
+    Rejoue sous EXPLAIN ANALYZE chaque requête émise par les appels de hot_calls().
+
+    Returns:
+        Dict: Plans résumés par appel et liste des violations (Seq Scan filtrant
+        sur une table volumineuse).
+    """
+    global _captured
+
+    calls = hot_calls(hours)
+    results: Dict[str, Any] = {}
+    violations: List[Dict[str, str]] = []
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _capture_statement)
+    try:
+        async with async_session_factory() as db:
+            try:
+                sizes = await _relation_sizes(db)
+                for name, call in calls.items():
+                    if names and name not in names:
+                        continue
+                    _captured = []
+                    try:
+                        async with db.begin_nested():
+                            await call(db)
+                    except Exception as e:
+                        results[name] = {"error": str(e)}
+                        continue
+                    finally:
+                        statements, _captured = _captured, None
+
+                    entry = []
+                    for sql, params in statements:
+                        try:
+                            async with db.begin_nested():
+                                plan = await _explain_plan(db, sql, params)
+                        except Exception as e:
+                            entry.append({"sql": sql, "error": str(e)})
+                            continue
+                        found = _seq_scan_violations(plan, sizes, min_rows)
+                        violations.extend({"call": name, "detail": detail} for detail in found)
+                        entry.append({"sql": sql, **_summarize(plan), "violations": found})
+                    results[name] = entry
+            finally:
+                _captured = None
+                await db.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _capture_statement)
+
+    return {"period_hours": hours, "min_rows": min_rows, "calls": results, "violations": violations}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare les plans d'exécution des requêtes chaudes.")
+    parser.add_argument("--hours", type=int, default=24, help="Fenêtre glissante des requêtes")
+    parser.add_argument("--query", action="append", help="Restreint l'audit à une requête / un appel (répétable)")
+    parser.add_argument("--check", action="store_true", help="Contrôle les plans des requêtes du repository et du reporting")
+    parser.add_argument("--min-rows", type=int, default=10000, help="Taille à partir de laquelle une table est volumineuse")
+    parser.add_argument("--seed", type=int, default=0, help="Flux synthétiques insérés avant le contrôle")
+    parser.add_argument("--keep-seed", action="store_true", help="Conserve les flux synthétiques après l'audit")
+    args = parser.parse_args()
+
+    async def _run() -> Dict[str, Any]:
+        seeded = []
+        try:
+            if not args.check:
+                return await run_audit(args.hours, args.query)
+            if args.seed:
+                from backend.database.bulk_benchmark import seed_items
+                seeded = await seed_items(args.seed, args.hours)
+            return await run_check(args.hours, args.query, args.min_rows)
+        finally:
+            if seeded and not args.keep_seed:
+                from backend.database.bulk_benchmark import cleanup_items
+                await cleanup_items(seeded)
+            await close_db()
+
+    report = asyncio.run(_run())
+    print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+    if report.get("violations"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
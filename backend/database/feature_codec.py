@@ -0,0 +1,112 @@
+"""
+Encodage compact des colonnes numériques volumineuses.
+
+- network_flows.features : vecteur float32 little-endian en `bytea`
+  (78 features → 312 octets), versionné par feature_schema_version ;
+- predictions.top_k_indices / top_k_probabilities : `smallint[]` + `real[]`
+  des k classes les plus probables (le nom de classe n'est plus répété par ligne) ;
+- ports : `smallint` en complément à deux (ports ≥ 32768 stockés négatifs).
+
+Les fonctions de décodage produisent directement des tableaux NumPy.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from capture.feature_extractor import FEATURE_SCHEMA_VERSION
+
+FEATURE_DTYPE = np.dtype("<f4")
+
+# Nombre de features par version de schéma
+FEATURE_SCHEMA_SIZES = {1: 78}
+
+
+# ---- Features brutes ----
+
+def encode_features(features: np.ndarray) -> bytes:
+    """Sérialise un vecteur de features en float32 little-endian."""
+    return np.ascontiguousarray(features, dtype=FEATURE_DTYPE).reshape(-1).tobytes()
+
+
+def decode_features(blob: bytes, schema_version: int = FEATURE_SCHEMA_VERSION) -> np.ndarray:
+    """
+    Relit un vecteur de features (copie zéro : vue en lecture seule sur le buffer).
+
+    Raises:
+        ValueError: Version de schéma inconnue ou taille incohérente.
+    """
+    expected = FEATURE_SCHEMA_SIZES.get(schema_version)
+    if expected is None:
+        raise ValueError(f"Version de schéma de features inconnue : {schema_version}")
+    vector = np.frombuffer(blob, dtype=FEATURE_DTYPE)
+    if vector.shape[0] != expected:
+        raise ValueError(f"{vector.shape[0]} features lues, {expected} attendues (schéma v{schema_version})")
+    return vector
+
+
+def decode_feature_matrix(blobs: Iterable[bytes], schema_version: int = FEATURE_SCHEMA_VERSION) -> np.ndarray:
+    """Empile des vecteurs encodés en une matrice (n_flux, n_features) float32, en une seule copie."""
+    expected = FEATURE_SCHEMA_SIZES.get(schema_version)
+    if expected is None:
+        raise ValueError(f"Version de schéma de features inconnue : {schema_version}")
+    buffer = b"".join(blobs)
+    matrix = np.frombuffer(buffer, dtype=FEATURE_DTYPE)
+    if matrix.shape[0] % expected:
+        raise ValueError(f"Buffer incohérent avec le schéma v{schema_version} ({expected} features)")
+    return matrix.reshape(-1, expected)
+
+
+# ---- Probabilités top-k ----
+
+def decode_top_k(
+    indices: Sequence[int],
+    probabilities: Sequence[float],
+    class_names: Optional[Sequence[str]] = None,
+) -> Dict[str, float]:
+    """Vue {classe: probabilité} d'une prédiction (noms issus de l'encodeur du modèle)."""
+    result = {}
+    for index, probability in zip(indices, probabilities):
+        index = int(index)
+        name = class_names[index] if class_names and index < len(class_names) else f"class_{index}"
+        result[name] = round(float(probability), 6)
+    return result
+
+
+def decode_probability_matrix(
+    rows: Iterable[tuple],
+    num_classes: int,
+) -> np.ndarray:
+    """
+    Reconstruit une matrice dense (n, num_classes) float32 depuis des couples
+    (indices, probabilités) top-k ; les classes hors top-k valent 0.
+    """
+    rows = list(rows)
+    matrix = np.zeros((len(rows), num_classes), dtype=np.float32)
+    for i, (indices, probabilities) in enumerate(rows):
+        if indices:
+            matrix[i, np.asarray(indices, dtype=np.intp)] = np.asarray(probabilities, dtype=np.float32)
+    return matrix
+
+
+# ---- Ports (smallint) ----
+
+def port_to_smallint(port: Optional[int]) -> Optional[int]:
+    """0..65535 → -32768..32767 (complément à deux) ; les ports < 32768 sont inchangés."""
+    if port is None:
+        return None
+    port = int(port)
+    return port - 65536 if port >= 32768 else port
+
+
+def port_from_smallint(value: Optional[int]) -> Optional[int]:
+    """Inverse de port_to_smallint."""
+    if value is None:
+        return None
+    return int(value) & 0xFFFF
+
+
+def ports_from_smallint(values: np.ndarray) -> np.ndarray:
+    """Version vectorisée (tableau int16 → ports uint16)."""
+    return np.asarray(values, dtype=np.int16).view(np.uint16)
+
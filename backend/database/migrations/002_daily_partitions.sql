@@ -0,0 +1,174 @@
+-- ============================================
+-- Network Defense System — Migration 002
+-- Partitionnement journalier des tables à fort volume
+-- PostgreSQL 16+
+-- ============================================
+--
+-- Convertit network_flows, predictions, anomaly_scores et alerts en tables
+-- partitionnées par jour (RANGE sur timestamp) et crée l'archive long terme
+-- network_flows_archive. À exécuter une fois sur une base créée avec
+-- l'ancien schéma, application arrêtée :
+--
+--     psql -U nds_user -d network_defense -f 002_daily_partitions.sql
+--
+-- Les anciennes tables sont renommées en *_legacy, leurs données recopiées
+-- dans les partitions, puis supprimées en fin de script. Les clés étrangères
+-- entre tables partitionnées disparaissent (liens portés par l'application).
+
+BEGIN;
+
+-- 1. Mise de côté de l'ancien schéma
+ALTER TABLE feedback_labels DROP CONSTRAINT IF EXISTS feedback_labels_alert_id_fkey;
+ALTER TABLE alerts         RENAME TO alerts_legacy;
+ALTER TABLE anomaly_scores RENAME TO anomaly_scores_legacy;
+ALTER TABLE predictions    RENAME TO predictions_legacy;
+ALTER TABLE network_flows  RENAME TO network_flows_legacy;
+
+-- Les index (dont ceux des clés primaires) gardent leur nom après renommage
+ALTER TABLE alerts_legacy         RENAME CONSTRAINT alerts_pkey TO alerts_legacy_pkey;
+ALTER TABLE anomaly_scores_legacy RENAME CONSTRAINT anomaly_scores_pkey TO anomaly_scores_legacy_pkey;
+ALTER TABLE predictions_legacy    RENAME CONSTRAINT predictions_pkey TO predictions_legacy_pkey;
+ALTER TABLE network_flows_legacy  RENAME CONSTRAINT network_flows_pkey TO network_flows_legacy_pkey;
+
+-- Index secondaires : supprimés puis recréés sur les tables partitionnées
+DROP INDEX IF EXISTS idx_flows_timestamp, idx_flows_timestamp_desc, idx_flows_src_ip,
+    idx_flows_dst_ip, idx_flows_src_dst, ix_network_flows_timestamp, ix_network_flows_src_ip,
+    ix_network_flows_dst_ip, idx_predictions_label, idx_predictions_flow,
+    ix_predictions_predicted_label, idx_anomaly_flow, idx_anomaly_is_anomaly,
+    idx_alerts_severity, idx_alerts_severity_time, idx_alerts_status, idx_alerts_flow,
+    ix_alerts_severity, ix_alerts_status;
+
+-- 2. Tables partitionnées
+CREATE TABLE network_flows (
+    id              UUID NOT NULL DEFAULT uuid_generate_v4(),
+    timestamp       TIMESTAMP NOT NULL DEFAULT NOW(),
+    src_ip          VARCHAR(45) NOT NULL,
+    dst_ip          VARCHAR(45) NOT NULL,
+    src_port        INTEGER NOT NULL,
+    dst_port        INTEGER NOT NULL,
+    protocol        INTEGER NOT NULL,
+    duration        FLOAT DEFAULT 0.0,
+    total_fwd_packets   BIGINT DEFAULT 0,
+    total_bwd_packets   BIGINT DEFAULT 0,
+    flow_bytes_per_s    FLOAT DEFAULT 0.0,
+    flow_packets_per_s  FLOAT DEFAULT 0.0,
+    raw_features    JSONB,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE predictions (
+    id                  UUID NOT NULL DEFAULT uuid_generate_v4(),
+    flow_id             UUID NOT NULL,
+    timestamp           TIMESTAMP NOT NULL DEFAULT NOW(),
+    model_version       VARCHAR(50) NOT NULL,
+    predicted_label     VARCHAR(100) NOT NULL,
+    confidence          FLOAT NOT NULL,
+    class_probabilities JSONB,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE anomaly_scores (
+    id                      UUID NOT NULL DEFAULT uuid_generate_v4(),
+    flow_id                 UUID NOT NULL,
+    timestamp               TIMESTAMP NOT NULL DEFAULT NOW(),
+    reconstruction_error    FLOAT NOT NULL,
+    anomaly_score           FLOAT NOT NULL,
+    threshold_used          FLOAT NOT NULL,
+    is_anomaly              BOOLEAN DEFAULT FALSE,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE alerts (
+    id              UUID NOT NULL DEFAULT uuid_generate_v4(),
+    flow_id         UUID NOT NULL,
+    timestamp       TIMESTAMP NOT NULL DEFAULT NOW(),
+    severity        VARCHAR(20) NOT NULL,
+    attack_type     VARCHAR(100),
+    threat_score    FLOAT NOT NULL,
+    decision        VARCHAR(50) NOT NULL,
+    status          VARCHAR(20) DEFAULT 'open',
+    metadata        JSONB,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE IF NOT EXISTS network_flows_archive (
+    id              UUID PRIMARY KEY,
+    timestamp       TIMESTAMP NOT NULL,
+    src_ip          VARCHAR(45) NOT NULL,
+    dst_ip          VARCHAR(45) NOT NULL,
+    src_port        INTEGER NOT NULL,
+    dst_port        INTEGER NOT NULL,
+    protocol        INTEGER NOT NULL,
+    duration        FLOAT DEFAULT 0.0,
+    total_fwd_packets   BIGINT DEFAULT 0,
+    total_bwd_packets   BIGINT DEFAULT 0,
+    flow_bytes_per_s    FLOAT DEFAULT 0.0,
+    flow_packets_per_s  FLOAT DEFAULT 0.0,
+    raw_features    JSONB,
+    archived_at     TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- 3. Partitions journalières couvrant les données existantes + 7 jours à venir
+DO $$
+DECLARE
+    parent TEXT;
+    first_day DATE;
+    day DATE;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['network_flows', 'predictions', 'anomaly_scores', 'alerts'] LOOP
+        EXECUTE format('SELECT COALESCE(MIN(timestamp)::date, CURRENT_DATE) FROM %I', parent || '_legacy')
+            INTO first_day;
+        day := first_day;
+        WHILE day <= CURRENT_DATE + 7 LOOP
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                parent || '_p' || to_char(day, 'YYYYMMDD'), parent, day, day + 1
+            );
+            day := day + 1;
+        END LOOP;
+        EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+    END LOOP;
+END $$;
+
+-- 4. Recopie des données
+INSERT INTO network_flows SELECT
+    id, timestamp, src_ip, dst_ip, src_port, dst_port, protocol, duration,
+    total_fwd_packets, total_bwd_packets, flow_bytes_per_s, flow_packets_per_s, raw_features
+FROM network_flows_legacy;
+
+INSERT INTO predictions SELECT
+    id, flow_id, timestamp, model_version, predicted_label, confidence, class_probabilities
+FROM predictions_legacy;
+
+INSERT INTO anomaly_scores SELECT
+    id, flow_id, timestamp, reconstruction_error, anomaly_score, threshold_used, is_anomaly
+FROM anomaly_scores_legacy;
+
+INSERT INTO alerts SELECT
+    id, flow_id, timestamp, severity, attack_type, threat_score, decision, status, metadata
+FROM alerts_legacy;
+
+-- 5. Index (créés sur le parent, propagés à chaque partition)
+CREATE INDEX IF NOT EXISTS idx_flows_timestamp ON network_flows(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_flows_src_ip ON network_flows(src_ip);
+CREATE INDEX IF NOT EXISTS idx_flows_dst_ip ON network_flows(dst_ip);
+CREATE INDEX IF NOT EXISTS idx_flows_src_dst ON network_flows(src_ip, dst_ip);
+CREATE INDEX IF NOT EXISTS idx_flows_archive_timestamp ON network_flows_archive(timestamp);
+CREATE INDEX IF NOT EXISTS idx_flows_archive_src_ip ON network_flows_archive(src_ip);
+
+CREATE INDEX IF NOT EXISTS idx_predictions_label ON predictions(predicted_label);
+CREATE INDEX IF NOT EXISTS idx_predictions_flow ON predictions(flow_id);
+
+CREATE INDEX IF NOT EXISTS idx_anomaly_flow ON anomaly_scores(flow_id);
+CREATE INDEX IF NOT EXISTS idx_anomaly_is_anomaly ON anomaly_scores(is_anomaly);
+
+CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_status ON alerts(status);
+CREATE INDEX IF NOT EXISTS idx_alerts_flow ON alerts(flow_id);
+
+-- 6. Suppression de l'ancien schéma
+DROP TABLE alerts_legacy, anomaly_scores_legacy, predictions_legacy, network_flows_legacy;
+
+COMMIT;
+
+ANALYZE network_flows, predictions, anomaly_scores, alerts;
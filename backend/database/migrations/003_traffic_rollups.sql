@@ -0,0 +1,37 @@
+-- ============================================
+-- Network Defense System — Migration 003
+-- Agrégats incrémentaux du trafic (dashboard)
+-- PostgreSQL 16+
+-- ============================================
+--
+-- Crée les tables d'agrégats par minute / par heure et leurs watermarks.
+-- Au premier cycle, rollup_service agrège l'historique (ROLLUP_BACKFILL_HOURS)
+-- par tranches de 6 heures ; d'ici là, le dashboard lit les lignes brutes.
+--
+--     psql -U nds_user -d network_defense -f 003_traffic_rollups.sql
+
+CREATE TABLE IF NOT EXISTS traffic_rollup_minute (
+    bucket      TIMESTAMP NOT NULL,
+    dimension   VARCHAR(20) NOT NULL,
+    key         VARCHAR(100) NOT NULL DEFAULT '',
+    count       BIGINT NOT NULL DEFAULT 0,
+    value_sum   FLOAT NOT NULL DEFAULT 0.0,
+    label       VARCHAR(100),
+    PRIMARY KEY (bucket, dimension, key)
+);
+
+CREATE TABLE IF NOT EXISTS traffic_rollup_hour (
+    bucket      TIMESTAMP NOT NULL,
+    dimension   VARCHAR(20) NOT NULL,
+    key         VARCHAR(100) NOT NULL DEFAULT '',
+    count       BIGINT NOT NULL DEFAULT 0,
+    value_sum   FLOAT NOT NULL DEFAULT 0.0,
+    label       VARCHAR(100),
+    PRIMARY KEY (bucket, dimension, key)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name        VARCHAR(20) PRIMARY KEY,
+    watermark   TIMESTAMP NOT NULL,
+    updated_at  TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,45 @@
+-- ============================================
+-- Network Defense System — Migration 004
+-- Stockage compact des colonnes numériques
+-- PostgreSQL 16+
+-- ============================================
+--
+-- - network_flows (+ archive) : ports et protocole en SMALLINT (ports en
+--   complément à deux : 32768..65535 → -32768..-1, voir feature_codec) ;
+--   raw_features JSONB (jamais renseigné) remplacé par features BYTEA
+--   (float32 little-endian) + feature_schema_version ;
+-- - predictions : top-k des probabilités en SMALLINT[] / REAL[].
+--
+-- Réécrit les tables concernées : à exécuter application arrêtée.
+--
+--     psql -U nds_user -d network_defense -f 004_compact_columns.sql
+
+BEGIN;
+
+ALTER TABLE network_flows
+    ALTER COLUMN src_port TYPE SMALLINT USING (CASE WHEN src_port >= 32768 THEN src_port - 65536 ELSE src_port END),
+    ALTER COLUMN dst_port TYPE SMALLINT USING (CASE WHEN dst_port >= 32768 THEN dst_port - 65536 ELSE dst_port END),
+    ALTER COLUMN protocol TYPE SMALLINT,
+    DROP COLUMN IF EXISTS raw_features,
+    ADD COLUMN IF NOT EXISTS features BYTEA,
+    ADD COLUMN IF NOT EXISTS feature_schema_version SMALLINT;
+
+ALTER TABLE network_flows_archive
+    ALTER COLUMN src_port TYPE SMALLINT USING (CASE WHEN src_port >= 32768 THEN src_port - 65536 ELSE src_port END),
+    ALTER COLUMN dst_port TYPE SMALLINT USING (CASE WHEN dst_port >= 32768 THEN dst_port - 65536 ELSE dst_port END),
+    ALTER COLUMN protocol TYPE SMALLINT,
+    DROP COLUMN IF EXISTS raw_features,
+    ADD COLUMN IF NOT EXISTS features BYTEA,
+    ADD COLUMN IF NOT EXISTS feature_schema_version SMALLINT;
+
+-- Les noms de classes ne peuvent pas être convertis en indices sans l'encodeur :
+-- l'ancienne colonne JSONB n'est plus écrite et reste lisible jusqu'à expiration
+-- des partitions concernées (RETENTION_PREDICTIONS_DAYS).
+ALTER TABLE predictions
+    ADD COLUMN IF NOT EXISTS top_k_indices SMALLINT[],
+    ADD COLUMN IF NOT EXISTS top_k_probabilities REAL[];
+
+COMMIT;
+
+-- Une fois les anciennes partitions expirées :
+--     ALTER TABLE predictions DROP COLUMN class_probabilities;
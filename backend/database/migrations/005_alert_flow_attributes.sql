@@ -0,0 +1,57 @@
+-- ============================================
+-- Network Defense System — Migration 005
+-- Attributs du flux dénormalisés sur alerts
+-- PostgreSQL 16+
+-- ============================================
+--
+-- Ajoute src_ip, dst_ip, dst_port, protocol et src_country_code sur alerts
+-- (renseignés à la création par alert_service) et remplit l'historique :
+--   1. depuis network_flows tant que la partition du flux existe encore ;
+--   2. sinon depuis metadata (src_ip / dst_ip) ;
+--   3. code pays depuis le cache ip_geolocation.
+--
+--     psql -U nds_user -d network_defense -f 005_alert_flow_attributes.sql
+--
+-- Comparaison des plans avant / après : python -m backend.database.explain_audit
+
+BEGIN;
+
+ALTER TABLE alerts
+    ADD COLUMN IF NOT EXISTS src_ip VARCHAR(45),
+    ADD COLUMN IF NOT EXISTS dst_ip VARCHAR(45),
+    ADD COLUMN IF NOT EXISTS dst_port SMALLINT,
+    ADD COLUMN IF NOT EXISTS protocol SMALLINT,
+    ADD COLUMN IF NOT EXISTS src_country_code VARCHAR(5);
+
+-- 1. Flux encore présents (ports déjà en SMALLINT, migration 004)
+UPDATE alerts a
+SET src_ip = f.src_ip,
+    dst_ip = f.dst_ip,
+    dst_port = f.dst_port,
+    protocol = f.protocol
+FROM network_flows f
+WHERE f.id = a.flow_id
+  AND a.src_ip IS NULL;
+
+-- 2. Flux déjà supprimés : adresses conservées dans les métadonnées de l'alerte
+UPDATE alerts
+SET src_ip = metadata->>'src_ip',
+    dst_ip = metadata->>'dst_ip'
+WHERE src_ip IS NULL
+  AND metadata ? 'src_ip';
+
+-- 3. Code pays
+UPDATE alerts a
+SET src_country_code = NULLIF(g.country_code, '')
+FROM ip_geolocation g
+WHERE g.ip_address = a.src_ip
+  AND a.src_country_code IS NULL;
+
+COMMIT;
+
+CREATE INDEX IF NOT EXISTS idx_alerts_src_ip ON alerts(src_ip, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_dst_ip ON alerts(dst_ip);
+CREATE INDEX IF NOT EXISTS idx_alerts_dst_port ON alerts(dst_port, protocol);
+CREATE INDEX IF NOT EXISTS idx_alerts_country ON alerts(src_country_code);
+
+ANALYZE alerts;
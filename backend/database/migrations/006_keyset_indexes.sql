@@ -0,0 +1,24 @@
+-- ============================================
+-- Network Defense System — Migration 006
+-- Index de pagination keyset (timestamp, id)
+-- PostgreSQL 16+
+-- ============================================
+--
+-- GET /api/alerts/ pagine désormais par curseur : WHERE (timestamp, id) < (:ts, :id)
+-- ORDER BY timestamp DESC, id DESC. Ces index composites servent la requête
+-- sans tri ni parcours des lignes déjà vues, avec ou sans filtre sévérité / statut.
+--
+--     psql -U nds_user -d network_defense -f 006_keyset_indexes.sql
+
+-- Index remplacés (noms du schéma SQL et du modèle ORM)
+DROP INDEX IF EXISTS idx_flows_timestamp, idx_flows_timestamp_desc,
+    idx_alerts_severity, idx_alerts_severity_time, idx_alerts_status;
+
+CREATE INDEX IF NOT EXISTS idx_flows_timestamp_id ON network_flows(timestamp DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp_id ON alerts(timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_severity_time ON alerts(severity, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_status_time ON alerts(status, timestamp DESC, id DESC);
+
+ANALYZE network_flows;
+ANALYZE alerts;
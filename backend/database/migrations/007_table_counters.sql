@@ -0,0 +1,29 @@
+-- ============================================
+-- Network Defense System — Migration 007
+-- Compteurs de lignes maintenus à l'écriture
+-- PostgreSQL 16+
+-- ============================================
+--
+-- /api/dashboard/overview ne lance plus COUNT(*) sur network_flows : les totaux
+-- sont lus dans table_counters, incrémentés dans la transaction de chaque
+-- écriture et décrémentés par la rétention. Les compteurs sont initialisés ici
+-- depuis pg_class.reltuples (estimation, reconciled_at NULL) ; counter_service
+-- les recale sur un COUNT(*) exact au démarrage suivant, en tâche de fond.
+--
+--     psql -U nds_user -d network_defense -f 007_table_counters.sql
+
+CREATE TABLE IF NOT EXISTS table_counters (
+    name            VARCHAR(50) PRIMARY KEY,
+    row_count       BIGINT NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMP NOT NULL DEFAULT NOW(),
+    reconciled_at   TIMESTAMP
+);
+
+INSERT INTO table_counters (name, row_count)
+SELECT t.name, COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint
+FROM (VALUES ('network_flows'), ('predictions'), ('anomaly_scores'), ('alerts')) AS t(name)
+LEFT JOIN pg_class c
+    ON (c.oid = t.name::regclass AND c.relkind = 'r')
+    OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = t.name::regclass)
+GROUP BY t.name
+ON CONFLICT (name) DO NOTHING;
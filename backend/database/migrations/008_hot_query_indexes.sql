@@ -0,0 +1,40 @@
+-- ============================================
+-- Network Defense System — Migration 008
+-- Index des requêtes chaudes (composites, partiels, BRIN)
+-- PostgreSQL 16+
+-- ============================================
+--
+--   - alerts : index partiel couvrant sur les attaques (decision IN (...)),
+--     lu par metrics_engine et les séries d'attaques sans accès à la table ;
+--   - predictions / anomaly_scores : BRIN sur timestamp (insertion en ordre
+--     chronologique) pour les fenêtres recalculées par rollup_service ;
+--   - anomaly_scores : index partiel des seules anomalies avérées, à la place
+--     de l'index booléen (is_anomaly) peu sélectif ;
+--   - feedback_labels : clé alert_id et lot non utilisé (index partiel).
+--
+-- Vérification des plans sur une base peuplée :
+--     python -m backend.database.explain_audit --check --seed 50000
+--
+--     psql -U nds_user -d network_defense -f 008_hot_query_indexes.sql
+
+-- Doublons des index composites (index=True de l'ORM) et index booléen remplacé
+DROP INDEX IF EXISTS ix_network_flows_timestamp, ix_alerts_severity, ix_alerts_status,
+    idx_anomaly_is_anomaly;
+
+CREATE INDEX IF NOT EXISTS idx_alerts_attacks_time ON alerts(timestamp)
+    INCLUDE (attack_type, threat_score, src_ip, src_country_code)
+    WHERE decision IN ('confirmed_attack', 'suspicious');
+
+CREATE INDEX IF NOT EXISTS idx_predictions_time_brin ON predictions USING brin(timestamp);
+CREATE INDEX IF NOT EXISTS idx_anomaly_time_brin ON anomaly_scores USING brin(timestamp);
+CREATE INDEX IF NOT EXISTS idx_anomaly_flagged_time ON anomaly_scores(timestamp DESC) WHERE is_anomaly;
+
+DROP INDEX IF EXISTS idx_feedback_unused;
+CREATE INDEX IF NOT EXISTS idx_feedback_unused ON feedback_labels(used_for_training)
+    WHERE NOT used_for_training;
+CREATE INDEX IF NOT EXISTS idx_feedback_alert ON feedback_labels(alert_id);
+
+ANALYZE alerts;
+ANALYZE predictions;
+ANALYZE anomaly_scores;
+ANALYZE feedback_labels;
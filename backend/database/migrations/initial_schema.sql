@@ -6,24 +6,56 @@
 -- Extension UUID
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Les tables à fort volume (network_flows, predictions, anomaly_scores,
+-- alerts) sont partitionnées par jour sur `timestamp`. Les partitions
+-- journalières (<table>_pYYYYMMDD) sont créées à l'avance et supprimées
+-- à expiration par data_retention_service ; la partition DEFAULT ne sert
+-- que de filet de sécurité. La clé primaire inclut `timestamp` et les
+-- liens flow_id / alert_id ne sont pas des clés étrangères SQL.
+
 -- ============================================
 -- Table: network_flows
 -- Flux réseau capturés avec features extraites
 -- ============================================
 CREATE TABLE IF NOT EXISTS network_flows (
-    id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id              UUID NOT NULL DEFAULT uuid_generate_v4(),
     timestamp       TIMESTAMP NOT NULL DEFAULT NOW(),
     src_ip          VARCHAR(45) NOT NULL,
     dst_ip          VARCHAR(45) NOT NULL,
-    src_port        INTEGER NOT NULL,
-    dst_port        INTEGER NOT NULL,
-    protocol        INTEGER NOT NULL,
+    src_port        SMALLINT NOT NULL,   -- port en complément à deux (≥ 32768 → négatif)
+    dst_port        SMALLINT NOT NULL,
+    protocol        SMALLINT NOT NULL,
     duration        FLOAT DEFAULT 0.0,
     total_fwd_packets   BIGINT DEFAULT 0,
     total_bwd_packets   BIGINT DEFAULT 0,
     flow_bytes_per_s    FLOAT DEFAULT 0.0,
     flow_packets_per_s  FLOAT DEFAULT 0.0,
-    raw_features    JSONB
+    features        BYTEA,               -- float32 little-endian (feature_codec)
+    feature_schema_version SMALLINT,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+CREATE TABLE IF NOT EXISTS network_flows_default PARTITION OF network_flows DEFAULT;
+
+-- ============================================
+-- Table: network_flows_archive
+-- Flux référencés par une alerte, copiés avant suppression de leur partition
+-- ============================================
+CREATE TABLE IF NOT EXISTS network_flows_archive (
+    id              UUID PRIMARY KEY,
+    timestamp       TIMESTAMP NOT NULL,
+    src_ip          VARCHAR(45) NOT NULL,
+    dst_ip          VARCHAR(45) NOT NULL,
+    src_port        SMALLINT NOT NULL,   -- port en complément à deux (≥ 32768 → négatif)
+    dst_port        SMALLINT NOT NULL,
+    protocol        SMALLINT NOT NULL,
+    duration        FLOAT DEFAULT 0.0,
+    total_fwd_packets   BIGINT DEFAULT 0,
+    total_bwd_packets   BIGINT DEFAULT 0,
+    flow_bytes_per_s    FLOAT DEFAULT 0.0,
+    flow_packets_per_s  FLOAT DEFAULT 0.0,
+    features        BYTEA,               -- float32 little-endian (feature_codec)
+    feature_schema_version SMALLINT,
+    archived_at     TIMESTAMP NOT NULL DEFAULT NOW()
 );
 
 -- ============================================
@@ -31,44 +63,57 @@ CREATE TABLE IF NOT EXISTS network_flows (
 -- Prédictions du modèle supervisé
 -- ============================================
 CREATE TABLE IF NOT EXISTS predictions (
-    id                  UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    flow_id             UUID NOT NULL REFERENCES network_flows(id) ON DELETE CASCADE,
+    id                  UUID NOT NULL DEFAULT uuid_generate_v4(),
+    flow_id             UUID NOT NULL,
     timestamp           TIMESTAMP NOT NULL DEFAULT NOW(),
     model_version       VARCHAR(50) NOT NULL,
     predicted_label     VARCHAR(100) NOT NULL,
     confidence          FLOAT NOT NULL,
-    class_probabilities JSONB
-);
+    top_k_indices       SMALLINT[],
+    top_k_probabilities REAL[],
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+CREATE TABLE IF NOT EXISTS predictions_default PARTITION OF predictions DEFAULT;
 
 -- ============================================
 -- Table: anomaly_scores
 -- Scores d'anomalie du modèle non-supervisé
 -- ============================================
 CREATE TABLE IF NOT EXISTS anomaly_scores (
-    id                      UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    flow_id                 UUID NOT NULL REFERENCES network_flows(id) ON DELETE CASCADE,
+    id                      UUID NOT NULL DEFAULT uuid_generate_v4(),
+    flow_id                 UUID NOT NULL,
     timestamp               TIMESTAMP NOT NULL DEFAULT NOW(),
     reconstruction_error    FLOAT NOT NULL,
     anomaly_score           FLOAT NOT NULL,
     threshold_used          FLOAT NOT NULL,
-    is_anomaly              BOOLEAN DEFAULT FALSE
-);
+    is_anomaly              BOOLEAN DEFAULT FALSE,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+CREATE TABLE IF NOT EXISTS anomaly_scores_default PARTITION OF anomaly_scores DEFAULT;
 
 -- ============================================
 -- Table: alerts
 -- Alertes générées par le moteur hybride
 -- ============================================
 CREATE TABLE IF NOT EXISTS alerts (
-    id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    flow_id         UUID NOT NULL REFERENCES network_flows(id) ON DELETE CASCADE,
+    id              UUID NOT NULL DEFAULT uuid_generate_v4(),
+    flow_id         UUID NOT NULL,
     timestamp       TIMESTAMP NOT NULL DEFAULT NOW(),
     severity        VARCHAR(20) NOT NULL,
     attack_type     VARCHAR(100),
     threat_score    FLOAT NOT NULL,
     decision        VARCHAR(50) NOT NULL,
     status          VARCHAR(20) DEFAULT 'open',
-    metadata        JSONB
-);
+    metadata        JSONB,
+    -- Attributs du flux dénormalisés (agrégats sans jointure)
+    src_ip          VARCHAR(45),
+    dst_ip          VARCHAR(45),
+    dst_port        SMALLINT,
+    protocol        SMALLINT,
+    src_country_code VARCHAR(5),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+CREATE TABLE IF NOT EXISTS alerts_default PARTITION OF alerts DEFAULT;
 
 -- ============================================
 -- Table: ip_geolocation
@@ -113,30 +158,82 @@ CREATE TABLE IF NOT EXISTS model_versions (
 -- ============================================
 CREATE TABLE IF NOT EXISTS feedback_labels (
     id                  UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    alert_id            UUID NOT NULL REFERENCES alerts(id) ON DELETE CASCADE,
+    alert_id            UUID NOT NULL,
     analyst_label       VARCHAR(100) NOT NULL,
     notes               TEXT,
     created_at          TIMESTAMP NOT NULL DEFAULT NOW(),
     used_for_training   BOOLEAN DEFAULT FALSE
 );
 
+-- ============================================
+-- Tables: traffic_rollup_minute / traffic_rollup_hour
+-- Agrégats incrémentaux lus par le dashboard (rollup_service)
+-- Dimensions : flows, protocol, attack, anomaly, decision, severity, source
+-- ============================================
+CREATE TABLE IF NOT EXISTS traffic_rollup_minute (
+    bucket      TIMESTAMP NOT NULL,
+    dimension   VARCHAR(20) NOT NULL,
+    key         VARCHAR(100) NOT NULL DEFAULT '',
+    count       BIGINT NOT NULL DEFAULT 0,
+    value_sum   FLOAT NOT NULL DEFAULT 0.0,
+    label       VARCHAR(100),
+    PRIMARY KEY (bucket, dimension, key)
+);
+
+CREATE TABLE IF NOT EXISTS traffic_rollup_hour (
+    bucket      TIMESTAMP NOT NULL,
+    dimension   VARCHAR(20) NOT NULL,
+    key         VARCHAR(100) NOT NULL DEFAULT '',
+    count       BIGINT NOT NULL DEFAULT 0,
+    value_sum   FLOAT NOT NULL DEFAULT 0.0,
+    label       VARCHAR(100),
+    PRIMARY KEY (bucket, dimension, key)
+);
+
+-- Borne haute (exclue) jusqu'à laquelle chaque granularité est à jour
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name        VARCHAR(20) PRIMARY KEY,
+    watermark   TIMESTAMP NOT NULL,
+    updated_at  TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Totaux de lignes maintenus à l'écriture (évite COUNT(*) sur les tables volumineuses)
+CREATE TABLE IF NOT EXISTS table_counters (
+    name            VARCHAR(50) PRIMARY KEY,
+    row_count       BIGINT NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMP NOT NULL DEFAULT NOW(),
+    reconciled_at   TIMESTAMP
+);
+
 -- ============================================
 -- INDEXES — Performance
 -- ============================================
-CREATE INDEX IF NOT EXISTS idx_flows_timestamp ON network_flows(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_flows_timestamp_id ON network_flows(timestamp DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_flows_src_ip ON network_flows(src_ip);
 CREATE INDEX IF NOT EXISTS idx_flows_dst_ip ON network_flows(dst_ip);
 CREATE INDEX IF NOT EXISTS idx_flows_src_dst ON network_flows(src_ip, dst_ip);
+CREATE INDEX IF NOT EXISTS idx_flows_archive_timestamp ON network_flows_archive(timestamp);
+CREATE INDEX IF NOT EXISTS idx_flows_archive_src_ip ON network_flows_archive(src_ip);
 
 CREATE INDEX IF NOT EXISTS idx_predictions_label ON predictions(predicted_label);
 CREATE INDEX IF NOT EXISTS idx_predictions_flow ON predictions(flow_id);
+CREATE INDEX IF NOT EXISTS idx_predictions_time_brin ON predictions USING brin(timestamp);
 
 CREATE INDEX IF NOT EXISTS idx_anomaly_flow ON anomaly_scores(flow_id);
-CREATE INDEX IF NOT EXISTS idx_anomaly_is_anomaly ON anomaly_scores(is_anomaly);
+CREATE INDEX IF NOT EXISTS idx_anomaly_time_brin ON anomaly_scores USING brin(timestamp);
+CREATE INDEX IF NOT EXISTS idx_anomaly_flagged_time ON anomaly_scores(timestamp DESC) WHERE is_anomaly;
 
-CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity, timestamp DESC);
-CREATE INDEX IF NOT EXISTS idx_alerts_status ON alerts(status);
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp_id ON alerts(timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_severity_time ON alerts(severity, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_status_time ON alerts(status, timestamp DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_alerts_flow ON alerts(flow_id);
+CREATE INDEX IF NOT EXISTS idx_alerts_attacks_time ON alerts(timestamp)
+    INCLUDE (attack_type, threat_score, src_ip, src_country_code)
+    WHERE decision IN ('confirmed_attack', 'suspicious');
+CREATE INDEX IF NOT EXISTS idx_alerts_src_ip ON alerts(src_ip, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_dst_ip ON alerts(dst_ip);
+CREATE INDEX IF NOT EXISTS idx_alerts_dst_port ON alerts(dst_port, protocol);
+CREATE INDEX IF NOT EXISTS idx_alerts_country ON alerts(src_country_code);
 
 CREATE INDEX IF NOT EXISTS idx_geo_ip ON ip_geolocation(ip_address);
 
@@ -1,6 +1,11 @@
 """
-Modèles ORM SQLAlchemy pour les 7 tables du SOC.
+Modèles ORM SQLAlchemy pour les tables du SOC.
 Chaque modèle représente une table de la base de données PostgreSQL.
+
+Les tables à fort volume (network_flows, predictions, anomaly_scores, alerts)
+sont partitionnées par jour (RANGE sur timestamp) : la clé primaire inclut
+la colonne de partitionnement et les liens entre ces tables sont portés par
+l'ORM (pas de clé étrangère SQL vers une table partitionnée).
 """
 
 import uuid
@@ -8,12 +13,13 @@ from datetime import datetime
 
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime,
-    ForeignKey, Text, BigInteger, Index
+    Text, BigInteger, SmallInteger, LargeBinary, Index, TypeDecorator
 )
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY, REAL
+from sqlalchemy.orm import relationship, foreign
 
 from backend.database.connection import Base
+from backend.database.feature_codec import port_to_smallint, port_from_smallint
 
 
 def generate_uuid():
@@ -21,6 +27,23 @@ def generate_uuid():
     return str(uuid.uuid4())
 
 
+class PortSmallInteger(TypeDecorator):
+    """Port 0..65535 stocké en smallint (complément à deux), relu tel quel par l'ORM."""
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return port_to_smallint(value)
+
+    def process_result_value(self, value, dialect):
+        return port_from_smallint(value)
+
+
+# Tables partitionnées par jour, dans l'ordre de création
+PARTITIONED_TABLES = ("network_flows", "predictions", "anomaly_scores", "alerts")
+_DAILY_PARTITIONING = {"postgresql_partition_by": "RANGE (timestamp)"}
+
+
 class NetworkFlow(Base):
     """
     Modèle représentant un flux réseau (Network Flow) capturé.
@@ -31,14 +54,14 @@ class NetworkFlow(Base):
     __tablename__ = "network_flows"
 
     id = Column(UUID(as_uuid=False), primary_key=True, default=generate_uuid)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
     
     # Identifiants du flux (5-tuple)
     src_ip = Column(String(45), nullable=False, index=True)
     dst_ip = Column(String(45), nullable=False, index=True)
-    src_port = Column(Integer, nullable=False)
-    dst_port = Column(Integer, nullable=False)
-    protocol = Column(Integer, nullable=False) # 6=TCP, 17=UDP, etc.
+    src_port = Column(PortSmallInteger, nullable=False)
+    dst_port = Column(PortSmallInteger, nullable=False)
+    protocol = Column(SmallInteger, nullable=False) # 6=TCP, 17=UDP, etc.
     
     # Métriques de base
     duration = Column(Float, default=0.0) # Durée du flux en secondes
@@ -47,18 +70,59 @@ class NetworkFlow(Base):
     flow_bytes_per_s = Column(Float, default=0.0) # Débit octets/sec
     flow_packets_per_s = Column(Float, default=0.0) # Débit paquets/sec
     
-    # Features complètes pour l'IA (JSON)
-    # Stocke ~78 features CIC-IDS (min, max, mean, std des temps inter-arrivées, tailles de paquets, flags...)
-    raw_features = Column(JSONB, nullable=True)
+    # Features complètes pour l'IA : 78 features CIC-IDS en float32 (voir feature_codec)
+    # Le numéro de schéma fixe l'ordre et le nombre de features à la relecture
+    features = Column(LargeBinary, nullable=True)
+    feature_schema_version = Column(SmallInteger, nullable=True)
 
     # Relations avec les résultats d'analyse
-    predictions = relationship("Prediction", back_populates="flow", cascade="all, delete-orphan")
-    anomaly_scores = relationship("AnomalyScore", back_populates="flow", cascade="all, delete-orphan")
-    alerts = relationship("Alert", back_populates="flow", cascade="all, delete-orphan")
+    predictions = relationship(
+        "Prediction", back_populates="flow", cascade="all, delete-orphan",
+        primaryjoin="NetworkFlow.id == foreign(Prediction.flow_id)",
+    )
+    anomaly_scores = relationship(
+        "AnomalyScore", back_populates="flow", cascade="all, delete-orphan",
+        primaryjoin="NetworkFlow.id == foreign(AnomalyScore.flow_id)",
+    )
+    alerts = relationship(
+        "Alert", back_populates="flow", cascade="all, delete-orphan",
+        primaryjoin="NetworkFlow.id == foreign(Alert.flow_id)",
+    )
 
     __table_args__ = (
-        Index("idx_flows_timestamp_desc", timestamp.desc()),
+        Index("idx_flows_timestamp_id", timestamp.desc(), id.desc()),  # Pagination keyset
         Index("idx_flows_src_dst", src_ip, dst_ip),
+        _DAILY_PARTITIONING,
+    )
+
+
+class NetworkFlowArchive(Base):
+    """
+    Archive long terme des flux référencés par une alerte.
+    Alimentée par la maintenance des partitions juste avant la suppression
+    d'une partition journalière de network_flows (non partitionnée).
+    """
+    __tablename__ = "network_flows_archive"
+
+    id = Column(UUID(as_uuid=False), primary_key=True)
+    timestamp = Column(DateTime, nullable=False)
+    src_ip = Column(String(45), nullable=False)
+    dst_ip = Column(String(45), nullable=False)
+    src_port = Column(PortSmallInteger, nullable=False)
+    dst_port = Column(PortSmallInteger, nullable=False)
+    protocol = Column(SmallInteger, nullable=False)
+    duration = Column(Float, default=0.0)
+    total_fwd_packets = Column(BigInteger, default=0)
+    total_bwd_packets = Column(BigInteger, default=0)
+    flow_bytes_per_s = Column(Float, default=0.0)
+    flow_packets_per_s = Column(Float, default=0.0)
+    features = Column(LargeBinary, nullable=True)
+    feature_schema_version = Column(SmallInteger, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("idx_flows_archive_timestamp", timestamp),
+        Index("idx_flows_archive_src_ip", src_ip),
     )
 
 
@@ -70,20 +134,31 @@ class Prediction(Base):
     __tablename__ = "predictions"
 
     id = Column(UUID(as_uuid=False), primary_key=True, default=generate_uuid)
-    flow_id = Column(UUID(as_uuid=False), ForeignKey("network_flows.id"), nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    flow_id = Column(UUID(as_uuid=False), nullable=False)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
     model_version = Column(String(50), nullable=False) # Version du modèle utilisé (ex: v1.0.0)
     
     # Résultat principal
     predicted_label = Column(String(100), nullable=False, index=True) # Ex: DDoS, PortScan, BENIGN
     confidence = Column(Float, nullable=False) # Score de confiance (0.0 à 1.0)
     
-    # Détail des probabilités pour chaque classe (JSON)
-    # Ex: {"BENIGN": 0.01, "DDoS": 0.99, ...}
-    class_probabilities = Column(JSONB, nullable=True)
+    # Top-k des probabilités : indices de classe (encodeur du modèle) et probabilités float32
+    # Ex: [3, 0, 7] / [0.99, 0.007, 0.002]
+    top_k_indices = Column(ARRAY(SmallInteger), nullable=True)
+    top_k_probabilities = Column(ARRAY(REAL), nullable=True)
 
     # Relations
-    flow = relationship("NetworkFlow", back_populates="predictions")
+    flow = relationship(
+        "NetworkFlow", back_populates="predictions",
+        primaryjoin="foreign(Prediction.flow_id) == NetworkFlow.id",
+    )
+
+    __table_args__ = (
+        Index("idx_predictions_flow", flow_id),
+        # Colonne temporelle en ajout seul : BRIN (quelques pages) pour les fenêtres des agrégats
+        Index("idx_predictions_time_brin", timestamp, postgresql_using="brin"),
+        _DAILY_PARTITIONING,
+    )
 
 
 class AnomalyScore(Base):
@@ -94,8 +169,8 @@ class AnomalyScore(Base):
     __tablename__ = "anomaly_scores"
 
     id = Column(UUID(as_uuid=False), primary_key=True, default=generate_uuid)
-    flow_id = Column(UUID(as_uuid=False), ForeignKey("network_flows.id"), nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    flow_id = Column(UUID(as_uuid=False), nullable=False)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
     
     # Métriques d'anomalie
     reconstruction_error = Column(Float, nullable=False) # Erreur MSE brute
@@ -104,7 +179,18 @@ class AnomalyScore(Base):
     is_anomaly = Column(Boolean, default=False) # True si erreur > seuil
 
     # Relations
-    flow = relationship("NetworkFlow", back_populates="anomaly_scores")
+    flow = relationship(
+        "NetworkFlow", back_populates="anomaly_scores",
+        primaryjoin="foreign(AnomalyScore.flow_id) == NetworkFlow.id",
+    )
+
+    __table_args__ = (
+        Index("idx_anomaly_flow", flow_id),
+        Index("idx_anomaly_time_brin", timestamp, postgresql_using="brin"),
+        # Anomalies avérées seulement (liste récente, taux d'anomalie)
+        Index("idx_anomaly_flagged_time", timestamp.desc(), postgresql_where=is_anomaly),
+        _DAILY_PARTITIONING,
+    )
 
 
 class Alert(Base):
@@ -115,19 +201,26 @@ class Alert(Base):
     __tablename__ = "alerts"
 
     id = Column(UUID(as_uuid=False), primary_key=True, default=generate_uuid)
-    flow_id = Column(UUID(as_uuid=False), ForeignKey("network_flows.id"), nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    flow_id = Column(UUID(as_uuid=False), nullable=False)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
     
     # Classification de la menace
-    severity = Column(String(20), nullable=False, index=True)  # critical, high, medium, low
+    severity = Column(String(20), nullable=False)  # critical, high, medium, low
     attack_type = Column(String(100), nullable=True) # Type d'attaque identifié (si supervisé) ou "Anomaly"
     threat_score = Column(Float, nullable=False) # Score global de risque (0.0 à 1.0)
     
     # Décision du moteur hybride
     decision = Column(String(50), nullable=False)  # confirmed_attack, suspicious, unknown_anomaly
+
+    # Attributs du flux dénormalisés à la création (agrégats sans jointure sur network_flows)
+    src_ip = Column(String(45), nullable=True)
+    dst_ip = Column(String(45), nullable=True)
+    dst_port = Column(PortSmallInteger, nullable=True)
+    protocol = Column(SmallInteger, nullable=True)
+    src_country_code = Column(String(5), nullable=True) # Code ISO (cache GeoIP), None si inconnu ou IP privée
     
     # Gestion du cycle de vie de l'alerte
-    status = Column(String(20), default="open", index=True)  # open, acknowledged, resolved, false_positive
+    status = Column(String(20), default="open")  # open, acknowledged, resolved, false_positive
     
     # Métadonnées contextuelles (ex: règle déclenchée, composants du score...)
     # Note: la colonne SQL s'appelle "metadata", on utilise un nom Python explicite pour éviter
@@ -135,11 +228,32 @@ class Alert(Base):
     alert_metadata = Column("metadata", JSONB, nullable=True)
 
     # Relations
-    flow = relationship("NetworkFlow", back_populates="alerts")
-    feedback = relationship("FeedbackLabel", back_populates="alert", cascade="all, delete-orphan")
+    flow = relationship(
+        "NetworkFlow", back_populates="alerts",
+        primaryjoin="foreign(Alert.flow_id) == NetworkFlow.id",
+    )
+    feedback = relationship(
+        "FeedbackLabel", back_populates="alert", cascade="all, delete-orphan",
+        primaryjoin="Alert.id == foreign(FeedbackLabel.alert_id)",
+    )
 
     __table_args__ = (
-        Index("idx_alerts_severity_time", severity, timestamp.desc()),
+        # Pagination keyset (timestamp, id), avec ou sans filtre sévérité / statut
+        Index("idx_alerts_timestamp_id", timestamp.desc(), id.desc()),
+        Index("idx_alerts_severity_time", severity, timestamp.desc(), id.desc()),
+        Index("idx_alerts_status_time", status, timestamp.desc(), id.desc()),
+        Index("idx_alerts_flow", flow_id),
+        # Attaques (reporting, séries) : index partiel couvrant, lu sans accès à la table
+        Index(
+            "idx_alerts_attacks_time", timestamp,
+            postgresql_include=["attack_type", "threat_score", "src_ip", "src_country_code"],
+            postgresql_where=decision.in_(["confirmed_attack", "suspicious"]),
+        ),
+        Index("idx_alerts_src_ip", src_ip, timestamp.desc()),
+        Index("idx_alerts_dst_ip", dst_ip),
+        Index("idx_alerts_dst_port", dst_port, protocol),
+        Index("idx_alerts_country", src_country_code),
+        _DAILY_PARTITIONING,
     )
 
 
@@ -203,15 +317,69 @@ class FeedbackLabel(Base):
     __tablename__ = "feedback_labels"
 
     id = Column(UUID(as_uuid=False), primary_key=True, default=generate_uuid)
-    alert_id = Column(UUID(as_uuid=False), ForeignKey("alerts.id"), nullable=False)
+    alert_id = Column(UUID(as_uuid=False), nullable=False)
     analyst_label = Column(String(100), nullable=False)
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     used_for_training = Column(Boolean, default=False)
 
     # Relations
-    alert = relationship("Alert", back_populates="feedback")
+    alert = relationship(
+        "Alert", back_populates="feedback",
+        primaryjoin="foreign(FeedbackLabel.alert_id) == Alert.id",
+    )
 
     __table_args__ = (
-        Index("idx_feedback_unused", used_for_training),
+        Index("idx_feedback_unused", used_for_training, postgresql_where=~used_for_training),
+        Index("idx_feedback_alert", alert_id),
     )
+
+
+class TrafficRollupMinute(Base):
+    """
+    Agrégats du trafic par minute, maintenus par rollup_service.
+    Une ligne par (minute, dimension, clé) ; dimensions : flows, protocol,
+    attack, anomaly, decision, severity, source.
+    """
+    __tablename__ = "traffic_rollup_minute"
+
+    bucket = Column(DateTime, primary_key=True) # Début de la minute (UTC)
+    dimension = Column(String(20), primary_key=True)
+    key = Column(String(100), primary_key=True, default="")
+    count = Column(BigInteger, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0) # Octets, score de menace, confiance... selon la dimension
+    label = Column(String(100), nullable=True) # Type d'attaque de la source, MAX(attack_type) comme avant les agrégats (dimension source)
+
+
+class TrafficRollupHour(Base):
+    """Agrégats horaires, consolidés à partir des agrégats par minute (même structure)."""
+    __tablename__ = "traffic_rollup_hour"
+
+    bucket = Column(DateTime, primary_key=True) # Début de l'heure (UTC)
+    dimension = Column(String(20), primary_key=True)
+    key = Column(String(100), primary_key=True, default="")
+    count = Column(BigInteger, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+    label = Column(String(100), nullable=True)
+
+
+class RollupWatermark(Base):
+    """Borne haute (exclue) jusqu'à laquelle chaque granularité d'agrégats est à jour."""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(20), primary_key=True) # minute, hour
+    watermark = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TableCounter(Base):
+    """
+    Nombre de lignes d'une table, maintenu dans la transaction d'écriture
+    (insertions, suppressions, partitions supprimées) et recalé périodiquement.
+    """
+    __tablename__ = "table_counters"
+
+    name = Column(String(50), primary_key=True) # Nom de la table comptée
+    row_count = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    reconciled_at = Column(DateTime, nullable=True) # Dernier recalage exact (None : jamais recalé)
@@ -1,19 +1,22 @@
 """
-Client Redis pour le cache temps réel et le pub/sub.
-Utilisé pour le cache GeoIP, les alertes temps réel et les métriques.
+Client Redis pour le cache temps réel et le stream d'alertes.
+Utilisé pour le cache GeoIP, les alertes temps réel (Redis Stream borné) et les métriques.
 """
 
-import json
-from typing import Optional, Any
+import time
+from typing import Optional, Any, Dict, List, Tuple
 
 import redis.asyncio as aioredis
 
 from backend.core.config import get_settings
+from backend.core.serialization import json_dumps, json_loads, pack_message
 
 settings = get_settings()
 
 # ---- Client Redis Global ----
 redis_client: Optional[aioredis.Redis] = None
+# Client binaire (sans décodage UTF-8) pour le stream d'alertes (MessagePack possible)
+binary_client: Optional[aioredis.Redis] = None
 
 
 async def get_redis() -> aioredis.Redis:
@@ -33,12 +36,27 @@ async def get_redis() -> aioredis.Redis:
     return redis_client
 
 
+async def get_binary_redis() -> aioredis.Redis:
+    """Client Redis renvoyant des octets bruts (stream des alertes, éventuellement en MessagePack)."""
+    global binary_client
+    if binary_client is None:
+        binary_client = aioredis.from_url(
+            settings.redis_url,
+            decode_responses=False,
+            max_connections=10,  # Lecture bloquante XREAD + rattrapages des clients
+        )
+    return binary_client
+
+
 async def close_redis():
     """Ferme proprement la connexion Redis (à appeler lors de l'arrêt de l'application)."""
-    global redis_client
+    global redis_client, binary_client
     if redis_client:
         await redis_client.close()
         redis_client = None
+    if binary_client:
+        await binary_client.close()
+        binary_client = None
 
 
 # ---- Helpers Cache (TTL Storage) ----
@@ -46,7 +64,7 @@ async def close_redis():
 async def cache_set(key: str, value: Any, ttl: int = 3600) -> None:
     """
     Stocke une valeur temporaire dans Redis avec une durée de vie (TTL).
-    Gère automatiquement la sérialisation JSON pour les dict/list.
+    Gère automatiquement la sérialisation JSON (orjson) pour les dict/list.
     
     Args:
         key: Clé d'accès.
@@ -55,7 +73,7 @@ async def cache_set(key: str, value: Any, ttl: int = 3600) -> None:
     """
     r = await get_redis()
     if isinstance(value, (dict, list)):
-        value = json.dumps(value)
+        value = json_dumps(value)
     await r.set(key, value, ex=ttl)
 
 
@@ -68,8 +86,8 @@ async def cache_get(key: str) -> Optional[Any]:
     value = await r.get(key)
     if value:
         try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
+            return json_loads(value)
+        except (ValueError, TypeError):
             return value
     return None
 
@@ -80,29 +98,90 @@ async def cache_delete(key: str) -> None:
     await r.delete(key)
 
 
-# ---- Pub/Sub pour alertes temps réel ----
+# ---- Flux (Stream) des alertes temps réel ----
+
+ALERT_STREAM = "nds:alerts:stream"
+
+# Entrée du stream : (identifiant "ms-seq", message décodable par unpack_message)
+StreamEntry = Tuple[str, bytes]
+
+
+def _entries(raw) -> List[StreamEntry]:
+    return [
+        (entry_id.decode() if isinstance(entry_id, bytes) else entry_id, fields[b"d"])
+        for entry_id, fields in raw
+    ]
 
-ALERT_CHANNEL = "nds:alerts:realtime"
 
+def stream_id_key(entry_id: str) -> Tuple[int, int]:
+    """Clé de tri d'un identifiant de stream ("1700000000000-3" → (1700000000000, 3))."""
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
 
-async def publish_alert(alert_data: dict) -> None:
+
+async def publish_alert(alert_data: dict) -> str:
     """
-    Publie une nouvelle alerte sur le canal Redis.
-    Le serveur WebSocket (abonné à ce canal) la diffusera ensuite aux clients connectés (Dashboard).
+    Ajoute une alerte au stream Redis borné (XADD MAXLEN ~ ALERT_STREAM_MAXLEN).
+    Le lecteur WebSocket la diffusera ensuite aux clients connectés (Dashboard) ;
+    un client qui se reconnecte rejoue les entrées postérieures à son dernier identifiant.
+    Encodage selon REALTIME_ENCODING (JSON orjson par défaut, ou MessagePack).
+
+    Returns:
+        str: Identifiant de l'entrée dans le stream.
     """
-    r = await get_redis()
-    await r.publish(ALERT_CHANNEL, json.dumps(alert_data))
+    r = await get_binary_redis()
+    entry_id = await r.xadd(
+        ALERT_STREAM,
+        {"d": pack_message(alert_data, settings.realtime_encoding)},
+        maxlen=settings.alert_stream_maxlen,
+        approximate=True,
+    )
+    return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
 
 
-async def get_alert_subscriber():
+async def publish_realtime(alerts: List[dict], threat_score: Optional[float] = None) -> None:
     """
-    Crée un abonné (Subscriber) pour écouter les alertes en temps réel.
-    Retourne l'objet pubsub qui permet d'itérer sur les messages.
+    Écritures temps réel d'un lot en un seul aller-retour (pipeline sans
+    transaction) : un XADD par alerte et, si fourni, le score de menace.
     """
-    r = await get_redis()
-    pubsub = r.pubsub()
-    await pubsub.subscribe(ALERT_CHANNEL)
-    return pubsub
+    if not alerts and threat_score is None:
+        return
+    r = await get_binary_redis()
+    async with r.pipeline(transaction=False) as pipe:
+        for alert_data in alerts:
+            pipe.xadd(
+                ALERT_STREAM,
+                {"d": pack_message(alert_data, settings.realtime_encoding)},
+                maxlen=settings.alert_stream_maxlen,
+                approximate=True,
+            )
+        if threat_score is not None:
+            pipe.mset(_threat_score_fields(threat_score))
+        await pipe.execute()
+
+
+async def read_alert_stream(last_id: str, count: int, block_ms: int) -> List[StreamEntry]:
+    """
+    Lecture bloquante (XREAD BLOCK) des entrées postérieures à last_id ("$" : nouvelles
+    entrées seulement), par lots de `count` au plus. Liste vide si rien avant block_ms.
+    """
+    r = await get_binary_redis()
+    response = await r.xread({ALERT_STREAM: last_id}, count=count, block=block_ms)
+    return _entries(response[0][1]) if response else []
+
+
+async def read_alert_range(after_id: str, count: int) -> List[StreamEntry]:
+    """Entrées strictement postérieures à after_id (XRANGE exclusif), pour le rattrapage."""
+    r = await get_binary_redis()
+    return _entries(await r.xrange(ALERT_STREAM, min=f"({after_id}", max="+", count=count))
+
+
+async def get_alert_stream_bounds() -> Tuple[Optional[str], Optional[str]]:
+    """(plus ancien, plus récent) identifiants encore présents dans le stream."""
+    r = await get_binary_redis()
+    oldest = _entries(await r.xrange(ALERT_STREAM, count=1))
+    newest = _entries(await r.xrevrange(ALERT_STREAM, count=1))
+    return (oldest[0][0] if oldest else None, newest[0][0] if newest else None)
 
 
 # ---- Métriques temps réel (Counters & Gauges) ----
@@ -123,14 +202,60 @@ async def get_metric(metric_name: str) -> int:
     return int(value) if value else 0
 
 
+async def flush_metrics(deltas: Dict[str, int], gauges: Dict[str, float], gauge_ttl: int) -> None:
+    """
+    Pousse les deltas de compteurs d'un processus (INCRBY, agrégés entre workers)
+    et ses gauges (SET avec TTL) en un seul pipeline.
+    """
+    r = await get_redis()
+    async with r.pipeline(transaction=False) as pipe:
+        for name, amount in deltas.items():
+            pipe.incrby(f"nds:metrics:{name}", amount)
+        for name, value in gauges.items():
+            pipe.set(f"nds:gauges:{name}", str(value), ex=gauge_ttl)
+        await pipe.execute()
+
+
+async def get_metrics(metric_names: List[str]) -> Dict[str, int]:
+    """Lit plusieurs compteurs en un aller-retour (MGET)."""
+    r = await get_redis()
+    values = await r.mget([f"nds:metrics:{name}" for name in metric_names])
+    return {name: int(value) if value else 0 for name, value in zip(metric_names, values)}
+
+
+async def get_gauges(gauge_names: List[str]) -> Dict[str, Optional[float]]:
+    """Lit plusieurs gauges (None si expirée : aucun processus ne la publie plus)."""
+    r = await get_redis()
+    values = await r.mget([f"nds:gauges:{name}" for name in gauge_names])
+    return {name: float(value) if value else None for name, value in zip(gauge_names, values)}
+
+
+THREAT_SCORE_KEY = "nds:threat_score"
+THREAT_SCORE_AT_KEY = "nds:threat_score:at"
+
+
+def _threat_score_fields(score: float) -> dict:
+    return {THREAT_SCORE_KEY: str(score), THREAT_SCORE_AT_KEY: str(time.time())}
+
+
 async def set_threat_score(score: float) -> None:
-    """Met à jour l'indicateur global de niveau de menace (Threat Level)."""
+    """Met à jour l'indicateur global de niveau de menace (Threat Level) et son horodatage."""
     r = await get_redis()
-    await r.set("nds:threat_score", str(score))
+    await r.mset(_threat_score_fields(score))
 
 
 async def get_threat_score() -> float:
-    """Récupère l'indicateur global de niveau de menace."""
+    """
+    Récupère l'indicateur global de niveau de menace, décru depuis sa dernière
+    écriture (demi-vie THREAT_SCORE_HALF_LIFE_SECONDS) : un score élevé retombe
+    même si plus aucun flux n'est analysé.
+    """
     r = await get_redis()
-    value = await r.get("nds:threat_score")
-    return float(value) if value else 0.0
+    value, written_at = await r.mget(THREAT_SCORE_KEY, THREAT_SCORE_AT_KEY)
+    if not value:
+        return 0.0
+    score = float(value)
+    if written_at and settings.threat_score_half_life_seconds > 0:
+        elapsed = max(0.0, time.time() - float(written_at))
+        score *= 0.5 ** (elapsed / settings.threat_score_half_life_seconds)
+    return round(score, 6)
@@ -3,53 +3,151 @@ Couche d'accès aux données (Repository pattern).
 Requêtes optimisées avec pagination et filtres.
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
-from uuid import uuid4
+import base64
+import binascii
+import json
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+from uuid import UUID, uuid4
 
-from sqlalchemy import select, func, desc, update, delete, exists
+import numpy as np
+
+from sqlalchemy import select, func, desc, update, delete, exists, insert, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database.models import (
     NetworkFlow, Prediction, AnomalyScore,
-    Alert, IPGeolocation, ModelVersion, FeedbackLabel
+    Alert, IPGeolocation, ModelVersion, FeedbackLabel,
+    PARTITIONED_TABLES,
+)
+from backend.database.feature_codec import (
+    FEATURE_SCHEMA_VERSION, decode_feature_matrix, decode_probability_matrix, port_to_smallint,
 )
 
 
+# ---- Pagination par curseur (keyset) ----
+
+Cursor = Tuple[datetime, str]
+
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    """Curseur opaque (base64url) désignant la dernière ligne d'une page : (timestamp, id)."""
+    raw = json.dumps([timestamp.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Inverse de encode_cursor.
+
+    Raises:
+        ValueError: Curseur mal formé.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), str(UUID(row_id))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Curseur invalide : {cursor!r}") from e
+
+
+def next_cursor(rows: Sequence[Any], limit: int) -> Optional[str]:
+    """Curseur de la page suivante, ou None si la page est la dernière."""
+    if len(rows) < limit or not rows:
+        return None
+    return encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+
 # ---- Network Flows ----
 
-async def create_flow(db: AsyncSession, flow_data: dict) -> NetworkFlow:
-    """Crée un nouvel enregistrement de flux réseau."""
+def new_id() -> str:
+    """ID généré côté client : les clés étrangères d'un lot sont connues avant l'insertion."""
+    return str(uuid4())
+
+
+async def create_flow(db: AsyncSession, flow_data: dict, deltas: Optional[Dict[str, int]] = None) -> NetworkFlow:
+    """
+    Crée un nouvel enregistrement de flux réseau.
+    Avec `deltas`, la ligne est comptée dans ce dictionnaire au lieu d'un
+    upsert table_counters immédiat : l'appelant applique bump_row_counters une
+    fois par transaction (un seul aller-retour, comme bulk_create_results).
+    """
     flow = NetworkFlow(id=str(uuid4()), **flow_data)
     db.add(flow)
     await db.flush()
+    if deltas is None:
+        await bump_row_counters(db, {"network_flows": 1})
+    else:
+        deltas["network_flows"] = deltas.get("network_flows", 0) + 1
     return flow
 
 
-async def get_recent_flows(db: AsyncSession, limit: int = 100, offset: int = 0) -> List[NetworkFlow]:
-    """Récupère les derniers flux capturés pour affichage dans le dashboard."""
-    result = await db.execute(
-        select(NetworkFlow)
-        .order_by(desc(NetworkFlow.timestamp))
+async def get_recent_flows(
+    db: AsyncSession,
+    limit: int = 100,
+    offset: int = 0,
+    cursor: Optional[Cursor] = None,
+) -> List[NetworkFlow]:
+    """
+    Récupère les derniers flux capturés pour affichage dans le dashboard.
+    Avec `cursor`, lit la page qui suit (timestamp, id) sur l'index
+    idx_flows_timestamp_id au lieu de parcourir les `offset` premières lignes.
+    """
+    query = select(NetworkFlow)
+    if cursor is not None:
+        query = query.where(tuple_(NetworkFlow.timestamp, NetworkFlow.id) < tuple_(*cursor))
+    query = query.order_by(desc(NetworkFlow.timestamp), desc(NetworkFlow.id)).limit(limit)
+    if cursor is None and offset:
+        query = query.offset(offset)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def get_flow_features(
+    db: AsyncSession,
+    since: datetime,
+    until: Optional[datetime] = None,
+    limit: int = 10000,
+    schema_version: int = FEATURE_SCHEMA_VERSION,
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Relit les features brutes des flux d'une période (re-scoring, ré-entraînement)
+    directement en matrice NumPy float32 (n_flux, n_features).
+
+    Returns:
+        (IDs des flux, matrice de features) dans l'ordre chronologique.
+    """
+    query = (
+        select(NetworkFlow.id, NetworkFlow.features)
+        .where(NetworkFlow.timestamp >= since)
+        .where(NetworkFlow.feature_schema_version == schema_version)
+        .where(NetworkFlow.features.isnot(None))
+        .order_by(NetworkFlow.timestamp)
         .limit(limit)
-        .offset(offset)
     )
-    return list(result.scalars().all())
+    if until is not None:
+        query = query.where(NetworkFlow.timestamp < until)
+    rows = (await db.execute(query)).all()
+    return [row[0] for row in rows], decode_feature_matrix((row[1] for row in rows), schema_version)
 
 
-async def count_flows(db: AsyncSession) -> int:
-    """Compte le nombre total de flux enregistrés (pour pagination)."""
-    result = await db.execute(select(func.count(NetworkFlow.id)))
-    return result.scalar()
+async def count_flows(db: AsyncSession, mode: str = "counter") -> int:
+    """Nombre total de flux enregistrés, sans COUNT(*) (voir get_table_totals)."""
+    totals = await get_table_totals(db, ("network_flows",), mode=mode)
+    return totals["network_flows"]["count"]
 
 
 # ---- Predictions (Supervised) ----
 
-async def create_prediction(db: AsyncSession, prediction_data: dict) -> Prediction:
-    """Enregistre le résultat d'une classification supervisée."""
+async def create_prediction(db: AsyncSession, prediction_data: dict, deltas: Optional[Dict[str, int]] = None) -> Prediction:
+    """Enregistre le résultat d'une classification supervisée. Avec `deltas`, voir create_flow."""
     prediction = Prediction(id=str(uuid4()), **prediction_data)
     db.add(prediction)
     await db.flush()
+    if deltas is None:
+        await bump_row_counters(db, {"predictions": 1})
+    else:
+        deltas["predictions"] = deltas.get("predictions", 0) + 1
     return prediction
 
 
@@ -63,24 +161,49 @@ async def get_attack_distribution(db: AsyncSession, hours: int = 24) -> List[Dic
     """
     Calcule la distribution des types d'attaques sur une période donnée.
     Utilisé pour les graphiques "camembert" (Pie Chart) du dashboard.
+    Lu depuis les agrégats (dimension "attack").
     """
     since = datetime.utcnow() - timedelta(hours=hours)
-    result = await db.execute(
-        select(Prediction.predicted_label, func.count(Prediction.id).label("count"))
-        .where(Prediction.timestamp >= since)
-        .group_by(Prediction.predicted_label)
-        .order_by(desc("count"))
-    )
-    return [{"label": row[0], "count": row[1]} for row in result.all()]
+    rows = await get_rollup(db, "attack", since)
+    rows.sort(key=lambda row: row["count"], reverse=True)
+    return [{"label": row["key"], "count": row["count"]} for row in rows]
+
+
+async def get_prediction_probabilities(
+    db: AsyncSession,
+    since: datetime,
+    num_classes: int,
+    limit: int = 10000,
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Relit les probabilités top-k des prédictions d'une période en matrice dense
+    float32 (n, num_classes) ; les classes hors top-k valent 0.
+
+    Returns:
+        (flow_id de chaque prédiction, matrice de probabilités).
+    """
+    rows = (
+        await db.execute(
+            select(Prediction.flow_id, Prediction.top_k_indices, Prediction.top_k_probabilities)
+            .where(Prediction.timestamp >= since)
+            .order_by(Prediction.timestamp)
+            .limit(limit)
+        )
+    ).all()
+    return [row[0] for row in rows], decode_probability_matrix(((row[1], row[2]) for row in rows), num_classes)
 
 
 # ---- Anomalies (Unsupervised) ----
 
-async def create_anomaly(db: AsyncSession, anomaly_data: dict) -> AnomalyScore:
-    """Enregistre un score d'anomalie calculé par l'autoencoder."""
+async def create_anomaly(db: AsyncSession, anomaly_data: dict, deltas: Optional[Dict[str, int]] = None) -> AnomalyScore:
+    """Enregistre un score d'anomalie calculé par l'autoencoder. Avec `deltas`, voir create_flow."""
     anomaly = AnomalyScore(id=str(uuid4()), **anomaly_data)
     db.add(anomaly)
     await db.flush()
+    if deltas is None:
+        await bump_row_counters(db, {"anomaly_scores": 1})
+    else:
+        deltas["anomaly_scores"] = deltas.get("anomaly_scores", 0) + 1
     return anomaly
 
 
@@ -98,28 +221,27 @@ async def get_anomalies(db: AsyncSession, limit: int = 50) -> List[AnomalyScore]
 async def get_anomaly_rate(db: AsyncSession, hours: int = 24) -> float:
     """
     Calcule le pourcentage de trafic anormal sur une fenêtre de temps.
-    Ratio = (Flux anormaux / Total flux)
+    Ratio = (Flux anormaux / Total flux), lu depuis les agrégats.
     """
     since = datetime.utcnow() - timedelta(hours=hours)
-    total = await db.execute(select(func.count(AnomalyScore.id)).where(AnomalyScore.timestamp >= since))
-    anomalies = await db.execute(
-        select(func.count(AnomalyScore.id))
-        .where(AnomalyScore.timestamp >= since)
-        .where(AnomalyScore.is_anomaly == True)  # noqa: E712
-    )
-    total_count = total.scalar()
+    counts = {row["key"]: row["count"] for row in await get_rollup(db, "anomaly", since)}
+    total_count = sum(counts.values())
     if total_count == 0:
         return 0.0
-    return anomalies.scalar() / total_count
+    return counts.get("anomalous", 0) / total_count
 
 
 # ---- Alerts (Hybrid Engine) ----
 
-async def create_alert(db: AsyncSession, alert_data: dict) -> Alert:
-    """Crée une nouvelle alerte de sécurité."""
+async def create_alert(db: AsyncSession, alert_data: dict, deltas: Optional[Dict[str, int]] = None) -> Alert:
+    """Crée une nouvelle alerte de sécurité. Avec `deltas`, voir create_flow."""
     alert = Alert(id=str(uuid4()), **alert_data)
     db.add(alert)
     await db.flush()
+    if deltas is None:
+        await bump_row_counters(db, {"alerts": 1})
+    else:
+        deltas["alerts"] = deltas.get("alerts", 0) + 1
     return alert
 
 
@@ -129,17 +251,23 @@ async def get_alerts(
     status: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = None,
 ) -> List[Alert]:
     """
     Récupère la liste des alertes avec filtrage optionnel par sévérité et statut.
-    Supporte la pagination.
+    Pagination par curseur (timestamp, id) — stable et de coût constant quelle que
+    soit la profondeur — ou, à défaut, par `offset` (compatibilité).
     """
     query = select(Alert)
     if severity:
         query = query.where(Alert.severity == severity)
     if status:
         query = query.where(Alert.status == status)
-    query = query.order_by(desc(Alert.timestamp)).limit(limit).offset(offset)
+    if cursor is not None:
+        query = query.where(tuple_(Alert.timestamp, Alert.id) < tuple_(*cursor))
+    query = query.order_by(desc(Alert.timestamp), desc(Alert.id)).limit(limit)
+    if cursor is None and offset:
+        query = query.offset(offset)
     result = await db.execute(query)
     return list(result.scalars().all())
 
@@ -157,15 +285,10 @@ async def get_alert_stats(db: AsyncSession, hours: int = 24) -> Dict[str, Any]:
     Statistiques globales sur les alertes (Total + ventilation par sévérité).
     """
     since = datetime.utcnow() - timedelta(hours=hours)
-    total = await db.execute(select(func.count(Alert.id)).where(Alert.timestamp >= since))
-    by_severity = await db.execute(
-        select(Alert.severity, func.count(Alert.id))
-        .where(Alert.timestamp >= since)
-        .group_by(Alert.severity)
-    )
+    by_severity = {row["key"]: row["count"] for row in await get_rollup(db, "severity", since)}
     return {
-        "total": total.scalar(),
-        "by_severity": {row[0]: row[1] for row in by_severity.all()},
+        "total": sum(by_severity.values()),
+        "by_severity": by_severity,
     }
 
 
@@ -175,30 +298,264 @@ async def get_top_alert_ips(db: AsyncSession, limit: int = 10, hours: int = 24)
     Utile pour identifier les attaquants les plus agressifs (Top Talkers).
     """
     since = datetime.utcnow() - timedelta(hours=hours)
-    result = await db.execute(
-        select(
-            NetworkFlow.src_ip,
-            func.count(Alert.id).label("alert_count"),
-            func.avg(Alert.threat_score).label("avg_threat"),
-            func.coalesce(func.max(Alert.attack_type), "Unknown").label("attack_type"),
-        )
-        .join(NetworkFlow, Alert.flow_id == NetworkFlow.id)
-        .where(Alert.timestamp >= since)
-        .group_by(NetworkFlow.src_ip)
-        .order_by(desc("alert_count"))
-        .limit(limit)
-    )
+    rows = await get_rollup(db, "source", since, limit=limit)
     return [
         {
-            "ip": row[0],
-            "alert_count": row[1],
-            "avg_threat": round(float(row[2] or 0), 3),
-            "attack_type": row[3] or "Unknown",
+            "ip": row["key"],
+            "alert_count": row["count"],
+            "avg_threat": round(row["value_sum"] / row["count"], 3) if row["count"] else 0.0,
+            "attack_type": row["label"] or "Unknown",
         }
-        for row in result.all()
+        for row in rows
     ]
 
 
+# ---- Écriture en masse (pipeline de détection) ----
+
+# Colonnes écrites par lot, dans l'ordre des tuples COPY. Les noms sont ceux des
+# colonnes SQL (alerts.metadata et non alert_metadata).
+BULK_COLUMNS: Dict[str, Sequence[str]] = {
+    "network_flows": (
+        "id", "timestamp", "src_ip", "dst_ip", "src_port", "dst_port", "protocol",
+        "duration", "total_fwd_packets", "total_bwd_packets",
+        "flow_bytes_per_s", "flow_packets_per_s", "features", "feature_schema_version",
+    ),
+    "predictions": (
+        "id", "flow_id", "timestamp", "model_version",
+        "predicted_label", "confidence", "top_k_indices", "top_k_probabilities",
+    ),
+    "anomaly_scores": (
+        "id", "flow_id", "timestamp", "reconstruction_error",
+        "anomaly_score", "threshold_used", "is_anomaly",
+    ),
+    "alerts": (
+        "id", "flow_id", "timestamp", "severity", "attack_type",
+        "threat_score", "decision", "status", "metadata",
+        "src_ip", "dst_ip", "dst_port", "protocol", "src_country_code",
+    ),
+}
+
+# Colonnes JSONB : sérialisées côté client pour COPY (codec texte asyncpg)
+_JSONB_COLUMNS = {"metadata"}
+# Ports en smallint : COPY contourne le TypeDecorator de l'ORM, conversion explicite
+_PORT_COLUMNS = {"src_port", "dst_port"}
+
+_BULK_MODELS = {
+    "network_flows": NetworkFlow,
+    "predictions": Prediction,
+    "anomaly_scores": AnomalyScore,
+    "alerts": Alert,
+}
+
+
+def _row_value(row: dict, column: str) -> Any:
+    if column == "metadata":
+        value = row.get("alert_metadata", row.get("metadata"))
+    else:
+        value = row.get(column)
+    if column in _JSONB_COLUMNS and value is not None:
+        return json.dumps(value)
+    if column in _PORT_COLUMNS:
+        return port_to_smallint(value)
+    return value
+
+
+async def _copy_rows(db: AsyncSession, table: str, rows: List[dict]) -> None:
+    """
+    COPY binaire via la connexion asyncpg sous-jacente. La transaction de la
+    session doit déjà être ouverte côté serveur (voir bulk_create_results).
+    """
+    columns = BULK_COLUMNS[table]
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        table,
+        records=[tuple(_row_value(row, c) for c in columns) for row in rows],
+        columns=list(columns),
+    )
+
+
+async def _executemany_rows(db: AsyncSession, table: str, rows: List[dict]) -> None:
+    """INSERT multi-lignes (executemany) via SQLAlchemy Core, sans objets ORM."""
+    model = _BULK_MODELS[table]
+    params = []
+    for row in rows:
+        row = dict(row)
+        if "alert_metadata" in row:
+            row["metadata"] = row.pop("alert_metadata")
+        params.append({c: row.get(c) for c in BULK_COLUMNS[table]})
+    await db.execute(insert(model.__table__), params)
+
+
+async def bulk_create_results(
+    db: AsyncSession,
+    flows: List[dict],
+    predictions: List[dict] = (),
+    anomalies: List[dict] = (),
+    alerts: List[dict] = (),
+    use_copy: bool = True,
+) -> Dict[str, int]:
+    """
+    Écrit un lot de résultats de détection dans les quatre tables, sans flush
+    ni relecture : chaque ligne porte déjà son `id` (voir `new_id`) et les
+    lignes filles référencent le `flow_id` généré côté client.
+
+    Args:
+        flows / predictions / anomalies / alerts: Lignes à insérer (dicts de colonnes).
+        use_copy: COPY binaire asyncpg (défaut) ; sinon INSERT executemany.
+
+    Returns:
+        Nombre de lignes écrites par table. Le commit reste à la charge de l'appelant
+        (une transaction par lot).
+    """
+    writer = _copy_rows if use_copy else _executemany_rows
+    if use_copy:
+        # L'adaptateur asyncpg n'envoie BEGIN qu'au premier execute SQLAlchemy :
+        # sans lui, chaque COPY (connexion brute) serait validé isolément.
+        await db.execute(text("SELECT 1"))
+    written = {}
+    # Ordre imposé par les clés étrangères
+    for table, rows in (
+        ("network_flows", flows),
+        ("predictions", predictions),
+        ("anomaly_scores", anomalies),
+        ("alerts", alerts),
+    ):
+        if rows:
+            await writer(db, table, list(rows))
+        written[table] = len(rows)
+    # En dernier : le verrou sur les lignes de compteurs est tenu le moins longtemps possible
+    await bump_row_counters(db, written)
+    return written
+
+
+async def get_existing_ids(db: AsyncSession, table: str, ids: Sequence[str]) -> set:
+    """IDs déjà présents dans une des tables de résultats (reprise d'une écriture partielle)."""
+    if not ids:
+        return set()
+    model = _BULK_MODELS[table]
+    result = await db.execute(select(model.id).where(model.id.in_(list(ids))))
+    return {str(row_id) for row_id in result.scalars().all()}
+
+
+# ---- Compteurs de lignes ----
+
+COUNTED_TABLES = ("network_flows", "predictions", "anomaly_scores", "alerts")
+
+
+async def bump_row_counters(db: AsyncSession, deltas: Dict[str, int]) -> None:
+    """
+    Applique des variations aux compteurs de lignes, dans la transaction de
+    l'écriture (le total reste cohérent avec les lignes validées).
+    Lignes verrouillées dans l'ordre des noms pour éviter les interblocages.
+    """
+    now = datetime.utcnow()
+    params = [
+        {"name": table, "delta": int(delta), "now": now}
+        for table, delta in sorted(deltas.items())
+        if delta
+    ]
+    if not params:
+        return
+    await db.execute(
+        text(
+            "INSERT INTO table_counters (name, row_count, updated_at) VALUES (:name, :delta, :now) "
+            "ON CONFLICT (name) DO UPDATE SET row_count = table_counters.row_count + EXCLUDED.row_count, "
+            "updated_at = EXCLUDED.updated_at"
+        ),
+        params,
+    )
+
+
+async def get_row_counters(db: AsyncSession) -> Dict[str, Dict[str, Any]]:
+    """Compteurs maintenus à l'écriture : {table: {row_count, reconciled_at}}."""
+    result = await db.execute(text("SELECT name, row_count, reconciled_at FROM table_counters"))
+    return {row[0]: {"row_count": int(row[1]), "reconciled_at": row[2]} for row in result.all()}
+
+
+async def estimate_row_count(db: AsyncSession, table: str) -> int:
+    """
+    Estimation instantanée du nombre de lignes depuis pg_class.reltuples
+    (somme des partitions pour une table partitionnée ; mise à jour par ANALYZE / autovacuum).
+    """
+    if table not in COUNTED_TABLES:
+        raise ValueError(f"Table non comptée : {table}")
+    result = await db.execute(
+        text(
+            "SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint FROM pg_class c "
+            "WHERE (c.oid = CAST(:table AS regclass) AND c.relkind = 'r') "
+            "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = CAST(:table AS regclass))"
+        ),
+        {"table": table},
+    )
+    return int(result.scalar() or 0)
+
+
+async def get_table_totals(
+    db: AsyncSession,
+    tables: Sequence[str] = COUNTED_TABLES,
+    mode: str = "counter",
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Totaux de lignes en temps constant.
+
+    Args:
+        mode: "counter" (compteurs maintenus à l'écriture, exacts une fois recalés)
+              ou "estimate" (pg_class.reltuples, approximatif).
+
+    Returns:
+        {table: {"count", "exact", "source"}} — une table sans compteur retombe
+        sur l'estimation.
+    """
+    counters = await get_row_counters(db) if mode == "counter" else {}
+    totals = {}
+    for table in tables:
+        counter = counters.get(table)
+        if counter is not None:
+            totals[table] = {
+                "count": max(counter["row_count"], 0),
+                "exact": counter["reconciled_at"] is not None,
+                "source": "counter",
+            }
+        else:
+            totals[table] = {
+                "count": await estimate_row_count(db, table),
+                "exact": False,
+                "source": "estimate",
+            }
+    return totals
+
+
+async def measure_counter_drift(db: AsyncSession, table: str) -> Tuple[int, int]:
+    """
+    Compte exact et écart avec le compteur, lus dans le même instantané.
+    La session doit être en REPEATABLE READ pour que les deux lectures soient cohérentes.
+
+    Returns:
+        (nombre de lignes, compte réel - compteur).
+    """
+    if table not in COUNTED_TABLES:
+        raise ValueError(f"Table non comptée : {table}")
+    counted = (
+        await db.execute(text("SELECT row_count FROM table_counters WHERE name = :name"), {"name": table})
+    ).scalar() or 0
+    actual = (await db.execute(text(f'SELECT COUNT(*) FROM "{table}"'))).scalar() or 0
+    return int(actual), int(actual) - int(counted)
+
+
+async def apply_counter_drift(db: AsyncSession, table: str, drift: int) -> None:
+    """Corrige un compteur de l'écart mesuré (relatif : les écritures concurrentes sont préservées)."""
+    now = datetime.utcnow()
+    await db.execute(
+        text(
+            "INSERT INTO table_counters (name, row_count, updated_at, reconciled_at) "
+            "VALUES (:name, :drift, :now, :now) "
+            "ON CONFLICT (name) DO UPDATE SET row_count = table_counters.row_count + EXCLUDED.row_count, "
+            "updated_at = EXCLUDED.updated_at, reconciled_at = EXCLUDED.reconciled_at"
+        ),
+        {"name": table, "drift": drift, "now": now},
+    )
+
 # ---- GeoIP Cache ----
 
 async def upsert_geolocation(db: AsyncSession, geo_data: dict) -> IPGeolocation:
@@ -219,6 +576,20 @@ async def upsert_geolocation(db: AsyncSession, geo_data: dict) -> IPGeolocation:
     return geo
 
 
+async def backfill_alert_country_codes(db: AsyncSession, codes: Dict[str, str]) -> None:
+    """
+    Renseigne a posteriori le code pays des alertes dont l'IP source n'était
+    pas encore géolocalisée à leur création (index idx_alerts_src_ip).
+    """
+    params = [{"ip": ip, "code": code[:5]} for ip, code in codes.items() if code]
+    if not params:
+        return
+    await db.execute(
+        text("UPDATE alerts SET src_country_code = :code WHERE src_ip = :ip AND src_country_code IS NULL"),
+        params,
+    )
+
+
 async def get_geolocation_by_ip(db: AsyncSession, ip_address: str) -> Optional[IPGeolocation]:
     """Cherche la géolocalisation d'une IP dans le cache local."""
     result = await db.execute(select(IPGeolocation).where(IPGeolocation.ip_address == ip_address))
@@ -251,6 +622,12 @@ async def get_active_model_version(db: AsyncSession, model_type: str) -> Optiona
     return result.scalar_one_or_none()
 
 
+async def get_model_version(db: AsyncSession, model_id: str) -> Optional[ModelVersion]:
+    """Récupère une version de modèle par son ID."""
+    result = await db.execute(select(ModelVersion).where(ModelVersion.id == model_id))
+    return result.scalar_one_or_none()
+
+
 async def set_active_model_version(db: AsyncSession, model_id: str, model_type: str) -> None:
     """
     Bascule la version active d'un modèle.
@@ -348,4 +725,330 @@ async def delete_old_flows_batch(
         return 0
 
     delete_result = await db.execute(delete(NetworkFlow).where(NetworkFlow.id.in_(flow_ids)))
-    return delete_result.rowcount or len(flow_ids)
+    deleted = delete_result.rowcount or len(flow_ids)
+    await bump_row_counters(db, {"network_flows": -deleted})
+    return deleted
+
+
+# ---- Partitions journalières ----
+
+def partition_name(table: str, day: date) -> str:
+    """Nom de la partition journalière d'une table (ex : alerts_p20240131)."""
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def _check_partitioned_table(table: str) -> None:
+    # Les noms sont interpolés dans du DDL : uniquement les tables connues
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"Table non partitionnée : {table}")
+
+
+async def is_partitioned(db: AsyncSession, table: str) -> bool:
+    """True si la table est partitionnée (schéma migré)."""
+    result = await db.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table)"
+        ),
+        {"table": table},
+    )
+    return bool(result.scalar())
+
+
+async def list_daily_partitions(db: AsyncSession, table: str) -> Dict[date, str]:
+    """Partitions journalières attachées à une table, indexées par jour (hors DEFAULT)."""
+    _check_partitioned_table(table)
+    result = await db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ),
+        {"table": table},
+    )
+    prefix = f"{table}_p"
+    partitions = {}
+    for (name,) in result.all():
+        suffix = name[len(prefix):] if name.startswith(prefix) else ""
+        if len(suffix) == 8 and suffix.isdigit():
+            partitions[datetime.strptime(suffix, "%Y%m%d").date()] = name
+    return partitions
+
+
+async def create_daily_partition(db: AsyncSession, table: str, day: date) -> str:
+    """Crée (si absente) la partition [day, day + 1) d'une table."""
+    _check_partitioned_table(table)
+    name = partition_name(table, day)
+    await db.execute(
+        text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+        )
+    )
+    return name
+
+
+async def ensure_default_partition(db: AsyncSession, table: str) -> None:
+    """Partition DEFAULT : filet de sécurité si la maintenance n'a pas anticipé un jour."""
+    _check_partitioned_table(table)
+    await db.execute(text(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'))
+
+
+async def archive_alerted_flows(db: AsyncSession, partition: str) -> int:
+    """
+    Copie dans network_flows_archive les flux d'une partition référencés par une alerte.
+    À appeler juste avant la suppression de la partition.
+    """
+    if not partition.startswith("network_flows_p"):
+        raise ValueError(f"Partition de flux attendue : {partition}")
+    result = await db.execute(
+        text(
+            "INSERT INTO network_flows_archive ("
+            "id, timestamp, src_ip, dst_ip, src_port, dst_port, protocol, duration, "
+            "total_fwd_packets, total_bwd_packets, flow_bytes_per_s, flow_packets_per_s, "
+            "features, feature_schema_version) "
+            "SELECT f.id, f.timestamp, f.src_ip, f.dst_ip, f.src_port, f.dst_port, f.protocol, f.duration, "
+            "f.total_fwd_packets, f.total_bwd_packets, f.flow_bytes_per_s, f.flow_packets_per_s, "
+            "f.features, f.feature_schema_version "
+            f'FROM "{partition}" f '
+            "WHERE EXISTS (SELECT 1 FROM alerts a WHERE a.flow_id = f.id) "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+    )
+    return result.rowcount or 0
+
+
+async def drop_partition(db: AsyncSession, table: str, partition: str) -> int:
+    """
+    Détache puis supprime une partition (opération sur les métadonnées, sans DELETE ligne à ligne).
+    Le compteur de la table est décrémenté de l'estimation pg_class.reltuples de la partition
+    (pas de COUNT(*) sur une partition d'une journée) ; le recalage de counter_service
+    corrige l'écart éventuel (0 si la partition n'a jamais été analysée).
+
+    Returns:
+        int: Nombre estimé de lignes supprimées avec la partition.
+    """
+    _check_partitioned_table(table)
+    if not partition.startswith(f"{table}_p"):
+        raise ValueError(f"Partition inattendue pour {table} : {partition}")
+    result = await db.execute(
+        text("SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = CAST(:partition AS regclass)"),
+        {"partition": f'"{partition}"'},
+    )
+    rows = int(result.scalar() or 0)
+    await db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{partition}"'))
+    await db.execute(text(f'DROP TABLE "{partition}"'))
+    await bump_row_counters(db, {table: -rows})
+    return rows
+
+
+# ---- Agrégats (rollups) ----
+
+ROLLUP_TABLES = {"minute": "traffic_rollup_minute", "hour": "traffic_rollup_hour"}
+
+# Agrégation par minute des lignes brutes de [start, end[ : une branche par dimension.
+# Les alertes sont rattachées à leur propre timestamp (pas de jointure sur network_flows).
+_ROLLUP_SOURCE_SQL = """
+SELECT date_trunc('minute', timestamp) AS bucket, 'flows' AS dimension, '' AS key, COUNT(*) AS count,
+       SUM(CASE WHEN duration > 0 THEN flow_bytes_per_s * duration ELSE flow_bytes_per_s END) AS value_sum,
+       NULL AS label
+FROM network_flows WHERE timestamp >= :start AND timestamp < :end GROUP BY 1
+UNION ALL
+SELECT date_trunc('minute', timestamp), 'protocol', protocol::text, COUNT(*), 0.0, NULL
+FROM network_flows WHERE timestamp >= :start AND timestamp < :end GROUP BY 1, 3
+UNION ALL
+SELECT date_trunc('minute', timestamp), 'attack', predicted_label, COUNT(*), SUM(confidence), NULL
+FROM predictions WHERE timestamp >= :start AND timestamp < :end GROUP BY 1, 3
+UNION ALL
+SELECT date_trunc('minute', timestamp), 'anomaly', CASE WHEN is_anomaly THEN 'anomalous' ELSE 'normal' END,
+       COUNT(*), SUM(anomaly_score), NULL
+FROM anomaly_scores WHERE timestamp >= :start AND timestamp < :end GROUP BY 1, 3
+UNION ALL
+SELECT date_trunc('minute', timestamp), 'decision', decision, COUNT(*), SUM(threat_score), NULL
+FROM alerts WHERE timestamp >= :start AND timestamp < :end GROUP BY 1, 3
+UNION ALL
+SELECT date_trunc('minute', timestamp), 'severity', severity, COUNT(*), SUM(threat_score), NULL
+FROM alerts WHERE timestamp >= :start AND timestamp < :end GROUP BY 1, 3
+UNION ALL
+SELECT date_trunc('minute', timestamp), 'source', COALESCE(src_ip, metadata->>'src_ip', 'unknown'),
+       COUNT(*), SUM(threat_score), MAX(attack_type)
+FROM alerts WHERE timestamp >= :start AND timestamp < :end GROUP BY 1, 3
+"""
+
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+async def get_rollup_watermarks(db: AsyncSession) -> Dict[str, datetime]:
+    """Bornes (exclues) jusqu'auxquelles les agrégats minute / heure sont complets."""
+    result = await db.execute(text("SELECT name, watermark FROM rollup_watermarks"))
+    return {row[0]: row[1] for row in result.all()}
+
+
+async def set_rollup_watermark(db: AsyncSession, name: str, watermark: datetime) -> None:
+    await db.execute(
+        text(
+            "INSERT INTO rollup_watermarks (name, watermark, updated_at) VALUES (:name, :watermark, :now) "
+            "ON CONFLICT (name) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = EXCLUDED.updated_at"
+        ),
+        {"name": name, "watermark": watermark, "now": datetime.utcnow()},
+    )
+
+
+async def refresh_rollup_minute(db: AsyncSession, start: datetime, end: datetime) -> None:
+    """Recalcule (remplace) les agrégats par minute de [start, end[ depuis les lignes brutes."""
+    params = {"start": start, "end": end}
+    await db.execute(text("DELETE FROM traffic_rollup_minute WHERE bucket >= :start AND bucket < :end"), params)
+    await db.execute(
+        text(
+            "INSERT INTO traffic_rollup_minute (bucket, dimension, key, count, value_sum, label) "
+            f"SELECT bucket, dimension, key, count, COALESCE(value_sum, 0), label FROM ({_ROLLUP_SOURCE_SQL}) src"
+        ),
+        params,
+    )
+
+
+async def refresh_rollup_hour(db: AsyncSession, start: datetime, end: datetime) -> None:
+    """Recalcule les agrégats horaires de [start, end[ (bornes alignées sur l'heure) depuis les minutes."""
+    params = {"start": start, "end": end}
+    await db.execute(text("DELETE FROM traffic_rollup_hour WHERE bucket >= :start AND bucket < :end"), params)
+    await db.execute(
+        text(
+            "INSERT INTO traffic_rollup_hour (bucket, dimension, key, count, value_sum, label) "
+            "SELECT date_trunc('hour', bucket), dimension, key, SUM(count), SUM(value_sum), MAX(label) "
+            "FROM traffic_rollup_minute WHERE bucket >= :start AND bucket < :end GROUP BY 1, 2, 3"
+        ),
+        params,
+    )
+
+
+async def prune_rollup_minute(db: AsyncSession, older_than: datetime) -> int:
+    """Supprime les agrégats par minute déjà consolidés en heures et hors fenêtre de conservation."""
+    result = await db.execute(text("DELETE FROM traffic_rollup_minute WHERE bucket < :older_than"), {"older_than": older_than})
+    return result.rowcount or 0
+
+
+_ROLLUP_COLUMNS = "bucket, dimension, key, count, value_sum, label"
+
+
+def _rollup_sum_sql(source: str, by_hour: bool, limit: Optional[int] = None) -> str:
+    bucket = "date_trunc('hour', bucket)" if by_hour else "NULL::timestamp"
+    group_by = "1, 2" if by_hour else "2"
+    top = " ORDER BY 3 DESC LIMIT :limit" if limit is not None else ""
+    return (
+        f"SELECT {bucket} AS bucket, key, SUM(count) AS count, SUM(value_sum) AS value_sum, MAX(label) AS label "
+        f"FROM ({source}) src WHERE dimension = :dimension GROUP BY {group_by}{top}"
+    )
+
+
+async def _rollup_source(db: AsyncSession, since: datetime) -> Tuple[str, Dict[str, Any]]:
+    """
+    Source unique (UNION ALL) d'une fenêtre agrégée depuis `since` : heures
+    complètes dans traffic_rollup_hour, minutes suivantes dans
+    traffic_rollup_minute, et lignes brutes uniquement après le watermark.
+
+    La fenêtre est alignée sur le début de l'heure de `since`. Sans watermark
+    (agrégation jamais exécutée), toute la fenêtre est lue sur les lignes brutes.
+
+    Returns:
+        (requête SQL, paramètres) — une seule requête, un seul aller-retour.
+    """
+    start = _floor_hour(since)
+    watermarks = await get_rollup_watermarks(db)
+    minute_wm = watermarks.get("minute")
+    hour_wm = watermarks.get("hour")
+
+    branches = []
+    params: Dict[str, Any] = {"start": start, "end": datetime.utcnow()}
+    if minute_wm is not None and hour_wm is not None and minute_wm > start:
+        hour_end = max(start, min(hour_wm, minute_wm))
+        if hour_end > start:
+            branches.append(
+                f"SELECT {_ROLLUP_COLUMNS} FROM {ROLLUP_TABLES['hour']} "
+                "WHERE bucket >= :start AND bucket < :hour_end"
+            )
+        branches.append(
+            f"SELECT {_ROLLUP_COLUMNS} FROM {ROLLUP_TABLES['minute']} "
+            "WHERE bucket >= :hour_end AND bucket < :minute_end"
+        )
+        params.update(hour_end=hour_end, minute_end=minute_wm)
+        # Lignes brutes : uniquement après le watermark des minutes
+        branches.append(_ROLLUP_SOURCE_SQL.replace("timestamp >= :start", "timestamp >= :minute_end"))
+    else:
+        branches.append(_ROLLUP_SOURCE_SQL)
+    return " UNION ALL ".join(f"({branch})" for branch in branches), params
+
+
+async def get_rollup(
+    db: AsyncSession,
+    dimension: str,
+    since: datetime,
+    by_hour: bool = False,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Lit une dimension agrégée depuis `since` (voir _rollup_source).
+    Avec `limit`, seules les `limit` clés les plus fréquentes sont renvoyées (tri et coupe en SQL).
+
+    Returns:
+        List[Dict]: {bucket (heure si by_hour, sinon None), key, count, value_sum, label}.
+    """
+    source, params = await _rollup_source(db, since)
+    params = {**params, "dimension": dimension}
+    if limit is not None:
+        params["limit"] = limit
+    result = await db.execute(text(_rollup_sum_sql(source, by_hour, limit)), params)
+    return [
+        {
+            "bucket": bucket,
+            "key": key,
+            "count": int(count or 0),
+            "value_sum": float(value_sum or 0.0),
+            "label": label,
+        }
+        for bucket, key, count, value_sum, label in result.all()
+    ]
+
+
+async def get_rollup_series(
+    db: AsyncSession,
+    since: datetime,
+    series: Dict[str, Tuple[str, Optional[Sequence[str]]]],
+) -> List[Dict[str, Any]]:
+    """
+    Plusieurs séries horaires en un seul passage : un agrégat conditionnel
+    `SUM(count) FILTER (WHERE ...)` par série au lieu d'une requête par dimension.
+
+    Args:
+        series: {nom: (dimension, clés retenues ou None pour toutes)}.
+
+    Returns:
+        List[Dict]: {bucket, <nom>: total, ...} par heure, triés chronologiquement.
+    """
+    source, params = await _rollup_source(db, since)
+    columns = []
+    dimensions = []
+    for i, (name, (dimension, keys)) in enumerate(series.items()):
+        condition = f"dimension = :dimension_{i}"
+        params[f"dimension_{i}"] = dimension
+        if keys is not None:
+            condition += f" AND key = ANY(:keys_{i})"
+            params[f"keys_{i}"] = list(keys)
+        columns.append(f'COALESCE(SUM(count) FILTER (WHERE {condition}), 0) AS "{name}"')
+        dimensions.append(dimension)
+    params["dimensions"] = sorted(set(dimensions))
+
+    result = await db.execute(
+        text(
+            f"SELECT date_trunc('hour', bucket) AS bucket, {', '.join(columns)} "
+            f"FROM ({source}) src WHERE dimension = ANY(:dimensions) GROUP BY 1 ORDER BY 1"
+        ),
+        params,
+    )
+    names = list(series)
+    return [
+        {"bucket": row[0], **{name: int(value) for name, value in zip(names, row[1:])}}
+        for row in result.all()
+    ]
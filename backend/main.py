@@ -5,21 +5,27 @@ Initialise l'application, monte les routes et les middleware.
 
 import logging
 import asyncio
+import time
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 load_dotenv()  # Charge .env dans os.environ (pour os.getenv dans llm_engine, etc.)
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from sqlalchemy import text
 
 from backend.core.config import get_settings
 from backend.core.security import limiter, get_cors_config
+from backend.core.serialization import HAS_ORJSON
 from backend.database.connection import init_db, close_db
 from backend.database.redis_client import get_redis, close_redis
-from backend.services import data_retention_service
+from backend.services import (
+    alert_coalescer, alert_service, counter_service, data_retention_service, detection_service,
+    metrics_service, model_version_service, persistence_service, response_cache, rollup_service,
+)
 
 # ---- Routes ----
 from backend.api.routes_detection import router as detection_router
@@ -29,6 +35,7 @@ from backend.api.routes_dashboard import router as dashboard_router
 from backend.api.routes_models import router as models_router
 from backend.api.routes_feedback import router as feedback_router
 from backend.api.routes_reporting import router as reporting_router
+from backend.api import websocket_dashboard, websocket_handler
 from backend.api.websocket_handler import websocket_endpoint
 
 settings = get_settings()
@@ -41,6 +48,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger("NDS")
 
+# Profil du démarrage (ms par étape), exposé sur /health
+_startup_timings: dict = {}
+
 
 # ---- Lifecycle ----
 # ---- Cycle de Vie (Startup/Shutdown) ----
@@ -53,13 +63,24 @@ async def lifespan(app: FastAPI):
     logger.info("=" * 60)
     logger.info("  Network Defense System - Démarrage")
     logger.info("=" * 60)
+    started = time.perf_counter()
+    step_started = started
+
+    def _mark(step: str) -> None:
+        nonlocal step_started
+        now = time.perf_counter()
+        _startup_timings[step] = round((now - step_started) * 1000, 1)
+        step_started = now
 
     # 1. Connexion Base de Données
     try:
         await init_db()
         logger.info("✓ PostgreSQL connecté")
+        # Partitions du jour et des jours à venir avant la première écriture
+        await data_retention_service.ensure_partitions()
     except Exception as e:
         logger.warning(f"✗ PostgreSQL indisponible : {e}")
+    _mark("database")
 
     # 2. Lien Redis
     try:
@@ -68,24 +89,87 @@ async def lifespan(app: FastAPI):
         logger.info("✓ Redis connecté")
     except Exception as e:
         logger.warning(f"✗ Redis indisponible : {e}")
+    _mark("redis")
+
+    # 3. Préchargement des modèles AI en arrière-plan (versions actives du registre).
+    # L'API accepte des requêtes pendant le chargement ; /health expose l'état.
+    if settings.model_preload_on_startup:
+        detection_service.start_preload(model_version_service.resolve_active)
+        logger.info("✓ Préchargement des modèles AI lancé en arrière-plan")
+    _mark("models_preload_scheduled")
 
     logger.info(f"✓ API prête sur http://{settings.app_host}:{settings.app_port}")
     logger.info(f"✓ Swagger UI : http://{settings.app_host}:{settings.app_port}/docs")
 
-    # 3. Démarrage des tâches de fond (Scheduler de rétention)
+    # 4. Démarrage des tâches de fond (Scheduler de rétention)
     try:
         if data_retention_service.start_scheduler():
             logger.info("✓ Scheduler de rétention démarré")
     except Exception as e:
         logger.warning(f"✗ Scheduler de rétention indisponible : {e}")
 
+    try:
+        if persistence_service.start_writer():
+            logger.info("✓ Writer de persistance différée démarré")
+    except Exception as e:
+        logger.warning(f"✗ Writer de persistance indisponible : {e}")
+
+    try:
+        if rollup_service.start_scheduler():
+            logger.info("✓ Scheduler d'agrégation démarré")
+    except Exception as e:
+        logger.warning(f"✗ Scheduler d'agrégation indisponible : {e}")
+
+    try:
+        if counter_service.start_scheduler():
+            logger.info("✓ Scheduler de recalage des compteurs démarré")
+    except Exception as e:
+        logger.warning(f"✗ Scheduler de recalage des compteurs indisponible : {e}")
+
+    try:
+        if metrics_service.start_flusher():
+            logger.info("✓ Publication des métriques démarrée")
+    except Exception as e:
+        logger.warning(f"✗ Publication des métriques indisponible : {e}")
+
+    try:
+        if alert_coalescer.start_flusher():
+            logger.info("✓ Regroupement des alertes temps réel démarré")
+    except Exception as e:
+        logger.warning(f"✗ Regroupement des alertes indisponible : {e}")
+
+    try:
+        if websocket_handler.start_subscriber():
+            logger.info("✓ Abonné Redis des alertes temps réel démarré")
+    except Exception as e:
+        logger.warning(f"✗ Abonné Redis des alertes indisponible : {e}")
+
+    try:
+        if websocket_dashboard.start_pusher():
+            logger.info("✓ Diffusion des KPI du dashboard démarrée (/ws/dashboard)")
+    except Exception as e:
+        logger.warning(f"✗ Diffusion des KPI du dashboard indisponible : {e}")
+    _mark("schedulers")
+
+    _startup_timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(
+        "  Profil de démarrage (ms) : "
+        + ", ".join(f"{step}={ms}" for step, ms in _startup_timings.items())
+    )
     logger.info("=" * 60)
 
     yield # L'application tourne ici
 
     # ---- Phase d'Arrêt ----
     logger.info("Arrêt du système...")
+    await alert_coalescer.stop_flusher()
+    await websocket_handler.stop_subscriber()
+    await websocket_dashboard.stop_pusher()
     await data_retention_service.stop_scheduler()
+    await rollup_service.stop_scheduler()
+    await counter_service.stop_scheduler()
+    await persistence_service.stop_writer()
+    await metrics_service.stop_flusher()
     await close_db()
     await close_redis()
     logger.info("Network Defense System arrêté")
@@ -100,6 +184,8 @@ app = FastAPI(
     ),
     version="1.0.0",
     lifespan=lifespan,
+    # Réponses JSON encodées par orjson (plus rapide, datetime / NumPy natifs)
+    default_response_class=ORJSONResponse if HAS_ORJSON else JSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -127,6 +213,7 @@ app.include_router(reporting_router)
 
 # ---- WebSocket ----
 app.websocket("/ws/alerts")(websocket_endpoint)
+app.websocket("/ws/dashboard")(websocket_dashboard.dashboard_endpoint)
 
 
 # ---- Endpoints Système ----
@@ -145,15 +232,29 @@ async def root():
 async def health_check():
     """
     Health check complet pour Kubernetes ou Docker Healthcheck.
-    Vérifie la connectivité DB et Redis.
+    Vérifie la connectivité DB et Redis, et l'état de chargement des modèles
+    (loading / ready / failed) avec le profil de démarrage.
     """
+    readiness = detection_service.get_readiness()
     health = {
         "status": "healthy",
         "services": {
             "api": True,
             "database": False,
             "redis": False,
+            "models": readiness["state"] == "ready",
         },
+        "models": readiness,
+        "persistence": persistence_service.get_stats(),
+        "rollups": rollup_service.get_status(),
+        "counters": counter_service.get_status(),
+        "realtime": websocket_handler.get_status(),
+        "dashboard_push": websocket_dashboard.get_status(),
+        "alert_batches": alert_coalescer.get_stats(),
+        "realtime_writes": alert_service.get_stats(),
+        "metrics": metrics_service.get_status(),
+        "response_cache": response_cache.get_stats(),
+        "startup_ms": _startup_timings,
     }
 
     async def _db_check() -> None:
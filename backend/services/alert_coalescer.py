@@ -0,0 +1,168 @@
+"""
+Regroupement des alertes temps réel avant publication Redis.
+
+Pendant une attaque (DDoS, scan), create_alert produit une alerte par flux :
+publier chacune sur Redis puis en trame WebSocket sature le serveur et le
+navigateur. Les alertes sont donc accumulées pendant une fenêtre
+(ALERT_BATCH_INTERVAL_MS) ou jusqu'à ALERT_BATCH_MAX_SIZE entrées distinctes,
+les répétitions d'un même triplet (src_ip, attack_type, severity) étant
+fusionnées en une entrée avec compteur, puis publiées en un seul message
+{"type": "alert_batch", "alerts": [...]}.
+
+Une fenêtre ne contenant qu'une alerte est publiée telle quelle (forme
+unitaire historique), ce qui ne change rien en période calme.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+from backend.core.config import get_settings
+from backend.database.redis_client import publish_alert
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_task: Optional[asyncio.Task] = None
+_stop_event: Optional[asyncio.Event] = None
+_full_event: Optional[asyncio.Event] = None
+
+# (src_ip, attack_type, severity) → entrée fusionnée de la fenêtre en cours
+_window: Dict[Tuple[Any, Any, Any], Dict[str, Any]] = {}
+_window_alerts = 0
+
+_stats: Dict[str, Any] = {
+    "alerts_in": 0,
+    "messages_out": 0,
+    "batches_out": 0,
+    "collapsed": 0,
+    "publish_errors": 0,
+    "last_error": None,
+}
+
+
+def is_running() -> bool:
+    return bool(_task and not _task.done())
+
+
+def submit(alert: Dict[str, Any]) -> None:
+    """
+    Ajoute une alerte (déjà sérialisable JSON) à la fenêtre en cours.
+    Les répétitions d'un même triplet incrémentent le compteur de l'entrée.
+    """
+    global _window_alerts
+
+    _stats["alerts_in"] += 1
+    _window_alerts += 1
+    key = (alert.get("src_ip"), alert.get("attack_type"), alert.get("severity"))
+    entry = _window.get(key)
+    if entry is None:
+        _window[key] = {
+            **alert,
+            "count": 1,
+            "first_seen": alert.get("timestamp"),
+            "last_seen": alert.get("timestamp"),
+        }
+        if len(_window) >= settings.alert_batch_max_size and _full_event:
+            _full_event.set()
+        return
+
+    _stats["collapsed"] += 1
+    entry["count"] += 1
+    entry["last_seen"] = alert.get("timestamp") or entry["last_seen"]
+    if (alert.get("threat_score") or 0) > (entry.get("threat_score") or 0):
+        entry["threat_score"] = alert["threat_score"]
+
+
+async def flush() -> None:
+    """Publie la fenêtre en cours : alerte unitaire ou lot fusionné."""
+    global _window, _window_alerts
+
+    if not _window:
+        return
+    entries, alerts = list(_window.values()), _window_alerts
+    _window, _window_alerts = {}, 0
+
+    if alerts == 1:
+        message = {key: value for key, value in entries[0].items() if key not in ("count", "first_seen", "last_seen")}
+    else:
+        message = {
+            "type": "alert_batch",
+            "count": alerts,
+            "window_ms": settings.alert_batch_interval_ms,
+            "alerts": entries,
+        }
+        _stats["batches_out"] += 1
+
+    try:
+        await publish_alert(message)
+        _stats["messages_out"] += 1
+    except Exception as e:
+        _stats["publish_errors"] += 1
+        _stats["last_error"] = str(e)
+        logger.warning(f"Impossible de publier les alertes Redis : {e}")
+
+
+async def _flush_loop() -> None:
+    """Boucle de fond : publication toutes les N ms, ou dès que la taille maximale est atteinte."""
+    interval = max(10, settings.alert_batch_interval_ms) / 1000
+
+    while _stop_event and not _stop_event.is_set():
+        try:
+            await asyncio.wait_for(_full_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        _full_event.clear()
+        await flush()
+
+    await flush()
+
+
+def start_flusher() -> bool:
+    """Démarre le regroupement (idempotent) ; sinon les alertes sont publiées une par une."""
+    global _task, _stop_event, _full_event
+
+    if not settings.alert_batch_enabled:
+        logger.info("Regroupement des alertes temps réel désactivé par configuration")
+        return False
+
+    if is_running():
+        return True
+
+    _stop_event = asyncio.Event()
+    _full_event = asyncio.Event()
+    _task = asyncio.create_task(_flush_loop())
+    return True
+
+
+async def stop_flusher() -> None:
+    """Arrête le regroupement après publication de la fenêtre en cours."""
+    global _task, _stop_event, _full_event
+
+    if _stop_event:
+        _stop_event.set()
+    if _full_event:
+        _full_event.set()
+
+    if _task and not _task.done():
+        try:
+            await asyncio.wait_for(_task, timeout=5)
+        except asyncio.TimeoutError:
+            _task.cancel()
+            logger.warning("Regroupement des alertes arrêté de force (Timeout)")
+
+    _task = None
+    _stop_event = None
+    _full_event = None
+
+
+def get_stats() -> Dict[str, Any]:
+    """Compteurs du regroupement."""
+    return {
+        "enabled": settings.alert_batch_enabled,
+        "running": is_running(),
+        "interval_ms": settings.alert_batch_interval_ms,
+        "max_size": settings.alert_batch_max_size,
+        "pending": _window_alerts,
+        **_stats,
+    }
@@ -1,91 +1,220 @@
 """
 Service d'alertes : création, mise à jour, statistiques.
+
+Les écritures Redis du chemin de détection sont différées : create_alert et
+observe_risk ne font aucun aller-retour ; l'appelant transmet la liste
+`pending` à flush_realtime une fois la transaction PostgreSQL validée, et
+tout part en un seul pipeline.
+
+Le score de menace global est un agrégat en mémoire à décroissance
+exponentielle : chaque risque observé le relève au maximum de (niveau décru,
+risque), puis il retombe de moitié toutes les THREAT_SCORE_HALF_LIFE_SECONDS.
+Il est écrit dans Redis au plus une fois par THREAT_SCORE_WRITE_INTERVAL_SECONDS.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
-from backend.database.redis_client import publish_alert, set_threat_score
+from ai.inference.detection_result import DetectionResult
+from backend.core.config import get_settings
+from backend.database.redis_client import publish_alert, publish_realtime, set_threat_score
+from backend.services import alert_coalescer, geo_service
+from monitoring.metrics import metrics
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 _alert_count = 0
 
+# Score de menace : niveau au dernier risque observé, instant de cette observation
+# et de la dernière écriture Redis (time.time())
+_threat_level = 0.0
+_threat_at = 0.0
+_threat_written_at = 0.0
+_threat_write_task: Optional[asyncio.Task] = None
+
+_stats: Dict[str, Any] = {
+    "pipelines": 0,
+    "alerts_published": 0,
+    "threat_writes": 0,
+    "errors": 0,
+    "last_error": None,
+}
+
 
 async def create_alert(
-    flow_id: str,
-    decision: Dict[str, Any],
-    flow_metadata: Dict[str, Any],
+    flow_id: str, record: DetectionResult, pending: Optional[List[dict]] = None
 ) -> Dict[str, Any]:
     """
     Crée une alerte structurée à partir d'une décision positive du moteur de détection.
     
     Actions:
     1. Formate les données de l'alerte (sévérité, type, score...).
-    2. Publie l'alerte sur Redis pour le temps réel (WebSocket).
+    2. Publie l'alerte sur Redis pour le temps réel (WebSocket), via alert_coalescer si actif ;
+       avec `pending`, la publication est différée à flush_realtime (après le commit).
     3. Logue l'événement pour traçabilité.
     
     Args:
         flow_id: ID unique du flux réseau associé.
-        decision: Dictionnaire de résultat du moteur hybride.
-        flow_metadata: Métadonnées du flux (IPs, ports...).
+        record: Résultat compact du moteur hybride (métadonnées du flux incluses).
+        pending: Liste collectant les messages temps réel du lot en cours.
         
     Returns:
         Dict: Données de l'alerte créée.
     """
     global _alert_count
 
+    flow_metadata = record.flow_metadata or {}
     alert_data = {
         "flow_id": flow_id,
         "timestamp": datetime.utcnow(),
-        "severity": decision["severity"],
-        "attack_type": decision.get("attack_type"),
-        "threat_score": decision["threat_score"],
-        "decision": decision["decision"],
+        "severity": record.severity,
+        "attack_type": record.attack_type,
+        "threat_score": record.risk,
+        "decision": record.decision,
         "status": "open",
+        "src_ip": flow_metadata.get("src_ip"),
+        "dst_ip": flow_metadata.get("dst_ip"),
+        "dst_port": flow_metadata.get("dst_port"),
+        "protocol": flow_metadata.get("protocol"),
+        "src_country_code": geo_service.cached_country_code(flow_metadata.get("src_ip")),
         "alert_metadata": {
             "src_ip": flow_metadata.get("src_ip"),
             "dst_ip": flow_metadata.get("dst_ip"),
-            "priority": decision.get("priority", 5),
-            "reasoning": decision.get("reasoning", ""),
-            "supervised_confidence": decision.get("supervised_confidence", 0),
-            "anomaly_score": decision.get("anomaly_score", 0),
+            "priority": record.priority,
+            "reasoning": record.reasoning,
+            "supervised_confidence": round(record.confidence, 6),
+            "anomaly_score": round(record.anomaly_score, 6),
         },
     }
 
     _alert_count += 1
+    metrics.increment("alerts_generated")
 
-    # Publication temps réel via Redis Pub/Sub
-    try:
-        await publish_alert(
-            {
-                **alert_data,
-                "timestamp": alert_data["timestamp"].isoformat(),
-            }
-        )
-    except Exception as e:
-        logger.warning(f"Impossible de publier l'alerte Redis : {e}")
+    # Publication temps réel via Redis Pub/Sub (regroupée pendant les rafales)
+    payload = {
+        **alert_data,
+        "timestamp": alert_data["timestamp"].isoformat(),
+    }
+    if pending is not None:
+        pending.append(payload)
+    elif alert_coalescer.is_running():
+        alert_coalescer.submit(payload)
+    else:
+        try:
+            await publish_alert(payload)
+        except Exception as e:
+            logger.warning(f"Impossible de publier l'alerte Redis : {e}")
 
     logger.info(
-        f"Alerte créée : {decision['decision']} | "
-        f"{decision['severity']} | {decision.get('attack_type', 'N/A')}"
+        f"Alerte créée : {record.decision} | "
+        f"{record.severity} | {record.attack_type or 'N/A'}"
     )
 
     return alert_data
 
 
-async def update_threat_score(score: float) -> None:
-    """
-    Met à jour le score de menace global du système dans le cache Redis.
-    Ce score est affiché en haut du dashboard.
-    """
+def _decayed_threat(now: float) -> float:
+    half_life = settings.threat_score_half_life_seconds
+    if half_life <= 0 or _threat_at == 0.0:
+        return _threat_level
+    return _threat_level * 0.5 ** (max(0.0, now - _threat_at) / half_life)
+
+
+def observe_risk(risk: float) -> None:
+    """Intègre le risque d'un flux au score de menace global (en mémoire, sans Redis)."""
+    global _threat_level, _threat_at
+
+    now = time.time()
+    _threat_level = max(_decayed_threat(now), float(risk))
+    _threat_at = now
+    metrics.set_gauge("current_threat_score", round(_threat_level, 6))
+
+
+def current_threat_score() -> float:
+    """Score de menace global à l'instant présent (décroissance appliquée)."""
+    return round(_decayed_threat(time.time()), 6)
+
+
+def _threat_score_due() -> Optional[float]:
+    """Score à écrire maintenant (nouvelle observation et intervalle écoulé), sinon None."""
+    global _threat_written_at
+
+    now = time.time()
+    if _threat_at <= _threat_written_at:
+        return None
+    if now - _threat_written_at < settings.threat_score_write_interval_seconds:
+        _schedule_threat_write(settings.threat_score_write_interval_seconds - (now - _threat_written_at))
+        return None
+    _threat_written_at = now
+    return current_threat_score()
+
+
+def _schedule_threat_write(delay: float) -> None:
+    """Écriture différée unique : la dernière observation d'une rafale finit toujours dans Redis."""
+    global _threat_write_task
+
+    if _threat_write_task and not _threat_write_task.done():
+        return
+    _threat_write_task = asyncio.create_task(_write_threat_later(delay))
+
+
+async def _write_threat_later(delay: float) -> None:
+    global _threat_write_task
+
+    await asyncio.sleep(delay)
+    _threat_write_task = None
+    score = _threat_score_due()
+    if score is None:
+        return
     try:
         await set_threat_score(score)
+        _stats["threat_writes"] += 1
     except Exception as e:
+        _stats["errors"] += 1
+        _stats["last_error"] = str(e)
         logger.warning(f"Impossible de mettre à jour le threat score : {e}")
 
 
+async def flush_realtime(pending: List[dict]) -> None:
+    """
+    Envoie les écritures temps réel d'un lot, après le commit PostgreSQL :
+    alertes (au regroupement alert_coalescer s'il tourne, sinon XADD) et score
+    de menace s'il est dû, le tout en un seul pipeline Redis.
+    """
+    if pending and alert_coalescer.is_running():
+        for payload in pending:
+            alert_coalescer.submit(payload)
+        pending = []
+
+    threat_score = _threat_score_due()
+    if not pending and threat_score is None:
+        return
+    try:
+        await publish_realtime(pending, threat_score)
+        _stats["pipelines"] += 1
+        _stats["alerts_published"] += len(pending)
+        if threat_score is not None:
+            _stats["threat_writes"] += 1
+    except Exception as e:
+        _stats["errors"] += 1
+        _stats["last_error"] = str(e)
+        logger.warning(f"Impossible d'envoyer les écritures temps réel Redis : {e}")
+
+
+def get_stats() -> Dict[str, Any]:
+    """Compteurs des écritures temps réel et score de menace courant."""
+    return {
+        "threat_score": current_threat_score(),
+        "threat_half_life_seconds": settings.threat_score_half_life_seconds,
+        "alerts_created": _alert_count,
+        **_stats,
+    }
+
+
 def total_alerts() -> int:
     """Retourne le nombre total d'alertes générées depuis le démarrage."""
     return _alert_count
@@ -7,6 +7,7 @@ from typing import List, Dict, Any
 
 from capture.packet_sniffer import PacketSniffer
 from capture.flow_builder import FlowBuilder, NetworkFlow
+from monitoring.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -89,11 +90,15 @@ def process_captured_packets() -> List[NetworkFlow]:
     """
     # 1. Vidage du buffer de paquets bruts
     packets = _sniffer.drain_buffer()
+    metrics.set_gauge("buffer_usage", round(len(packets) / max(1, _sniffer.buffer_size), 4))
     if not packets:
         return []
 
     # 2. Reconstitution des flux (TCP Stream Reassembly conceptuel)
-    return _flow_builder.process_batch(packets)
+    flows = _flow_builder.process_batch(packets)
+    metrics.increment("packets_processed", len(packets))
+    metrics.set_gauge("active_flows", _flow_builder.active_flow_count)
+    return flows
 
 
 def force_complete_all() -> List[NetworkFlow]:
@@ -0,0 +1,161 @@
+"""
+Service de recalage des compteurs de lignes (table_counters).
+
+Les compteurs sont maintenus dans la transaction de chaque écriture
+(bulk_create_results, create_*, rétention) ; ce service corrige
+périodiquement la dérive éventuelle (écritures hors repository, restauration
+de sauvegarde) par un COUNT(*) exécuté en tâche de fond, hors du chemin des
+requêtes du dashboard.
+
+Le compte exact et la valeur du compteur sont lus dans le même instantané
+(REPEATABLE READ) ; seul l'écart est ensuite appliqué, ce qui préserve les
+incréments validés entre-temps par le writer.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from backend.core.config import get_settings
+from backend.database.connection import async_session_factory
+from backend.database import repository
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_task: Optional[asyncio.Task] = None
+_stop_event: Optional[asyncio.Event] = None
+_stats: Dict[str, Any] = {
+    "runs": 0,
+    "last_run": None,
+    "last_drift": {},
+    "last_error": None,
+}
+
+
+async def reconcile_table(table: str) -> Dict[str, int]:
+    """
+    Recale le compteur d'une table sur son nombre exact de lignes.
+
+    Returns:
+        Dict: Nombre de lignes et écart corrigé.
+    """
+    async with async_session_factory() as db:
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        try:
+            actual, drift = await repository.measure_counter_drift(db, table)
+        finally:
+            await db.rollback()
+
+    async with async_session_factory() as db:
+        try:
+            await repository.apply_counter_drift(db, table, drift)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+    return {"row_count": actual, "drift": drift}
+
+
+async def run_once() -> Dict[str, Dict[str, int]]:
+    """Recale tous les compteurs (une table à la fois)."""
+    summary = {}
+    for table in repository.COUNTED_TABLES:
+        summary[table] = await reconcile_table(table)
+        if summary[table]["drift"]:
+            logger.info("Compteurs: %s recalé de %+d lignes", table, summary[table]["drift"])
+    return summary
+
+
+async def _needs_reconcile() -> bool:
+    """Vrai si un compteur n'a jamais été recalé (première installation, migration)."""
+    async with async_session_factory() as db:
+        counters = await repository.get_row_counters(db)
+    return any(
+        counters.get(table, {}).get("reconciled_at") is None
+        for table in repository.COUNTED_TABLES
+    )
+
+
+async def _reconcile_loop() -> None:
+    """
+    Boucle de fond : recalage toutes les counter_reconcile_interval_minutes,
+    immédiat au démarrage seulement si un compteur n'a jamais été recalé.
+    """
+    interval_seconds = max(1, settings.counter_reconcile_interval_minutes) * 60
+    skip = False
+    try:
+        skip = not await _needs_reconcile()
+    except Exception as e:
+        logger.warning("Compteurs: lecture initiale impossible (%s)", e)
+
+    while _stop_event and not _stop_event.is_set():
+        if skip:
+            skip = False
+            try:
+                await asyncio.wait_for(_stop_event.wait(), timeout=interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        try:
+            summary = await run_once()
+            _stats["runs"] += 1
+            _stats["last_run"] = datetime.utcnow().isoformat()
+            _stats["last_drift"] = {table: entry["drift"] for table, entry in summary.items()}
+            _stats["last_error"] = None
+        except Exception as e:
+            _stats["last_error"] = str(e)
+            logger.warning("Compteurs: échec du recalage (%s)", e)
+
+        # Attente interruptible (pour arrêt propre)
+        try:
+            await asyncio.wait_for(_stop_event.wait(), timeout=interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_scheduler() -> bool:
+    """Démarre la tâche de recalage en arrière-plan (idempotent)."""
+    global _task, _stop_event
+
+    if not settings.counter_reconcile_enabled:
+        logger.info("Recalage des compteurs désactivé par configuration")
+        return False
+
+    if _task and not _task.done():
+        return True
+
+    _stop_event = asyncio.Event()
+    _task = asyncio.create_task(_reconcile_loop())
+    logger.info("Scheduler de recalage des compteurs démarré")
+    return True
+
+
+async def stop_scheduler() -> None:
+    """Arrête la tâche de recalage (un COUNT(*) en cours est annulé)."""
+    global _task, _stop_event
+
+    if _stop_event:
+        _stop_event.set()
+
+    if _task and not _task.done():
+        try:
+            await asyncio.wait_for(_task, timeout=5)
+        except asyncio.TimeoutError:
+            _task.cancel()
+            logger.warning("Scheduler de recalage des compteurs arrêté de force (Timeout)")
+
+    _task = None
+    _stop_event = None
+
+
+def get_status() -> Dict[str, Any]:
+    """État du service de recalage."""
+    return {
+        "enabled": settings.counter_reconcile_enabled,
+        "running": bool(_task and not _task.done()),
+        "mode": settings.totals_mode,
+        "interval_minutes": settings.counter_reconcile_interval_minutes,
+        **_stats,
+    }
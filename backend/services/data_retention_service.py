@@ -1,21 +1,31 @@
 """
 Service de rétention des données.
-Supprime périodiquement les flux anciens pour limiter la croissance DB.
+Maintient les partitions journalières des tables à fort volume :
+création anticipée des partitions à venir, puis suppression des partitions
+expirées (DETACH + DROP, sans DELETE ligne à ligne) avec une durée de
+rétention propre à chaque table.
+
+Les flux référencés par une alerte sont copiés dans network_flows_archive
+avant la suppression de leur partition. Sur une base non migrée (tables non
+partitionnées), l'ancien nettoyage par lots de DELETE est conservé.
 """
 
 import asyncio
 import logging
+from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 
 from backend.core.config import get_settings
 from backend.database.connection import async_session_factory
 from backend.database import repository
+from backend.database.models import PARTITIONED_TABLES
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 _task: Optional[asyncio.Task] = None
 _stop_event: Optional[asyncio.Event] = None
+_last_run: Dict[str, Any] = {}
 
 
 # ---- Configuration ----
@@ -24,18 +34,99 @@ def _is_enabled() -> bool:
     return bool(settings.retention_enabled and settings.retention_flows_days > 0)
 
 
-async def run_cleanup_once() -> int:
+def _retention_days(table: str) -> int:
+    """Durée de conservation (jours) d'une table partitionnée ; 0 = jamais supprimée."""
+    return {
+        "network_flows": settings.retention_flows_days,
+        "predictions": settings.retention_predictions_days,
+        "anomaly_scores": settings.retention_anomalies_days,
+        "alerts": settings.retention_alerts_days,
+    }[table]
+
+
+# ---- Partitions ----
+
+async def ensure_partitions() -> int:
     """
-    Exécute un cycle de nettoyage unique.
-    Supprime les flux plus vieux que 'retention_flows_days'.
-    Procède par petits lots (batches) pour ne pas verrouiller la base de données.
-    
+    Crée les partitions journalières d'hier à J+partition_premake_days (et la
+    partition DEFAULT) pour chaque table partitionnée. Idempotent.
+
     Returns:
-        int: Nombre total de flux supprimés.
+        int: Nombre de partitions créées.
     """
-    if not _is_enabled():
-        return 0
+    today = datetime.utcnow().date()
+    days = [today + timedelta(days=offset) for offset in range(-1, settings.partition_premake_days + 1)]
+    created = 0
+
+    for table in PARTITIONED_TABLES:
+        async with async_session_factory() as db:
+            try:
+                if not await repository.is_partitioned(db, table):
+                    continue
+                existing = await repository.list_daily_partitions(db, table)
+                await repository.ensure_default_partition(db, table)
+                for day in days:
+                    if day not in existing:
+                        await repository.create_daily_partition(db, table, day)
+                        created += 1
+                await db.commit()
+            except Exception as e:
+                # Échec typique : la partition DEFAULT contient déjà des lignes du jour
+                await db.rollback()
+                logger.warning("Partitions: création impossible pour %s (%s)", table, e)
+
+    return created
+
+
+async def drop_expired_partitions() -> Dict[str, Any]:
+    """
+    Supprime, table par table, les partitions entièrement antérieures à la
+    durée de rétention. Une transaction par partition.
+
+    Returns:
+        Dict: partitions supprimées par table et flux archivés.
+    """
+    today = datetime.utcnow().date()
+    dropped: Dict[str, int] = {}
+    archived = 0
+
+    for table in PARTITIONED_TABLES:
+        retention_days = _retention_days(table)
+        dropped[table] = 0
+        if retention_days <= 0:
+            continue
 
+        cutoff = today - timedelta(days=retention_days)
+        async with async_session_factory() as db:
+            if not await repository.is_partitioned(db, table):
+                continue
+            partitions = await repository.list_daily_partitions(db, table)
+
+        for day, name in sorted(partitions.items()):
+            if day >= cutoff:
+                break
+            async with async_session_factory() as db:
+                try:
+                    if table == "network_flows" and settings.retention_keep_alerted_flows:
+                        archived += await repository.archive_alerted_flows(db, name)
+                    await repository.drop_partition(db, table, name)
+                    await db.commit()
+                    dropped[table] += 1
+                except Exception:
+                    await db.rollback()
+                    raise
+
+    return {"dropped_partitions": dropped, "archived_flows": archived}
+
+
+async def _delete_old_flows_legacy() -> int:
+    """
+    Ancien nettoyage (tables non partitionnées) : suppression par petits lots
+    pour ne pas verrouiller la base de données.
+
+    Returns:
+        int: Nombre total de flux supprimés.
+    """
     total_deleted = 0
 
     # Limite de sécurité pour éviter une boucle infinie si la DB réinsère plus vite qu'on supprime
@@ -66,28 +157,62 @@ async def run_cleanup_once() -> int:
     return total_deleted
 
 
+async def run_cleanup_once() -> Dict[str, Any]:
+    """
+    Exécute un cycle de maintenance unique : partitions à venir, puis
+    suppression des partitions expirées (si la rétention est activée).
+
+    Returns:
+        Dict: Résumé du cycle (partitions créées / supprimées, flux archivés).
+    """
+    summary: Dict[str, Any] = {"created_partitions": await ensure_partitions()}
+
+    if _is_enabled():
+        async with async_session_factory() as db:
+            partitioned = await repository.is_partitioned(db, "network_flows")
+        if partitioned:
+            summary.update(await drop_expired_partitions())
+        else:
+            summary["legacy_deleted_flows"] = await _delete_old_flows_legacy()
+
+    summary["finished_at"] = datetime.utcnow().isoformat()
+    _last_run.clear()
+    _last_run.update(summary)
+    return summary
+
+
 async def _retention_loop() -> None:
     """
     Boucle principale de la tâche de fond (Background Task).
-    Attend l'intervalle configuré puis lance le nettoyage.
+    Lance la maintenance puis attend l'intervalle configuré.
     """
     interval_seconds = max(60, settings.retention_run_interval_minutes * 60)
     logger.info(
-        "Rétention activée: suppression flux > %s jours, intervalle=%s min, batch=%s, keep_alerted=%s",
+        "Rétention: flux=%sj, prédictions=%sj, anomalies=%sj, alertes=%sj, intervalle=%s min, keep_alerted=%s",
         settings.retention_flows_days,
+        settings.retention_predictions_days,
+        settings.retention_anomalies_days,
+        settings.retention_alerts_days,
         settings.retention_run_interval_minutes,
-        settings.retention_delete_batch_size,
         settings.retention_keep_alerted_flows,
     )
 
     while _stop_event and not _stop_event.is_set():
         try:
-            logger.debug("Lancement du cycle de rétention...")
-            deleted = await run_cleanup_once()
-            if deleted > 0:
-                logger.info("Rétention: %s flux anciens supprimés avec succès", deleted)
+            logger.debug("Lancement du cycle de maintenance...")
+            summary = await run_cleanup_once()
+            if summary.get("created_partitions"):
+                logger.info("Partitions: %s partitions journalières créées", summary["created_partitions"])
+            if any(summary.get("dropped_partitions", {}).values()):
+                logger.info(
+                    "Rétention: partitions supprimées %s, %s flux alertés archivés",
+                    summary["dropped_partitions"],
+                    summary["archived_flows"],
+                )
+            if summary.get("legacy_deleted_flows"):
+                logger.info("Rétention: %s flux anciens supprimés avec succès", summary["legacy_deleted_flows"])
         except Exception as e:
-            logger.warning("Rétention: échec du cycle de nettoyage (%s)", e)
+            logger.warning("Rétention: échec du cycle de maintenance (%s)", e)
 
         # Attente interruptible (pour arrêt propre)
         try:
@@ -98,14 +223,14 @@ async def _retention_loop() -> None:
 
 def start_scheduler() -> bool:
     """
-    Démarre la tâche périodique de rétention en arrière-plan (asyncio.create_task).
-    Idempotent (ne fait rien si déjà démarré).
+    Démarre la tâche périodique de maintenance en arrière-plan (asyncio.create_task).
+    Toujours active : les partitions à venir doivent exister même si la
+    suppression est désactivée. Idempotent (ne fait rien si déjà démarré).
     """
     global _task, _stop_event
 
     if not _is_enabled():
-        logger.info("Rétention désactivée par configuration")
-        return False
+        logger.info("Rétention désactivée par configuration (maintenance des partitions uniquement)")
 
     if _task and not _task.done():
         return True # Déjà en cours
@@ -144,7 +269,12 @@ def get_status() -> Dict[str, Any]:
         "enabled": _is_enabled(),
         "running": bool(_task and not _task.done()),
         "flows_days": settings.retention_flows_days,
+        "predictions_days": settings.retention_predictions_days,
+        "anomalies_days": settings.retention_anomalies_days,
+        "alerts_days": settings.retention_alerts_days,
+        "partition_premake_days": settings.partition_premake_days,
         "interval_minutes": settings.retention_run_interval_minutes,
         "batch_size": settings.retention_delete_batch_size,
         "keep_alerted_flows": settings.retention_keep_alerted_flows,
+        "last_run": dict(_last_run),
     }
@@ -3,72 +3,295 @@ Service de détection principal.
 Orchestre le pipeline complet : features → preprocessing → AI → decision.
 
 Architecture production : chargement des modèles pré-entraînés, inférence only.
+Les modèles peuvent être rechargés à chaud (reload_models) sans interrompre le service.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
 
 import numpy as np
 
 from ai.inference.model_loader import ModelLoader
+from ai.config.model_config import ArtifactPaths, artifact_paths, inference_config
+from ai.inference.detection_result import DetectionResult
+from ai.inference.inference_cache import InferenceCache
 from ai.inference import supervised_predictor
 from ai.inference import unsupervised_predictor
 from ai.inference import hybrid_decision_engine
+from ai.inference import cascade
 from capture.feature_extractor import FeatureExtractor
 from capture.flow_builder import NetworkFlow
 
 logger = logging.getLogger(__name__)
 
 # ---- Global State (Singleton) ----
-_loader = ModelLoader()
-_supervised: Optional[Dict[str, Any]] = None
-_unsupervised: Optional[Dict[str, Any]] = None
+# Jeu de modèles actif : dict immuable {version, loader, supervised, unsupervised,
+# cache_generation} remplacé en une seule affectation lors d'un rechargement.
+# Un lot en cours conserve sa référence et se termine sur l'ancienne version.
+_models: Optional[Dict[str, Any]] = None
+_last_loader: Optional[ModelLoader] = None
+_reload_lock = asyncio.Lock()
+
+# Préchargement en arrière-plan : idle → loading → ready | failed
+_readiness: Dict[str, Any] = {"state": "idle", "error": None, "started_at": None, "finished_at": None}
+_ready_future: Optional[asyncio.Future] = None
+_preload_task: Optional[asyncio.Task] = None
+_reload_history = {"reloads": 0, "failures": 0, "last_reload_at": None, "last_error": None}
 _decision_engine = hybrid_decision_engine.create_engine()
+_cascade_engine = cascade.create_cascade_engine(_decision_engine)
+_cascade_stats = {"evaluated": 0, "skipped_benign": 0, "skipped_attack": 0}
 _feature_extractor = FeatureExtractor()
-_is_ready = False
+_cache = InferenceCache(
+    max_entries=inference_config.cache_max_entries,
+    ttl_seconds=inference_config.cache_ttl_seconds,
+    quantization=inference_config.cache_quantization,
+)
 
 
 def is_ready() -> bool:
     """Vérifie si le service est initialisé et prêt à traiter des flux."""
-    return _is_ready
+    return _models is not None
+
+
+def get_active_models() -> Optional[Dict[str, Any]]:
+    """Retourne le jeu de modèles actif (à capturer une fois par lot)."""
+    return _models
+
+
+def _activate(loader: ModelLoader) -> Dict[str, Any]:
+    """
+    Construit les prédicteurs d'un loader chargé puis bascule le jeu actif.
+    La bascule est une simple réaffectation : aucune requête n'observe un état partiel.
+    """
+    global _models, _last_loader
+
+    supervised = supervised_predictor.create_predictor(
+        model=loader.supervised_model,
+        class_names=loader.pipeline.class_names,
+    )
+    unsupervised = unsupervised_predictor.create_predictor(
+        model=loader.unsupervised_model,
+        threshold_path=loader.paths.threshold_stats,
+    )
+
+    # Les sorties mémoïsées ne sont valables que pour les artifacts qui les ont produites
+    _cache.clear()
+
+    models = {
+        "version": loader.version,
+        "loader": loader,
+        "supervised": supervised,
+        "unsupervised": unsupervised,
+        "cache_generation": _cache.generation,
+    }
+    _models = models
+    _last_loader = loader
+    return models
 
 
-def initialize() -> bool:
+def initialize(paths: Optional[ArtifactPaths] = None, version: Optional[str] = None) -> bool:
     """
     Initialise le service de détection.
     Charge les modèles d'IA (Supervisé & Non-supervisé) et les configurations.
     Cette fonction est bloquante et doit être appelée au démarrage de l'application.
-    
+
+    Args:
+        paths: Jeu d'artifacts à charger (défaut : ai/artifacts/).
+        version: Libellé de version (défaut : empreinte du modèle supervisé).
+
     Returns:
         bool: True si l'initialisation est réussie, False sinon.
     """
-    global _supervised, _unsupervised, _is_ready
+    global _last_loader
 
-    if _is_ready:
+    if _models is not None:
         return True
 
     logger.info("Initialisation du service de détection...")
+    if _readiness["state"] != "loading":
+        _set_state("loading")
 
-    if not _loader.load_all():
+    loader = ModelLoader(paths or artifact_paths, version)
+    if not loader.load_all():
+        _last_loader = loader
+        missing = loader.paths.missing_artifacts()
+        _set_state("failed", f"Artifacts manquants : {missing}" if missing else "Échec du chargement des artifacts")
         logger.warning(
             "⚠ Artifacts AI non disponibles. Le service fonctionnera sans AI. "
             "Placez les modèles pré-entraînés dans ai/artifacts/"
         )
         return False
 
-    # Création des prédicteurs avec les modèles chargés
-    _supervised = supervised_predictor.create_predictor(
-        model=_loader.supervised_model,
-        class_names=_loader.pipeline.class_names,
-    )
-    _unsupervised = unsupervised_predictor.create_predictor(model=_loader.unsupervised_model)
-
-    _is_ready = True
-    logger.info("✓ Service de détection initialisé avec succès")
+    models = _activate(loader)
+    _set_state("ready")
+    logger.info(f"✓ Service de détection initialisé avec succès (version {models['version']})")
     return True
 
 
-def analyze_flow(flow: NetworkFlow, ip_reputation: float = 0.0) -> Dict[str, Any]:
+def _set_state(state: str, error: Optional[str] = None) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    if state == "loading":
+        _readiness["started_at"] = now
+        _readiness["finished_at"] = None
+    else:
+        _readiness["finished_at"] = now
+    _readiness["state"] = state
+    _readiness["error"] = error
+
+
+def start_preload(
+    resolve: Optional[Callable[[], Awaitable[Tuple[ArtifactPaths, Optional[str]]]]] = None,
+) -> asyncio.Future:
+    """
+    Lance le chargement des modèles dans un thread, sans bloquer la boucle asyncio.
+    Idempotent : un seul préchargement à la fois.
+
+    Args:
+        resolve: Coroutine retournant (artifacts, version) à charger
+            (ex : versions actives du registre). En cas d'échec, ai/artifacts/ est utilisé.
+
+    Returns:
+        Future résolue (True/False) à la fin du chargement.
+    """
+    global _ready_future, _preload_task
+
+    if _ready_future is not None and (not _ready_future.done() or _models is not None):
+        return _ready_future
+
+    loop = asyncio.get_running_loop()
+    _ready_future = loop.create_future()
+    _set_state("loading")
+
+    async def _preload() -> None:
+        paths, version = None, None
+        if resolve is not None:
+            try:
+                paths, version = await resolve()
+            except Exception as e:
+                logger.warning(f"⚠ Résolution des versions actives impossible, artifacts par défaut : {e}")
+        try:
+            ok = await asyncio.to_thread(initialize, paths, version)
+        except Exception as e:
+            logger.error(f"✗ Préchargement des modèles échoué : {e}")
+            _set_state("failed", str(e))
+            ok = False
+        if not _ready_future.done():
+            _ready_future.set_result(ok)
+
+    _preload_task = asyncio.create_task(_preload())
+    return _ready_future
+
+
+async def wait_until_ready(
+    timeout: float,
+    resolve: Optional[Callable[[], Awaitable[Tuple[ArtifactPaths, Optional[str]]]]] = None,
+) -> bool:
+    """
+    Attend la fin du préchargement (au plus `timeout` secondes) au lieu de
+    charger les modèles de manière synchrone. Démarre le préchargement s'il
+    n'a jamais été lancé (avec `resolve`, comme start_preload) ; ne relance
+    pas un chargement échoué.
+    """
+    if _models is not None:
+        return True
+
+    future = _ready_future if _ready_future is not None else start_preload(resolve)
+    if not future.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+    return _models is not None
+
+
+def get_readiness() -> Dict[str, Any]:
+    """État du préchargement (loading / ready / failed) et profil de démarrage."""
+    loader = _models["loader"] if _models else _last_loader
+    return {
+        **_readiness,
+        "load_timings_ms": loader.timings if loader else {},
+    }
+
+
+def load_candidate(paths: ArtifactPaths, version: Optional[str] = None) -> Tuple[ModelLoader, List[str]]:
+    """
+    Charge un jeu d'artifacts candidat à côté du jeu actif, avec warm-up,
+    puis vérifie sa compatibilité. Bloquant : à exécuter hors boucle asyncio.
+
+    Returns:
+        (loader, erreurs) — liste vide si le candidat peut être activé.
+    """
+    loader = ModelLoader(paths, version)
+    if not loader.load_all(warmup=True):
+        missing = paths.missing_artifacts()
+        return loader, [f"Artifacts manquants : {missing}"] if missing else ["Échec du chargement des artifacts"]
+    return loader, loader.check_compatibility()
+
+
+async def reload_models(
+    paths: Optional[ArtifactPaths] = None,
+    version: Optional[str] = None,
+    on_validated: Optional[Callable[[], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Rechargement à chaud sans interruption (double buffer).
+
+    Le candidat est chargé et chauffé dans un thread pendant que le jeu actif
+    continue de servir ; la bascule n'a lieu qu'après validation. En cas
+    d'échec, le jeu actif reste en place.
+
+    Args:
+        paths: Jeu d'artifacts candidat (défaut : ai/artifacts/).
+        version: Libellé de version du candidat.
+        on_validated: Coroutine appelée après validation et avant la bascule
+            (ex : marquer la version active dans le registre). Une exception annule la bascule.
+
+    Returns:
+        Dict avec le statut ("reloaded" / "failed"), la version active et les erreurs éventuelles.
+    """
+    async with _reload_lock:
+        previous = _models["version"] if _models else None
+        started = time.perf_counter()
+
+        loader, errors = await asyncio.to_thread(load_candidate, paths or artifact_paths, version)
+
+        if not errors and on_validated is not None:
+            try:
+                await on_validated()
+            except Exception as e:
+                errors = [f"Activation refusée : {e}"]
+
+        if errors:
+            _reload_history["failures"] += 1
+            _reload_history["last_error"] = "; ".join(errors)
+            logger.error(f"✗ Rechargement des modèles refusé ({loader.version}) : {errors}")
+            return {"status": "failed", "active_version": previous, "errors": errors}
+
+        models = _activate(loader)
+        _set_state("ready")
+        _reload_history["reloads"] += 1
+        _reload_history["last_reload_at"] = datetime.now(timezone.utc).isoformat()
+        _reload_history["last_error"] = None
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"✓ Modèles rechargés : {previous} → {models['version']} ({elapsed_ms} ms)")
+        return {
+            "status": "reloaded",
+            "previous_version": previous,
+            "active_version": models["version"],
+            "fingerprint": loader.fingerprint,
+            "load_ms": elapsed_ms,
+        }
+
+
+def analyze_flow(
+    flow: NetworkFlow,
+    ip_reputation: float = 0.0,
+    models: Optional[Dict[str, Any]] = None,
+) -> Optional[DetectionResult]:
     """
     Analyse un flux réseau unique via le pipeline hybride complet.
     
@@ -81,77 +304,183 @@ def analyze_flow(flow: NetworkFlow, ip_reputation: float = 0.0) -> Dict[str, Any
     Args:
         flow: L'objet NetworkFlow capturé.
         ip_reputation: Score de réputation de l'IP source (optionnel).
+        models: Jeu de modèles à utiliser (défaut : jeu actif).
         
     Returns:
-        Dict: Résultat complet de l'analyse (décision, scores, métadonnées).
+        DetectionResult: Enregistrement compact (décision, scores, métadonnées),
+        ou None si le service n'est pas prêt ou si le preprocessing échoue.
     """
-    if not is_ready():
-        return {"error": "Service non initialisé", "decision": "unknown"}
+    models = models or _models
+    if models is None:
+        return None
 
     # 1. Extraction
     features = _feature_extractor.extract(flow)
-    metadata = _feature_extractor.get_flow_metadata(flow)
 
     # 2. Preprocessing
     try:
-        processed = _loader.pipeline.transform(features)
+        processed = models["loader"].pipeline.transform(features)
     except Exception as e:
         logger.error(f"Erreur de preprocessing : {e}")
-        return {"error": str(e), "decision": "error"}
+        return None
 
     # 3. & 4. Inférence et Décision
-    result = _run_inference(processed, ip_reputation)
-    result["flow_metadata"] = metadata
-    return result
+    record = _run_inference(models, processed, ip_reputation)
+    record.flow_metadata = _feature_extractor.get_flow_metadata(flow)
+    record.features = features
+    return record
+
+
+def extract_features(flow: NetworkFlow) -> np.ndarray:
+    """Vecteur de features brut d'un flux (persisté même sans analyse, pour re-scoring)."""
+    return _feature_extractor.extract(flow)
+
+
+def analyze_flows(flows: List[NetworkFlow], ip_reputation: float = 0.0) -> List[Optional[DetectionResult]]:
+    """
+    Analyse un lot de flux avec un seul et même jeu de modèles :
+    un rechargement concurrent ne s'applique qu'au lot suivant.
+    """
+    models = _models
+    if models is None:
+        return [None] * len(flows)
+    return [analyze_flow(flow, ip_reputation, models) for flow in flows]
 
 
 def analyze_features(features: np.ndarray, ip_reputation: float = 0.0) -> Dict[str, Any]:
     """
     Analyse un vecteur de features déjà extrait (ex: pour tests ou replay).
     Contourne l'étape d'extraction depuis NetworkFlow.
+    Retourne le format dict historique (hors hot-path).
     """
-    if not is_ready():
+    models = _models
+    if models is None:
         return {"error": "Service non initialisé"}
 
     try:
-        processed = _loader.pipeline.transform(features)
+        processed = models["loader"].pipeline.transform(features)
     except Exception as e:
         logger.error(f"Erreur de preprocessing : {e}")
         return {"error": str(e)}
 
-    return _run_inference(processed, ip_reputation)
+    return _run_inference(models, processed, ip_reputation).to_dict()
 
 
-def _run_inference(processed_features: np.ndarray, ip_reputation: float = 0.0) -> Dict[str, Any]:
+def _run_inference(models: Dict[str, Any], processed_features: np.ndarray, ip_reputation: float = 0.0) -> DetectionResult:
     """
     Fonction interne d'exécution du moteur hybride.
-    Combine les résultats des deux modèles et la réputation IP.
+    Combine les résultats des deux modèles et la réputation IP
+    dans un DetectionResult, sans dictionnaires intermédiaires.
+
+    Si le cache est actif, un vecteur déjà vu (à la quantification près)
+    réutilise les sorties des modèles ; seule la fusion avec la réputation
+    IP du flux est recalculée. Un lot servi par un jeu de modèles remplacé
+    entre-temps contourne le cache (génération périmée).
     """
-    if not _supervised or not _unsupervised:
-        return {"error": "Prédicteurs non initialisés"}
+    supervised = models["supervised"]
+    key = None
+    generation = models["cache_generation"]
+    if inference_config.cache_enabled and generation == _cache.generation:
+        key = _cache.make_key(processed_features.reshape(-1))
+        outputs = _cache.get(key)
+        if outputs is not None:
+            return _decide_from_outputs(models, outputs, ip_reputation)
 
-    # Inférence parallèle (conceptuellement)
-    supervised_result = supervised_predictor.predict(_supervised, processed_features)
-    unsupervised_result = unsupervised_predictor.predict(_unsupervised, processed_features)
+    started = time.perf_counter()
+    indices, confidences, is_attack, probabilities = supervised_predictor.predict_arrays(
+        supervised, processed_features
+    )
+
+    skipped = False
+    if inference_config.cascade_enabled:
+        is_benign = supervised_predictor.benign_flags(supervised, indices)
+        skipped = bool(cascade.skip_mask(confidences, is_attack, is_benign, processed_features)[0])
+        _record_cascade(skipped, bool(is_attack[0]))
+
+    if skipped:
+        error, score, anomalous = 0.0, 0.0, False
+    else:
+        errors, scores, is_anomaly = unsupervised_predictor.score_arrays(models["unsupervised"], processed_features)
+        error, score, anomalous = float(errors[0]), float(scores[0]), bool(is_anomaly[0])
+    elapsed = time.perf_counter() - started
 
-    # Fusion des décisions
-    decision = hybrid_decision_engine.decide(
-        engine=_decision_engine,
-        supervised_result=supervised_result,
-        unsupervised_result=unsupervised_result,
-        ip_reputation=ip_reputation,
+    outputs = (
+        int(indices[0]),
+        float(confidences[0]),
+        bool(is_attack[0]),
+        error,
+        score,
+        anomalous,
+        probabilities[0].copy(),
+        skipped,
     )
+    if key is not None:
+        _cache.put(key, outputs, elapsed, generation=generation)
+
+    return _decide_from_outputs(models, outputs, ip_reputation)
+
 
+def _decide_from_outputs(models: Dict[str, Any], outputs: tuple, ip_reputation: float) -> DetectionResult:
+    """Construit le DetectionResult depuis les sorties brutes des modèles et applique la fusion."""
+    class_index, confidence, is_attack, error, score, is_anomaly, probabilities, skipped = outputs
+    record = DetectionResult(
+        class_index=class_index,
+        confidence=confidence,
+        is_attack=is_attack,
+        reconstruction_error=error,
+        anomaly_score=score,
+        is_anomaly=is_anomaly,
+        threshold=models["unsupervised"]["threshold"],
+        probabilities=probabilities,
+        class_names=models["supervised"]["class_names"],
+        anomaly_skipped=skipped,
+    )
+    record.model_version = models["version"]
+
+    # Fusion des décisions (réputation propre au flux, jamais mise en cache).
+    # Sans autoencoder, les poids sont renormalisés sur supervisé + réputation.
+    engine = _cascade_engine if skipped else _decision_engine
+    return hybrid_decision_engine.decide_record(engine, record, ip_reputation)
+
+
+def _record_cascade(skipped: bool, is_attack: bool) -> None:
+    _cascade_stats["evaluated"] += 1
+    if skipped:
+        _cascade_stats["skipped_attack" if is_attack else "skipped_benign"] += 1
+
+
+def get_cascade_stats() -> Dict[str, Any]:
+    """Statistiques du mode cascade (proportion de flux ayant évité l'autoencoder)."""
+    evaluated = _cascade_stats["evaluated"]
+    skipped = _cascade_stats["skipped_benign"] + _cascade_stats["skipped_attack"]
     return {
-        "supervised": supervised_result,
-        "unsupervised": unsupervised_result,
-        "decision": decision,
+        "enabled": inference_config.cascade_enabled,
+        **_cascade_stats,
+        "skipped": skipped,
+        "skip_ratio": round(skipped / evaluated, 4) if evaluated else 0.0,
     }
 
 
+def get_cache_stats() -> Dict[str, Any]:
+    """Statistiques du cache d'inférence (hit ratio, temps économisé)."""
+    return {"enabled": inference_config.cache_enabled, **_cache.get_stats()}
+
+
+def get_reload_stats() -> Dict[str, Any]:
+    """Historique des rechargements à chaud."""
+    return {**_reload_history, "in_progress": _reload_lock.locked()}
+
+
 def get_status() -> Dict[str, Any]:
     """Retourne l'état de santé du service de détection."""
+    models = _models
+    loader = models["loader"] if models else _last_loader
     return {
-        "is_ready": _is_ready,
-        "artifacts": _loader.get_status() if _loader else {},
+        "is_ready": models is not None,
+        "readiness": get_readiness(),
+        "model_version": models["version"] if models else None,
+        "artifacts": loader.get_status() if loader else {},
+        "reload": get_reload_stats(),
+        "inference_cache": get_cache_stats(),
+        "cascade": get_cascade_stats(),
     }
@@ -2,14 +2,23 @@
 Service de géolocalisation : résolution et cache des IP.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Optional, List, Set
 
+from backend.database.connection import async_session_factory
+from backend.database import repository
 from geo.geo_locator import GeoLocator
 from geo.ip_resolver import is_public_ip, classify_ip, sanitize_ip
 
 logger = logging.getLogger(__name__)
 
+# Une même IP n'est recomplétée dans alerts qu'une fois par intervalle
+_BACKFILL_INTERVAL_SECONDS = 600
+_backfilled_at: Dict[str, float] = {}
+_backfill_tasks: Set[asyncio.Task] = set()
+
 
 # ---- Global Locator ----
 _locator = GeoLocator(cache_ttl=86400)
@@ -49,10 +58,62 @@ async def locate_ip(ip: str) -> Optional[Dict[str, Any]]:
     geo_data = await _locator.locate(normalized_ip)
     if not geo_data:
         return {**classification, "geo": None, "geo_error": "geoip_unavailable"}
+    _schedule_country_backfill([{**geo_data, "ip_address": normalized_ip}])
 
     return {**classification, "geo": geo_data}
 
 
+def cached_country_code(ip: Optional[str]) -> Optional[str]:
+    """
+    Code pays d'une IP si elle est déjà dans le cache GeoIP, sans appel réseau
+    (utilisable sur le chemin de création des alertes).
+    """
+    if not ip:
+        return None
+    try:
+        normalized_ip = sanitize_ip(ip)
+    except ValueError:
+        return None
+    if not is_public_ip(normalized_ip):
+        return None
+    cached = _locator.get_cached(normalized_ip)
+    return (cached or {}).get("country_code") or None
+
+
+async def _backfill_country_codes(codes: Dict[str, str]) -> None:
+    try:
+        async with async_session_factory() as db:
+            await repository.backfill_alert_country_codes(db, codes)
+            await db.commit()
+    except Exception as e:
+        for ip in codes:
+            _backfilled_at.pop(ip, None)  # Nouvelle tentative à la prochaine résolution
+        logger.warning(f"Complément des codes pays des alertes impossible : {e}")
+
+
+def _schedule_country_backfill(results: List[Optional[Dict[str, Any]]]) -> None:
+    """
+    Les alertes reçoivent leur code pays depuis le cache GeoIP à la création ;
+    celles d'une IP encore inconnue sont complétées ici dès qu'elle est résolue.
+    """
+    now = time.monotonic()
+    codes = {}
+    for result in results:
+        ip = (result or {}).get("ip_address")
+        code = (result or {}).get("country_code")
+        if ip and code and now - _backfilled_at.get(ip, float("-inf")) >= _BACKFILL_INTERVAL_SECONDS:
+            codes[ip] = code
+            _backfilled_at[ip] = now
+    if not codes:
+        return
+    if len(_backfilled_at) > 50000:
+        for ip in [ip for ip, at in _backfilled_at.items() if now - at >= _BACKFILL_INTERVAL_SECONDS]:
+            del _backfilled_at[ip]
+    task = asyncio.create_task(_backfill_country_codes(codes))
+    _backfill_tasks.add(task)
+    task.add_done_callback(_backfill_tasks.discard)
+
+
 async def locate_ips(ips: List[str]) -> List[Dict[str, Any]]:
     """
     Géolocalise une liste d'IPs en optimisant les appels (batch/cache).
@@ -84,7 +145,8 @@ async def get_attack_map_data(alert_ips: List[str]) -> List[Dict[str, Any]]:
         return []
 
     geo_results = await _locator.locate_batch(public_ips)
-    
+    _schedule_country_backfill(geo_results)
+
     # Filtrage des résultats invalides (sans coordonnées numériques).
     valid_results = []
     for r in geo_results:
@@ -0,0 +1,210 @@
+"""
+Indicateurs de la vue d'ensemble tenus en mémoire (poussés sur /ws/dashboard).
+
+Le chemin de détection met à jour les KPI au fil des résultats
+(observe_flows() pour chaque lot : flux, protocoles, anomalies et alertes
+par sévérité) ; le score de menace est celui d'alert_service. Lire les KPI
+(snapshot) ne coûte donc aucune requête PostgreSQL, quel que soit le nombre
+d'écrans ouverts.
+
+Fenêtre glissante de KPI_WINDOW_HOURS découpée en minutes, avec des sommes
+courantes (ajout à l'observation, retrait quand une minute sort de la
+fenêtre, alignée sur l'heure comme les agrégats). Elle est amorcée une seule
+fois depuis les agrégats (seed) ; le total des flux part des compteurs de
+lignes, comme /api/dashboard/overview.
+
+Les valeurs sont celles du processus qui exécute la capture et la détection.
+"""
+
+import logging
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+
+from backend.core.config import get_settings
+from backend.database.connection import async_session_factory
+from backend.database import repository
+from backend.services import alert_service
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PROTOCOL_NAMES = {1: "ICMP", 6: "TCP", 17: "UDP"}
+_RATE_WINDOW_SECONDS = 10
+
+
+class _Bucket:
+    """Compteurs d'une minute de la fenêtre."""
+
+    __slots__ = ("minute", "flows", "analyzed", "anomalies", "severity", "protocols")
+
+    def __init__(self, minute: int):
+        self.minute = minute
+        self.flows = 0
+        self.analyzed = 0
+        self.anomalies = 0
+        self.severity: Counter = Counter()
+        self.protocols: Counter = Counter()
+
+
+# Minutes de la fenêtre (ordre chronologique) et sommes courantes
+_buckets: deque = deque()
+_window = _Bucket(0)
+# (seconde, flux) des dernières secondes, pour le débit
+_rate: deque = deque()
+_flows_total = 0
+
+_stats: Dict[str, Any] = {
+    "seeded": False,
+    "seeded_at": None,
+    "seed_error": None,
+    "flows_observed": 0,
+    "alerts_observed": 0,
+}
+
+
+def _protocol_name(protocol: Any) -> str:
+    if protocol is None or protocol == "":
+        return "UNKNOWN"
+    try:
+        return PROTOCOL_NAMES.get(int(protocol), str(protocol))
+    except (TypeError, ValueError):
+        return str(protocol)
+
+
+def _expire(now: float) -> None:
+    """Retire des sommes les minutes sorties de la fenêtre (début aligné sur l'heure)."""
+    start = int((now - settings.kpi_window_hours * 3600) // 3600) * 60
+    while _buckets and _buckets[0].minute < start:
+        bucket = _buckets.popleft()
+        _window.flows -= bucket.flows
+        _window.analyzed -= bucket.analyzed
+        _window.anomalies -= bucket.anomalies
+        _window.severity.subtract(bucket.severity)
+        _window.protocols.subtract(bucket.protocols)
+
+
+def _bucket_at(minute: int) -> _Bucket:
+    """Minute courante (créée au besoin ; les minutes amorcées sont plus anciennes)."""
+    if _buckets and _buckets[-1].minute == minute:
+        return _buckets[-1]
+    bucket = _Bucket(minute)
+    _buckets.append(bucket)
+    return bucket
+
+
+def observe_flows(flows: list, records: list) -> None:
+    """Intègre un lot de flux et leurs résultats d'analyse (None si non analysé), alertes comprises."""
+    global _flows_total
+
+    now = time.time()
+    bucket = _bucket_at(int(now // 60))
+    analyzed = anomalies = 0
+    for flow, record in zip(flows, records):
+        name = _protocol_name(getattr(flow, "protocol", None))
+        bucket.protocols[name] += 1
+        _window.protocols[name] += 1
+        if record is not None:
+            analyzed += 1
+            anomalies += bool(record.is_anomaly)
+            if record.is_alert:
+                severity = record.severity or "unknown"
+                bucket.severity[severity] += 1
+                _window.severity[severity] += 1
+                _stats["alerts_observed"] += 1
+
+    count = len(flows)
+    bucket.flows += count
+    bucket.analyzed += analyzed
+    bucket.anomalies += anomalies
+    _window.flows += count
+    _window.analyzed += analyzed
+    _window.anomalies += anomalies
+    _flows_total += count
+    _stats["flows_observed"] += count
+
+    second = int(now)
+    if _rate and _rate[-1][0] == second:
+        _rate[-1][1] += count
+    else:
+        _rate.append([second, count])
+
+
+async def seed() -> bool:
+    """Amorce la fenêtre et le total des flux depuis PostgreSQL (une fois, au démarrage)."""
+    global _flows_total
+
+    now = datetime.utcnow()
+    since = now - timedelta(hours=settings.kpi_window_hours)
+    try:
+        async with async_session_factory() as db:
+            rows = {
+                dimension: await repository.get_rollup(db, dimension, since, by_hour=True)
+                for dimension in ("flows", "anomaly", "severity", "protocol")
+            }
+            totals = await repository.get_table_totals(db, ("network_flows",), mode=settings.totals_mode)
+    except Exception as e:
+        _stats["seed_error"] = str(e)
+        logger.warning(f"KPI dashboard : amorçage depuis PostgreSQL impossible ({e})")
+        return False
+
+    # Une entrée par heure, datée du début de l'heure, insérée avant les minutes déjà observées
+    hours: Dict[int, _Bucket] = {}
+    for dimension, dimension_rows in rows.items():
+        for row in dimension_rows:
+            minute = int(row["bucket"].replace(tzinfo=timezone.utc).timestamp() // 60)
+            bucket = hours.setdefault(minute, _Bucket(minute))
+            if dimension == "flows":
+                bucket.flows += row["count"]
+            elif dimension == "anomaly":
+                bucket.analyzed += row["count"]
+                if row["key"] == "anomalous":
+                    bucket.anomalies += row["count"]
+            elif dimension == "severity":
+                bucket.severity[row["key"] or "unknown"] += row["count"]
+            else:
+                bucket.protocols[_protocol_name(row["key"])] += row["count"]
+
+    for bucket in sorted(hours.values(), key=lambda b: b.minute, reverse=True):
+        _buckets.appendleft(bucket)
+        _window.flows += bucket.flows
+        _window.analyzed += bucket.analyzed
+        _window.anomalies += bucket.anomalies
+        _window.severity.update(bucket.severity)
+        _window.protocols.update(bucket.protocols)
+
+    _flows_total += totals["network_flows"]["count"]
+    _stats["seeded"] = True
+    _stats["seeded_at"] = now.isoformat()
+    _stats["seed_error"] = None
+    return True
+
+
+def snapshot() -> Dict[str, Any]:
+    """KPI courants, arrondis pour que seuls les changements visibles produisent un delta."""
+    now = time.time()
+    _expire(now)
+    while _rate and _rate[0][0] <= now - _RATE_WINDOW_SECONDS:
+        _rate.popleft()
+
+    by_severity = {key: count for key, count in _window.severity.items() if count > 0}
+    protocols = {key: count for key, count in _window.protocols.items() if count > 0}
+    protocol_total = sum(protocols.values())
+    return {
+        "threat_score": round(alert_service.current_threat_score(), 4),
+        "total_alerts": sum(by_severity.values()),
+        "alerts_by_severity": by_severity,
+        "anomaly_rate": round(_window.anomalies / _window.analyzed, 4) if _window.analyzed else 0.0,
+        "total_flows_analyzed": _flows_total,
+        "flows_per_sec": round(sum(count for _, count in _rate) / _RATE_WINDOW_SECONDS, 1),
+        "protocol_mix": {
+            name: round(count * 100 / protocol_total, 1)
+            for name, count in sorted(protocols.items(), key=lambda item: item[1], reverse=True)
+        },
+        "period_hours": settings.kpi_window_hours,
+    }
+
+
+def get_stats() -> Dict[str, Any]:
+    return {**_stats, "window_minutes": len(_buckets)}
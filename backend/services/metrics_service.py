@@ -0,0 +1,126 @@
+"""
+Service de publication des métriques applicatives dans Redis.
+
+Le chemin chaud (capture, détection, alertes) n'incrémente que des compteurs
+en mémoire (monitoring.metrics, un shard par thread). Toutes les
+METRICS_FLUSH_INTERVAL_SECONDS, ce service calcule les deltas depuis la
+dernière publication et les envoie en un seul pipeline INCRBY : chaque worker
+uvicorn pousse ses propres deltas et Redis en fait la somme, si bien que
+/api/dashboard/metrics voit le total de tous les processus.
+
+Les gauges (flux actifs, remplissage du buffer de capture) sont écrites avec
+un TTL : celle d'un processus arrêté expire d'elle-même.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from backend.core.config import get_settings
+from backend.database.redis_client import flush_metrics
+from monitoring.metrics import metrics
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_task: Optional[asyncio.Task] = None
+_stop_event: Optional[asyncio.Event] = None
+
+# Totaux déjà publiés (les deltas non publiés sont repoussés au cycle suivant)
+_published: Dict[str, int] = {}
+
+_stats: Dict[str, Any] = {
+    "flushes": 0,
+    "last_flush": None,
+    "last_deltas": {},
+    "errors": 0,
+    "last_error": None,
+}
+
+
+async def flush_once() -> Dict[str, int]:
+    """Publie les deltas de compteurs et les gauges courantes ; retourne les deltas envoyés."""
+    totals = metrics.counters
+    deltas = {
+        name: value - _published.get(name, 0)
+        for name, value in totals.items()
+        if value != _published.get(name, 0)
+    }
+    gauges = dict(metrics.gauges)
+    if not deltas and not gauges:
+        return {}
+
+    gauge_ttl = max(10, int(settings.metrics_flush_interval_seconds * 3))
+    await flush_metrics(deltas, gauges, gauge_ttl)
+    _published.update({name: totals[name] for name in deltas})
+    return deltas
+
+
+async def _flush_loop() -> None:
+    """Boucle de fond : une publication par intervalle, et une dernière à l'arrêt."""
+    interval = max(0.5, settings.metrics_flush_interval_seconds)
+
+    while _stop_event and not _stop_event.is_set():
+        try:
+            await asyncio.wait_for(_stop_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            deltas = await flush_once()
+            _stats["flushes"] += 1
+            _stats["last_flush"] = datetime.utcnow().isoformat()
+            _stats["last_deltas"] = deltas
+            _stats["last_error"] = None
+        except Exception as e:
+            _stats["errors"] += 1
+            _stats["last_error"] = str(e)
+            logger.warning("Métriques: publication Redis impossible (%s)", e)
+
+
+def start_flusher() -> bool:
+    """Démarre la publication périodique des métriques (idempotent)."""
+    global _task, _stop_event
+
+    if not settings.metrics_flush_enabled:
+        logger.info("Publication des métriques désactivée par configuration")
+        return False
+
+    if _task and not _task.done():
+        return True
+
+    _stop_event = asyncio.Event()
+    _task = asyncio.create_task(_flush_loop())
+    return True
+
+
+async def stop_flusher() -> None:
+    """Arrête la publication après un dernier envoi des deltas en attente."""
+    global _task, _stop_event
+
+    if _stop_event:
+        _stop_event.set()
+
+    if _task and not _task.done():
+        try:
+            await asyncio.wait_for(_task, timeout=5)
+        except asyncio.TimeoutError:
+            _task.cancel()
+            logger.warning("Publication des métriques arrêtée de force (Timeout)")
+
+    _task = None
+    _stop_event = None
+
+
+def get_status() -> Dict[str, Any]:
+    """Totaux du processus, deltas en attente et état de la publication."""
+    totals = metrics.counters
+    return {
+        "enabled": settings.metrics_flush_enabled,
+        "running": bool(_task and not _task.done()),
+        "interval_seconds": settings.metrics_flush_interval_seconds,
+        "process_counters": totals,
+        "pending": {name: value - _published.get(name, 0) for name, value in totals.items() if value != _published.get(name, 0)},
+        "gauges": dict(metrics.gauges),
+        **_stats,
+    }
@@ -0,0 +1,119 @@
+"""
+Service de gestion des versions de modèles (registre model_versions).
+Résout le jeu d'artifacts actif et pilote l'activation d'une version
+via le rechargement à chaud du service de détection.
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ai.config.model_config import ARTIFACTS_DIR, PROJECT_ROOT, ArtifactPaths
+from backend.database.connection import async_session_factory
+from backend.database import repository
+from backend.database.models import ModelVersion
+from backend.services import detection_service
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve_path(file_path: str) -> Path:
+    """Chemin absolu d'un artifact du registre (relatif = depuis la racine du projet)."""
+    path = Path(file_path)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+def build_artifact_paths(
+    supervised: Optional[ModelVersion],
+    unsupervised: Optional[ModelVersion],
+) -> ArtifactPaths:
+    """
+    Construit le jeu d'artifacts d'un couple de versions.
+    Les .pkl (scaler, encoder, sélecteur) sont lus à côté du modèle supervisé,
+    car ils dépendent de son entraînement.
+    """
+    supervised_path = _resolve_path(supervised.file_path) if supervised else None
+    unsupervised_path = _resolve_path(unsupervised.file_path) if unsupervised else None
+    return ArtifactPaths(
+        base_dir=supervised_path.parent if supervised_path else ARTIFACTS_DIR,
+        supervised_path=supervised_path,
+        unsupervised_path=unsupervised_path,
+    )
+
+
+def _version_label(supervised: Optional[ModelVersion], unsupervised: Optional[ModelVersion]) -> Optional[str]:
+    """Libellé persisté dans predictions.model_version (None = empreinte du fichier)."""
+    if supervised:
+        return supervised.version
+    return unsupervised.version if unsupervised else None
+
+
+async def resolve_active_artifacts(db: AsyncSession) -> Tuple[ArtifactPaths, Optional[str]]:
+    """
+    Résout les artifacts des versions actives du registre.
+    Sans version active, retombe sur ai/artifacts/.
+    """
+    supervised = await repository.get_active_model_version(db, "supervised")
+    unsupervised = await repository.get_active_model_version(db, "unsupervised")
+    return build_artifact_paths(supervised, unsupervised), _version_label(supervised, unsupervised)
+
+
+async def resolve_active() -> Tuple[ArtifactPaths, Optional[str]]:
+    """Variante avec sa propre session (préchargement au démarrage)."""
+    async with async_session_factory() as db:
+        return await resolve_active_artifacts(db)
+
+
+async def reload_active() -> Dict[str, Any]:
+    """Recharge à chaud les versions actives du registre."""
+    paths, version = await resolve_active()
+    return await detection_service.reload_models(paths, version)
+
+
+async def activate_version(model_id: str) -> Dict[str, Any]:
+    """
+    Active une version du registre : le candidat est chargé et validé à côté
+    du jeu actif ; le registre n'est mis à jour qu'après validation, puis
+    les modèles basculent. En cas d'échec, rien ne change.
+    """
+    async with async_session_factory() as db:
+        target = await repository.get_model_version(db, model_id)
+        if target is None:
+            return {"status": "not_found", "model_id": model_id}
+
+        if target.model_type == "supervised":
+            supervised = target
+            unsupervised = await repository.get_active_model_version(db, "unsupervised")
+        else:
+            supervised = await repository.get_active_model_version(db, "supervised")
+            unsupervised = target
+
+        async def _commit_activation() -> None:
+            await repository.set_active_model_version(db, target.id, target.model_type)
+            await db.commit()
+
+        result = await detection_service.reload_models(
+            build_artifact_paths(supervised, unsupervised),
+            _version_label(supervised, unsupervised),
+            on_validated=_commit_activation,
+        )
+
+    result["model_id"] = model_id
+    result["model_type"] = target.model_type
+    return result
+
+
+def serialize_version(model: ModelVersion) -> Dict[str, Any]:
+    """Format API d'une version du registre."""
+    return {
+        "id": model.id,
+        "model_type": model.model_type,
+        "version": model.version,
+        "file_path": model.file_path,
+        "accuracy": model.accuracy,
+        "f1_score": model.f1_score,
+        "trained_at": model.trained_at.isoformat() if model.trained_at else None,
+        "is_active": model.is_active,
+    }
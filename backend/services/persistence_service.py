@@ -0,0 +1,496 @@
+"""
+Service de persistance différée (write-behind).
+Découple la détection de PostgreSQL : la boucle de capture dépose des lignes
+déjà construites dans une file bornée, vidée par une tâche d'écriture en
+masse (par taille ou par échéance).
+
+Si la base est indisponible, les lignes sont ajoutées à un fichier spool
+local (JSON lines, append-only) puis rejouées en masse au retour de la base.
+
+Les messages temps réel des alertes (alert_service.flush_realtime) suivent
+leurs lignes dans la file et dans le spool, et ne partent qu'après le commit
+(au rejeu pour les lignes spoolées) ; une alerte dont le flux est rejeté
+n'est pas publiée.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from backend.core.config import get_settings
+from backend.database.connection import async_session_factory
+from backend.database import repository
+from backend.services import alert_service, rollup_service
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# (flux, prédiction | None, anomalie | None, alerte | None) — IDs générés côté client
+ResultRows = Tuple[dict, Optional[dict], Optional[dict], Optional[dict]]
+
+_queue: Optional[asyncio.Queue] = None
+_task: Optional[asyncio.Task] = None
+_stop_event: Optional[asyncio.Event] = None
+_spool_lock = asyncio.Lock()
+# Débordements en cours d'écriture vers le spool (référence gardée jusqu'à la fin)
+_spool_tasks: Set[asyncio.Task] = set()
+# Messages temps réel en attente du commit de leur flux : flow_id -> payload d'alerte
+_realtime: Dict[str, dict] = {}
+
+_stats = {
+    "enqueued": 0,
+    "written_flows": 0,
+    "flushes": 0,
+    "failed_rows": 0,
+    "recovered_rows": 0,
+    "spooled": 0,
+    "replayed": 0,
+    "spool_dropped": 0,
+    "last_flush_ms": 0.0,
+    "max_flush_ms": 0.0,
+    "total_flush_ms": 0.0,
+    "db_available": True,
+    "last_error": None,
+}
+
+
+# ---- Écriture ----
+
+def _is_connectivity_error(error: Exception) -> bool:
+    """Erreur de connexion (base arrêtée, réseau) par opposition à une ligne invalide."""
+    if isinstance(error, (OSError, asyncio.TimeoutError, OperationalError, InterfaceError)):
+        return True
+    return bool(getattr(error, "connection_invalidated", False))
+
+
+async def write_rows(items: List[ResultRows], use_copy: Optional[bool] = None) -> None:
+    """Écrit un lot de lignes (flux, prédiction, anomalie, alerte) en une seule transaction."""
+    if use_copy is None:
+        use_copy = settings.persistence_use_copy
+    async with async_session_factory() as db:
+        try:
+            await repository.bulk_create_results(
+                db,
+                [flow_row for flow_row, _, _, _ in items],
+                [prediction for _, prediction, _, _ in items if prediction],
+                [anomaly for _, _, anomaly, _ in items if anomaly],
+                [alert for _, _, _, alert in items if alert],
+                use_copy=use_copy,
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+async def _complete_partial(item: ResultRows) -> bool:
+    """
+    Reprise d'un flux déjà inséré (écriture antérieure partielle) : n'écrit
+    que ses lignes filles absentes.
+
+    Returns:
+        bool: False si le flux n'existe pas (la ligne est réellement invalide).
+    """
+    flow_row, prediction, anomaly, alert = item
+    async with async_session_factory() as db:
+        try:
+            if not await repository.get_existing_ids(db, "network_flows", [flow_row["id"]]):
+                return False
+            missing = {}
+            for table, row in (("predictions", prediction), ("anomaly_scores", anomaly), ("alerts", alert)):
+                if row and not await repository.get_existing_ids(db, table, [row["id"]]):
+                    missing[table] = [row]
+            if missing:
+                await repository.bulk_create_results(
+                    db,
+                    [],
+                    missing.get("predictions", []),
+                    missing.get("anomaly_scores", []),
+                    missing.get("alerts", []),
+                    use_copy=False,
+                )
+                await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+    _stats["recovered_rows"] += 1
+    return True
+
+
+async def _write_item(item: ResultRows) -> None:
+    """Écrit un flux seul (INSERT) ; un flux déjà présent est complété au lieu d'être rejeté."""
+    try:
+        await write_rows([item], use_copy=False)
+    except Exception as e:
+        if _is_connectivity_error(e) or not await _complete_partial(item):
+            raise
+
+
+def _track_realtime(realtime: Optional[List[dict]]) -> None:
+    for payload in realtime or ():
+        _realtime[payload["flow_id"]] = payload
+
+
+def _take_realtime(items: List[ResultRows]) -> List[dict]:
+    """Retire les messages temps réel associés aux flux d'un lot."""
+    if not _realtime:
+        return []
+    payloads = (_realtime.pop(flow_row["id"], None) for flow_row, _, _, _ in items)
+    return [payload for payload in payloads if payload is not None]
+
+
+async def flush_now(items: List[ResultRows], realtime: Optional[List[dict]] = None) -> None:
+    """Écriture immédiate d'un lot (writer non démarré), avec les mêmes replis que le writer."""
+    _track_realtime(realtime)
+    await _flush(items)
+
+
+async def _flush(items: List[ResultRows]) -> None:
+    """
+    Vide un lot vers PostgreSQL puis envoie les messages temps réel des flux
+    validés (alertes et score de menace, un seul pipeline Redis).
+    """
+    committed = await _write_batch(items)
+    await alert_service.flush_realtime(_take_realtime(committed))
+    # Flux rejetés : leurs alertes ne sont pas publiées (celles des flux spoolés suivent le spool)
+    _take_realtime(items)
+
+
+async def _write_batch(items: List[ResultRows]) -> List[ResultRows]:
+    """
+    Écrit un lot. Base indisponible → spool ; erreur de données → réécriture
+    flux par flux pour isoler la ligne fautive.
+
+    Returns:
+        List[ResultRows]: Lignes validées en base.
+    """
+    started = time.perf_counter()
+    committed = []
+    try:
+        await write_rows(items)
+        committed = items
+        _stats["written_flows"] += len(items)
+        _stats["db_available"] = True
+    except Exception as e:
+        if _is_connectivity_error(e):
+            if _stats["db_available"]:
+                logger.warning(f"PostgreSQL indisponible, bascule sur le spool local : {e}")
+            _stats["db_available"] = False
+            _stats["last_error"] = str(e)
+            await _spool(items)
+            return committed
+
+        logger.error(f"Erreur persistance en masse ({len(items)} flux), repli flux par flux : {e}")
+        for index, item in enumerate(items):
+            try:
+                await _write_item(item)
+                committed.append(item)
+                _stats["written_flows"] += 1
+            except Exception as row_error:
+                if _is_connectivity_error(row_error):
+                    _stats["db_available"] = False
+                    await _spool(items[index:])
+                    return committed
+                _stats["failed_rows"] += 1
+                logger.error(f"Erreur persistance flow/result: {row_error}")
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _stats["flushes"] += 1
+        _stats["last_flush_ms"] = round(elapsed_ms, 2)
+        _stats["max_flush_ms"] = round(max(_stats["max_flush_ms"], elapsed_ms), 2)
+        _stats["total_flush_ms"] += elapsed_ms
+    return committed
+
+
+# ---- Spool local ----
+
+def _spool_path() -> Path:
+    return Path(settings.persistence_spool_path)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii") # Features float32
+    raise TypeError(f"Type non sérialisable : {type(value)}")
+
+
+def _decode_row(row: Optional[dict]) -> Optional[dict]:
+    if row is not None and isinstance(row.get("timestamp"), str):
+        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    if row is not None and isinstance(row.get("features"), str):
+        row["features"] = base64.b64decode(row["features"])
+    return row
+
+
+def _append_lines(path: Path, lines: List[str]) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    max_bytes = settings.persistence_spool_max_mb * 1024 * 1024
+    current = path.stat().st_size if path.exists() else 0
+    kept = []
+    for line in lines:
+        current += len(line) + 1
+        if current > max_bytes:
+            break
+        kept.append(line)
+    if kept:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(kept) + "\n")
+    return len(kept)
+
+
+def _spool_lines(items: List[ResultRows]) -> List[str]:
+    """Une ligne JSON par flux : ses lignes puis le message temps réel de son alerte (ou null)."""
+    return [
+        json.dumps([*item, _realtime.pop(item[0]["id"], None)], default=_encode)
+        for item in items
+    ]
+
+
+async def _spool(items: List[ResultRows]) -> None:
+    """Ajoute des lignes au spool (fichier append-only, taille plafonnée)."""
+    lines = _spool_lines(items)
+    async with _spool_lock:
+        written = await asyncio.to_thread(_append_lines, _spool_path(), lines)
+    _stats["spooled"] += written
+    if written < len(items):
+        _stats["spool_dropped"] += len(items) - written
+        logger.error(f"Spool plein ({settings.persistence_spool_max_mb} Mo) : {len(items) - written} flux perdus")
+
+
+def _read_spool(path: Path) -> Tuple[List[ResultRows], List[dict]]:
+    """Lignes du spool et messages temps réel associés (absents des spools plus anciens)."""
+    items, realtime = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                flow, prediction, anomaly, alert, *payload = json.loads(line)
+            except (ValueError, TypeError):
+                continue  # Ligne tronquée (arrêt brutal pendant l'écriture)
+            items.append((_decode_row(flow), _decode_row(prediction), _decode_row(anomaly), _decode_row(alert)))
+            if payload and payload[0]:
+                realtime.append(payload[0])
+    return items, realtime
+
+
+async def replay_spool() -> int:
+    """
+    Rejoue le spool en masse si la base répond. Le fichier est renommé avant
+    lecture : les lignes spoolées pendant le rejeu vont dans un nouveau fichier.
+    Les alertes des lignes validées sont publiées après chaque commit.
+
+    Returns:
+        int: Nombre de flux réinsérés.
+    """
+    path = _spool_path()
+    replaying = path.with_suffix(path.suffix + ".replay")
+    async with _spool_lock:
+        # Un rejeu interrompu est repris en priorité
+        if not replaying.exists():
+            if not path.exists() or path.stat().st_size == 0:
+                return 0
+            path.rename(replaying)
+
+    items, realtime = await asyncio.to_thread(_read_spool, replaying)
+    _track_realtime(realtime)
+    batch_size = max(1, settings.persistence_flush_max_items)
+    replayed = 0
+
+    async def interrupt(index: int, error: Exception) -> int:
+        # Base encore indisponible : on garde le reste pour le prochain cycle
+        remaining = _spool_lines(items[index:])
+        await asyncio.to_thread(replaying.write_text, "\n".join(remaining) + "\n", "utf-8")
+        _stats["replayed"] += replayed
+        if replayed:
+            rollup_service.mark_dirty(min(flow["timestamp"] for flow, _, _, _ in items[:index]))
+        logger.warning(f"Rejeu du spool interrompu après {replayed} flux : {error}")
+        return replayed
+
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        try:
+            await write_rows(batch)
+            replayed += len(batch)
+            await alert_service.flush_realtime(_take_realtime(batch))
+            continue
+        except Exception as e:
+            if _is_connectivity_error(e):
+                return await interrupt(start, e)
+
+        # Ligne invalide dans le lot (ex : flux déjà inséré) : rejeu flux par flux
+        committed = []
+        for offset, item in enumerate(batch):
+            try:
+                await _write_item(item)
+                committed.append(item)
+                replayed += 1
+            except Exception as row_error:
+                if _is_connectivity_error(row_error):
+                    await alert_service.flush_realtime(_take_realtime(committed))
+                    return await interrupt(start + offset, row_error)
+                _stats["failed_rows"] += 1
+                logger.error(f"Rejeu du spool, flux ignoré : {row_error}")
+        await alert_service.flush_realtime(_take_realtime(committed))
+        _take_realtime(batch)
+
+    replaying.unlink(missing_ok=True)
+    if items:
+        # Lignes antérieures aux watermarks des agrégats : recalcul à partir du plus ancien flux
+        rollup_service.mark_dirty(min(flow["timestamp"] for flow, _, _, _ in items))
+    _stats["replayed"] += replayed
+    _stats["db_available"] = True
+    if replayed:
+        logger.info(f"Spool rejoué : {replayed} flux réinsérés")
+    return replayed
+
+
+def _spool_bytes() -> int:
+    path = _spool_path()
+    total = 0
+    for candidate in (path, path.with_suffix(path.suffix + ".replay")):
+        if candidate.exists():
+            total += candidate.stat().st_size
+    return total
+
+
+# ---- File d'écriture ----
+
+def enqueue(items: List[ResultRows], realtime: Optional[List[dict]] = None) -> bool:
+    """
+    Dépose un lot dans la file sans jamais bloquer la capture. Les messages
+    temps réel du lot (`realtime`) sont envoyés par le writer après le commit.
+
+    Returns:
+        bool: False si le writer n'est pas démarré (l'appelant écrit alors lui-même).
+    """
+    if _queue is None or _task is None or _task.done():
+        return False
+
+    _track_realtime(realtime)
+    overflow = []
+    for item in items:
+        try:
+            _queue.put_nowait(item)
+        except asyncio.QueueFull:
+            overflow.append(item)
+    _stats["enqueued"] += len(items) - len(overflow)
+
+    if overflow:
+        # File pleine : débordement direct vers le spool (rejoué plus tard)
+        task = asyncio.create_task(_spool(overflow))
+        _spool_tasks.add(task)
+        task.add_done_callback(_spool_tasks.discard)
+    return True
+
+
+async def _drain(max_items: int, deadline: float) -> List[ResultRows]:
+    """Récupère jusqu'à max_items lignes, en attendant au plus jusqu'à l'échéance."""
+    batch = []
+    while len(batch) < max_items:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            # asyncio.timeout plutôt que wait_for : un élément déjà retiré de la file n'est jamais perdu
+            async with asyncio.timeout(timeout):
+                item = await _queue.get()
+        except TimeoutError:
+            break
+        batch.append(item)
+        # Vide sans attendre ce qui est déjà disponible
+        while len(batch) < max_items and not _queue.empty():
+            batch.append(_queue.get_nowait())
+    return batch
+
+
+async def _writer_loop() -> None:
+    """Vide la file par lots (taille ou échéance) et rejoue le spool périodiquement."""
+    flush_interval = max(0.05, settings.persistence_flush_interval_seconds)
+    max_items = max(1, settings.persistence_flush_max_items)
+    last_replay = 0.0
+
+    while not (_stop_event.is_set() and _queue.empty()):
+        batch = await _drain(max_items, time.monotonic() + flush_interval)
+        if batch:
+            await _flush(batch)
+
+        now = time.monotonic()
+        if now - last_replay >= settings.persistence_replay_interval_seconds:
+            last_replay = now
+            try:
+                await replay_spool()
+            except Exception as e:
+                logger.warning(f"Rejeu du spool impossible : {e}")
+
+
+def start_writer() -> bool:
+    """Démarre la tâche d'écriture différée (idempotent)."""
+    global _queue, _task, _stop_event
+
+    if not settings.persistence_write_behind_enabled:
+        logger.info("Persistance différée désactivée par configuration")
+        return False
+
+    if _task and not _task.done():
+        return True
+
+    _queue = asyncio.Queue(maxsize=max(1, settings.persistence_queue_max_items))
+    _stop_event = asyncio.Event()
+    _task = asyncio.create_task(_writer_loop())
+    logger.info("Writer de persistance différée démarré")
+    return True
+
+
+async def stop_writer() -> None:
+    """
+    Arrête le writer après avoir vidé la file. Ce qui ne peut pas être écrit
+    avant le délai de grâce est déposé dans le spool.
+    """
+    global _queue, _task, _stop_event
+
+    if _stop_event:
+        _stop_event.set()
+
+    if _task and not _task.done():
+        try:
+            await asyncio.wait_for(_task, timeout=10)
+        except asyncio.TimeoutError:
+            _task.cancel()
+            logger.warning("Writer de persistance arrêté de force (Timeout)")
+
+    if _spool_tasks:
+        await asyncio.gather(*list(_spool_tasks), return_exceptions=True)
+
+    if _queue is not None and not _queue.empty():
+        remaining = []
+        while not _queue.empty():
+            remaining.append(_queue.get_nowait())
+        await _spool(remaining)
+
+    _task = None
+    _queue = None
+    _stop_event = None
+
+
+def get_stats() -> Dict[str, Any]:
+    """Métriques de la persistance différée (profondeur de file, latence de flush, spool)."""
+    flushes = _stats["flushes"]
+    return {
+        "enabled": settings.persistence_write_behind_enabled,
+        "running": bool(_task and not _task.done()),
+        "queue_depth": _queue.qsize() if _queue is not None else 0,
+        "queue_max": settings.persistence_queue_max_items,
+        **{k: v for k, v in _stats.items() if k != "total_flush_ms"},
+        "avg_flush_ms": round(_stats["total_flush_ms"] / flushes, 2) if flushes else 0.0,
+        "spool_bytes": _spool_bytes(),
+    }
@@ -0,0 +1,231 @@
+"""
+Cache de réponses à deux niveaux pour les routes de lecture du dashboard.
+
+Chaque onglet ouvert interroge périodiquement les mêmes agrégats (overview,
+répartitions, top menaces, séries, carte). Le décorateur `cached` les sert :
+1. depuis un LRU en mémoire du processus (aucun aller-retour) ;
+2. sinon depuis Redis, partagé entre les workers uvicorn ;
+3. sinon en exécutant la route, une seule fois par clé : les requêtes
+   identiques concurrentes attendent ce même calcul (single-flight).
+
+Clé : nom de l'endpoint + paramètres scalaires de la requête (les dépendances
+comme la session SQL sont ignorées). TTL court propre à chaque endpoint.
+
+Invalidation anticipée : le lecteur du stream d'alertes de chaque processus
+(websocket_handler) appelle `invalidate(dernier stream_id)` à chaque nouvelle
+alerte. Ce stream_id sert de génération : il fait partie de la clé Redis et
+marque les entrées du LRU, si bien qu'une alerte rend obsolètes les deux
+niveaux sans suppression explicite (les anciennes clés Redis expirent par TTL).
+Pendant une tempête d'alertes, la génération n'avance qu'une fois par
+RESPONSE_CACHE_INVALIDATE_MIN_INTERVAL_MS pour garder un taux de hit utile.
+
+Métriques : hits (mémoire, Redis, requêtes regroupées), calculs et leur durée,
+par endpoint dans `get_stats()` (/health) et en compteurs agrégés
+(cache_hits, cache_misses, cache_recompute_ms) publiés par metrics_service.
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Awaitable, Tuple
+
+from backend.core.config import get_settings
+from backend.database.redis_client import cache_get, cache_set
+from monitoring.metrics import metrics
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_KEY_PREFIX = "nds:cache"
+_SCALARS = (str, int, float, bool, type(None))
+
+# Clé -> (expiration epoch, génération, valeur), du moins au plus récemment utilisé
+_lru: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+# (clé, génération) -> calcul en cours
+_inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+# Génération courante, et dernière annoncée (appliquée au plus une fois par intervalle)
+_generation = "0"
+_pending_generation = "0"
+_generation_at = 0.0
+
+_stats: Dict[str, Any] = {
+    "invalidations": 0,
+    "evictions": 0,
+    "redis_errors": 0,
+}
+_endpoints: Dict[str, Dict[str, Any]] = {}
+
+
+def _endpoint_stats(name: str) -> Dict[str, Any]:
+    stats = _endpoints.get(name)
+    if stats is None:
+        stats = _endpoints[name] = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "coalesced": 0,
+            "misses": 0,
+            "errors": 0,
+            "recompute_ms_total": 0.0,
+            "recompute_ms_last": None,
+            "recompute_ms_max": 0.0,
+        }
+    return stats
+
+
+def _make_key(name: str, kwargs: Dict[str, Any]) -> str:
+    params = "&".join(f"{key}={value}" for key, value in sorted(kwargs.items()) if isinstance(value, _SCALARS))
+    return f"{name}?{params}"
+
+
+def _current_generation() -> str:
+    """Génération courante ; adopte la dernière annoncée si l'intervalle minimal est écoulé."""
+    global _generation, _generation_at
+    if _pending_generation != _generation:
+        now = time.monotonic()
+        if now - _generation_at >= settings.response_cache_invalidate_min_interval_ms / 1000:
+            _generation, _generation_at = _pending_generation, now
+    return _generation
+
+
+def invalidate(generation: str) -> None:
+    """Annonce une nouvelle génération (stream_id de la dernière alerte écrite)."""
+    global _pending_generation
+    if generation and generation != _pending_generation:
+        _pending_generation = generation
+        _stats["invalidations"] += 1
+
+
+def _store(key: str, expires_at: float, generation: str, value: Any) -> None:
+    _lru[key] = (expires_at, generation, value)
+    _lru.move_to_end(key)
+    while len(_lru) > settings.response_cache_max_entries:
+        _lru.popitem(last=False)
+        _stats["evictions"] += 1
+
+
+async def _load(name: str, key: str, ttl: int, generation: str,
+                compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Niveau Redis puis calcul ; renseigne le LRU dans les deux cas."""
+    stats = _endpoint_stats(name)
+    redis_key = f"{_KEY_PREFIX}:{generation}:{key}"
+
+    try:
+        cached_entry = await cache_get(redis_key)
+    except Exception:
+        _stats["redis_errors"] += 1
+        cached_entry = None
+    if isinstance(cached_entry, dict) and "v" in cached_entry:
+        stats["redis_hits"] += 1
+        metrics.increment("cache_hits")
+        _store(key, cached_entry.get("at", time.time()) + ttl, generation, cached_entry["v"])
+        return cached_entry["v"]
+
+    stats["misses"] += 1
+    metrics.increment("cache_misses")
+    started = time.perf_counter()
+    value = await compute()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stats["recompute_ms_total"] += elapsed_ms
+    stats["recompute_ms_last"] = round(elapsed_ms, 2)
+    stats["recompute_ms_max"] = max(stats["recompute_ms_max"], elapsed_ms)
+    metrics.increment("cache_recompute_ms", int(round(elapsed_ms)))
+
+    # Seuls les dict / list (réponses JSON) sont mis en cache
+    if isinstance(value, (dict, list)):
+        now = time.time()
+        _store(key, now + ttl, generation, value)
+        try:
+            await cache_set(redis_key, {"v": value, "at": now}, ttl)
+        except Exception:
+            _stats["redis_errors"] += 1
+    return value
+
+
+def _flight_done(flight_key: Tuple[str, str], task: asyncio.Task) -> None:
+    _inflight.pop(flight_key, None)
+    if not task.cancelled():
+        task.exception()  # Évite l'avertissement si tous les demandeurs sont partis
+
+
+async def get_or_compute(name: str, key: str, ttl: int, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Valeur en cache pour `key`, sinon calculée une seule fois pour tous les demandeurs."""
+    stats = _endpoint_stats(name)
+    generation = _current_generation()
+
+    entry = _lru.get(key)
+    if entry is not None:
+        expires_at, entry_generation, value = entry
+        if expires_at > time.time() and entry_generation == generation:
+            _lru.move_to_end(key)
+            stats["memory_hits"] += 1
+            metrics.increment("cache_hits")
+            return value
+        del _lru[key]
+
+    flight_key = (key, generation)
+    task = _inflight.get(flight_key)
+    if task is not None:
+        stats["coalesced"] += 1
+        metrics.increment("cache_hits")
+    else:
+        # Tâche indépendante : l'annulation d'un demandeur (client déconnecté) n'interrompt pas les autres
+        task = asyncio.ensure_future(_load(name, key, ttl, generation, compute))
+        _inflight[flight_key] = task
+        task.add_done_callback(functools.partial(_flight_done, flight_key))
+
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        stats["errors"] += 1
+        raise
+
+
+def cached(name: str, ttl: int) -> Callable:
+    """
+    Décorateur de route : met la réponse en cache `ttl` secondes (mémoire + Redis).
+    La signature est conservée pour FastAPI ; `route.uncached` appelle la route sans cache.
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not settings.response_cache_enabled:
+                return await func(*args, **kwargs)
+            return await get_or_compute(name, _make_key(name, kwargs), ttl, lambda: func(*args, **kwargs))
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+def clear() -> None:
+    """Vide le niveau mémoire du processus (Redis expire par TTL)."""
+    _lru.clear()
+
+
+def get_stats() -> Dict[str, Any]:
+    """Taux de hit et temps de recalcul par endpoint, état du LRU et de la génération."""
+    endpoints = {}
+    for name, stats in _endpoints.items():
+        hits = stats["memory_hits"] + stats["redis_hits"] + stats["coalesced"]
+        requests = hits + stats["misses"]
+        endpoints[name] = {
+            **stats,
+            "recompute_ms_total": round(stats["recompute_ms_total"], 2),
+            "recompute_ms_max": round(stats["recompute_ms_max"], 2),
+            "recompute_ms_avg": round(stats["recompute_ms_total"] / stats["misses"], 2) if stats["misses"] else None,
+            "hit_ratio": round(hits / requests, 4) if requests else None,
+        }
+    return {
+        "enabled": settings.response_cache_enabled,
+        "entries": len(_lru),
+        "max_entries": settings.response_cache_max_entries,
+        "in_flight": len(_inflight),
+        "generation": _generation,
+        **_stats,
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,184 @@
+"""
+Service d'agrégation incrémentale (rollups) du trafic.
+Maintient traffic_rollup_minute et traffic_rollup_hour pour que le dashboard
+ne rescanne plus jusqu'à 720 heures de lignes brutes à chaque rafraîchissement.
+
+Chaque cycle recalcule les minutes comprises entre le watermark (moins une
+marge de réécriture pour les lignes arrivées en retard via le writer différé)
+et `maintenant - délai de grâce`, consolide les heures correspondantes puis
+avance les watermarks, le tout dans une transaction par tranche.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from backend.core.config import get_settings
+from backend.database.connection import async_session_factory
+from backend.database import repository
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Tranche maximale recalculée par transaction (rattrapage initial)
+_CHUNK = timedelta(hours=6)
+
+_task: Optional[asyncio.Task] = None
+_stop_event: Optional[asyncio.Event] = None
+_dirty_since: Optional[datetime] = None
+_stats: Dict[str, Any] = {
+    "runs": 0,
+    "last_run_ms": 0.0,
+    "last_window": None,
+    "last_error": None,
+}
+
+
+def _floor_minute(value: datetime) -> datetime:
+    return value.replace(second=0, microsecond=0)
+
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def mark_dirty(since: datetime) -> None:
+    """
+    Signale des lignes insérées avant le watermark (ex : rejeu du spool) :
+    le prochain cycle recalcule les agrégats à partir de `since`.
+    """
+    global _dirty_since
+    if _dirty_since is None or since < _dirty_since:
+        _dirty_since = since
+
+
+async def run_once() -> Dict[str, Any]:
+    """
+    Exécute un cycle d'agrégation.
+
+    Returns:
+        Dict: Fenêtre recalculée et nouveaux watermarks.
+    """
+    global _dirty_since
+
+    now = datetime.utcnow()
+    target = _floor_minute(now - timedelta(seconds=settings.rollup_grace_seconds))
+    minute_retention = now - timedelta(hours=settings.rollup_minute_retention_hours)
+
+    async with async_session_factory() as db:
+        watermarks = await repository.get_rollup_watermarks(db)
+
+    minute_wm = watermarks.get("minute")
+    if minute_wm is None:
+        start = _floor_hour(now - timedelta(hours=settings.rollup_backfill_hours))
+    else:
+        start = minute_wm - timedelta(minutes=settings.rollup_rewind_minutes)
+    dirty, _dirty_since = _dirty_since, None
+    if dirty is not None and dirty < start:
+        start = dirty
+    if start < minute_retention:
+        # Hors rétention des minutes : on repart d'une heure complète pour la consolidation
+        start = _floor_hour(start)
+    start = _floor_minute(start)
+
+    if target <= start:
+        return {"start": start.isoformat(), "end": target.isoformat(), "chunks": 0}
+
+    chunks = 0
+    chunk_start = start
+    while chunk_start < target:
+        chunk_end = min(chunk_start + _CHUNK, target)
+        async with async_session_factory() as db:
+            try:
+                await repository.refresh_rollup_minute(db, chunk_start, chunk_end)
+                # Heures touchées par la tranche ; la dernière heure reste partielle
+                await repository.refresh_rollup_hour(db, _floor_hour(chunk_start), _floor_hour(chunk_end))
+                await repository.set_rollup_watermark(db, "minute", chunk_end)
+                await repository.set_rollup_watermark(db, "hour", _floor_hour(chunk_end))
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                if dirty is not None:
+                    mark_dirty(dirty)
+                raise
+        chunks += 1
+        chunk_start = chunk_end
+
+    async with async_session_factory() as db:
+        await repository.prune_rollup_minute(db, _floor_hour(minute_retention))
+        await db.commit()
+
+    return {"start": start.isoformat(), "end": target.isoformat(), "chunks": chunks}
+
+
+async def _rollup_loop() -> None:
+    """Boucle de fond : un cycle d'agrégation toutes les rollup_interval_seconds."""
+    interval_seconds = max(5, settings.rollup_interval_seconds)
+
+    while _stop_event and not _stop_event.is_set():
+        started = asyncio.get_running_loop().time()
+        try:
+            summary = await run_once()
+            _stats["runs"] += 1
+            _stats["last_error"] = None
+            _stats["last_window"] = summary
+            if summary["chunks"] > 1:
+                logger.info("Rollups: rattrapage %s → %s (%s tranches)", summary["start"], summary["end"], summary["chunks"])
+        except Exception as e:
+            _stats["last_error"] = str(e)
+            logger.warning("Rollups: échec du cycle d'agrégation (%s)", e)
+        _stats["last_run_ms"] = round((asyncio.get_running_loop().time() - started) * 1000, 2)
+
+        # Attente interruptible (pour arrêt propre)
+        try:
+            await asyncio.wait_for(_stop_event.wait(), timeout=interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_scheduler() -> bool:
+    """Démarre la tâche d'agrégation en arrière-plan (idempotent)."""
+    global _task, _stop_event
+
+    if not settings.rollup_enabled:
+        logger.info("Agrégation incrémentale désactivée par configuration")
+        return False
+
+    if _task and not _task.done():
+        return True
+
+    _stop_event = asyncio.Event()
+    _task = asyncio.create_task(_rollup_loop())
+    logger.info("Scheduler d'agrégation démarré")
+    return True
+
+
+async def stop_scheduler() -> None:
+    """Arrête la tâche d'agrégation (le cycle en cours peut finir)."""
+    global _task, _stop_event
+
+    if _stop_event:
+        _stop_event.set()
+
+    if _task and not _task.done():
+        try:
+            await asyncio.wait_for(_task, timeout=5)
+        except asyncio.TimeoutError:
+            _task.cancel()
+            logger.warning("Scheduler d'agrégation arrêté de force (Timeout)")
+
+    _task = None
+    _stop_event = None
+
+
+def get_status() -> Dict[str, Any]:
+    """État du service d'agrégation."""
+    return {
+        "enabled": settings.rollup_enabled,
+        "running": bool(_task and not _task.done()),
+        "interval_seconds": settings.rollup_interval_seconds,
+        "grace_seconds": settings.rollup_grace_seconds,
+        "dirty_since": _dirty_since.isoformat() if _dirty_since else None,
+        **_stats,
+    }
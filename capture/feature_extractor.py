@@ -12,6 +12,10 @@ from capture.flow_builder import NetworkFlow
 
 logger = logging.getLogger(__name__)
 
+# Version du vecteur de features persisté (network_flows.feature_schema_version).
+# À incrémenter si l'ordre ou le nombre de features change.
+FEATURE_SCHEMA_VERSION = 1
+
 
 class FeatureExtractor:
     """
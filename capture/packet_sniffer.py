@@ -11,6 +11,8 @@ from collections import deque
 
 from scapy.all import sniff, IP, TCP, UDP, Packet, get_if_list, conf
 
+from monitoring.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -67,6 +69,7 @@ class PacketSniffer:
             return
 
         self._packet_count += 1
+        metrics.increment("packets_captured")  # Shard du thread de capture : sans verrou
 
         # Extraction des métadonnées (Parsing L3/L4)
         packet_info = self._extract_packet_info(packet)
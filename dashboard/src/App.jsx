@@ -1,4 +1,4 @@
-﻿import React, { useState, useEffect, useCallback, useMemo } from 'react'
+﻿import React, { useState, useEffect, useCallback, useMemo, useRef } from 'react'
 import {
     Shield, AlertTriangle, Activity, Globe, BarChart3, Bell, Settings,
     Radio, Target, TrendingUp, Zap, Eye, Clock, FileText,
@@ -40,6 +40,49 @@ const emptyOverview = {
     total_flows_analyzed: 0,
 }
 
+// KPI de la vue d'ensemble poussés par le serveur (/ws/dashboard) : snapshot puis deltas numérotés
+function useDashboardKpis() {
+    const [kpis, setKpis] = useState(null)
+    const liveRef = useRef(false)
+
+    useEffect(() => {
+        let socket = null
+        let retry = null
+        let closed = false
+        let seq = 0
+        const connect = () => {
+            const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws'
+            socket = new WebSocket(`${protocol}://${window.location.host}/ws/dashboard`)
+            socket.onmessage = (event) => {
+                let message
+                try { message = JSON.parse(event.data) } catch { return }
+                if (message.type === 'kpi_snapshot') {
+                    seq = message.seq
+                    liveRef.current = true
+                    setKpis(message.kpis || {})
+                } else if (message.type === 'kpi_delta' || message.type === 'heartbeat') {
+                    const expected = message.type === 'kpi_delta' ? seq + 1 : seq
+                    if (message.seq !== expected) {
+                        // Delta manqué : on repart d'un état complet
+                        socket.send(JSON.stringify({ type: 'snapshot' }))
+                        return
+                    }
+                    seq = message.seq
+                    if (message.type === 'kpi_delta') setKpis(prev => ({ ...prev, ...message.changed }))
+                }
+            }
+            socket.onclose = () => {
+                liveRef.current = false
+                if (!closed) retry = setTimeout(connect, 3000)
+            }
+        }
+        connect()
+        return () => { closed = true; clearTimeout(retry); socket?.close() }
+    }, [])
+
+    return [kpis, liveRef]
+}
+
 const toPieDistribution = (distribution = []) =>
     distribution.map((item, index) => ({
         name: String(item.label || item.name || 'Unknown'),
@@ -554,7 +597,8 @@ function Sidebar({ activeView, setActiveView, collapsed, setCollapsed, captureRu
 // Dashboard Overview
 // ========================================
 function DashboardOverview() {
-    const [overview, setOverview]             = useState(emptyOverview)
+    const [polledOverview, setOverview]       = useState(emptyOverview)
+    const [liveKpis, kpiLiveRef]              = useDashboardKpis()
     const [alerts, setAlerts]                 = useState([])
     const [traffic, setTraffic]               = useState([])
     const [distribution, setDistribution]     = useState([])
@@ -571,7 +615,8 @@ function DashboardOverview() {
         let mounted = true
         const load = async () => {
             const [overviewData, recentAlerts, trafficData, attackData, mapData, captureStatus, interfacesData] = await Promise.all([
-                fetchAPI('/dashboard/overview', emptyOverview),
+                // KPI poussés par /ws/dashboard : le polling ne sert que de repli
+                kpiLiveRef.current ? null : fetchAPI('/dashboard/overview', emptyOverview),
                 fetchAPI('/dashboard/recent-alerts', []),
                 fetchAPI('/dashboard/traffic-timeseries', { series: [] }),
                 fetchAPI('/dashboard/attack-distribution', { distribution: [] }),
@@ -580,7 +625,7 @@ function DashboardOverview() {
                 fetchAPI('/detection/capture/interfaces', { configured_interface: 'auto', available_interfaces: [] }),
             ])
             if (!mounted) return
-            setOverview(overviewData || emptyOverview)
+            if (overviewData) setOverview(overviewData)
             setAlerts(Array.isArray(recentAlerts) ? recentAlerts : [])
             setTraffic(normalizeTrafficSeries(trafficData?.series || []))
             setDistribution(toPieDistribution(attackData?.distribution || []))
@@ -617,6 +662,7 @@ function DashboardOverview() {
         if (response?.message) setCaptureMessage(response.message)
     }
 
+    const overview        = liveKpis ? { ...polledOverview, ...liveKpis } : polledOverview
     const threatScore     = Number(overview?.threat_score || 0)
     const criticalCount   = Number(overview?.alerts_by_severity?.critical || 0)
     const flowsAnalyzed   = Number(overview?.total_flows_analyzed || 0) || Number(captureStats?.packets_captured || 0)
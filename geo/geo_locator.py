@@ -71,6 +71,10 @@ class GeoLocator:
             logger.error(f"Erreur géolocalisation pour {ip}: {e}")
             return None
 
+    def get_cached(self, ip: str) -> Optional[Dict[str, Any]]:
+        """Résultat déjà en cache, sans appel réseau (None si inconnu)."""
+        return self._local_cache.get(ip)
+
     async def _query_with_fallback(self, ip: str) -> Optional[Dict[str, Any]]:
         primary = await self._safe_primary_lookup(ip)
         if primary:
@@ -1,16 +1,60 @@
 """
 Métriques système pour le monitoring du NDS.
 Compteurs, gauges, et health checks.
+
+Les compteurs sont partitionnés par thread (ShardedCounters) : un incrément
+n'écrit que dans le dictionnaire du thread appelant, sans verrou ni I/O. Le
+service metrics_service lit périodiquement les totaux du processus et pousse
+les deltas dans Redis (INCRBY), où s'agrègent tous les workers.
 """
 
+import threading
 import time
 import psutil
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
 
+class ShardedCounters:
+    """
+    Compteurs monotones à un shard par thread.
+    increment() ne touche que le shard du thread courant ; snapshot() additionne
+    les shards (lecture seule), si bien qu'aucun incrément n'est perdu.
+    """
+
+    def __init__(self, names: tuple = ()):
+        self._local = threading.local()
+        self._lock = threading.Lock()  # Enregistrement des shards uniquement
+        self._shards: List[Dict[str, int]] = []
+        self._names = names
+
+    def _shard(self) -> Dict[str, int]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: Dict[str, int] = {}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def increment(self, name: str, value: int = 1) -> None:
+        shard = self._shard()
+        shard[name] = shard.get(name, 0) + value
+
+    def snapshot(self) -> Dict[str, int]:
+        """Totaux du processus depuis le démarrage."""
+        totals = dict.fromkeys(self._names, 0)
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for name, value in list(shard.items()):
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+
 class SystemMetrics:
     """
     Collecteur centralisé de métriques pour le monitoring interne.
@@ -20,14 +64,18 @@ class SystemMetrics:
 
     def __init__(self):
         self._start_time = time.time()
-        # Compteurs monotones croissants
-        self.counters: Dict[str, int] = {
-            "packets_processed": 0,
-            "flows_analyzed": 0,
-            "alerts_generated": 0,
-            "predictions_made": 0,
-            "anomalies_detected": 0,
-        }
+        # Compteurs monotones croissants (un shard par thread)
+        self._counters = ShardedCounters((
+            "packets_captured",
+            "packets_processed",
+            "flows_analyzed",
+            "alerts_generated",
+            "predictions_made",
+            "anomalies_detected",
+            "cache_hits",
+            "cache_misses",
+            "cache_recompute_ms",
+        ))
         # Gauges (valeurs qui montent et descendent)
         self.gauges: Dict[str, float] = {
             "current_threat_score": 0.0,
@@ -35,10 +83,14 @@ class SystemMetrics:
             "buffer_usage": 0.0,
         }
 
+    @property
+    def counters(self) -> Dict[str, int]:
+        """Totaux des compteurs pour ce processus."""
+        return self._counters.snapshot()
+
     def increment(self, counter: str, value: int = 1):
-        """Incrémente un compteur nommé de manière thread-safe (en Python, GIL aide)."""
-        if counter in self.counters:
-            self.counters[counter] += value
+        """Incrémente un compteur nommé (shard du thread courant : sans verrou, sans I/O)."""
+        self._counters.increment(counter, value)
 
     def set_gauge(self, gauge: str, value: float):
         """Met à jour la valeur instantanée d'une jauge."""
@@ -66,7 +118,7 @@ class SystemMetrics:
     def get_all_metrics(self) -> Dict[str, Any]:
         """Retourne un snapshot complet de toutes les métriques."""
         return {
-            "counters": self.counters.copy(),
+            "counters": self.counters,
             "gauges": self.gauges.copy(),
             "system": self.get_system_health(),
         }
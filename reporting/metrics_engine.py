@@ -53,38 +53,52 @@ async def get_period_metrics(session: AsyncSession, start_time: datetime, end_ti
         avg_severity_result = await session.execute(query_avg_severity)
         avg_severity = avg_severity_result.scalar_one() or 0.0
 
-        # 5. Top IP attaquantes
+        # 5. Top IP attaquantes (colonne dénormalisée : pas de jointure sur network_flows)
         query_top_ips = select(
-            NetworkFlow.src_ip, func.count(Alert.id).label('count')
-        ).join(
-            Alert, NetworkFlow.id == Alert.flow_id
+            Alert.src_ip, func.count(Alert.id).label('count')
         ).where(
             Alert.timestamp >= start_time,
             Alert.timestamp <= end_time,
-            Alert.decision.in_(["confirmed_attack", "suspicious"])
-        ).group_by(NetworkFlow.src_ip).order_by(desc('count')).limit(10)
+            Alert.decision.in_(["confirmed_attack", "suspicious"]),
+            Alert.src_ip.isnot(None)
+        ).group_by(Alert.src_ip).order_by(desc('count')).limit(10)
         
         top_ips_result = await session.execute(query_top_ips)
         top_ips = [{"ip": row.src_ip, "count": row.count} for row in top_ips_result]
 
-        # 6. Top pays attaquants (Enrichissement basique, suppose que IPGeolocation est à jour)
+        # 6. Top pays attaquants (code pays renseigné à la création de l'alerte depuis le cache GeoIP,
+        #    sinon complété par geo_service dès que l'IP est résolue)
         query_top_countries = select(
-            IPGeolocation.country, func.count(Alert.id).label('count')
-        ).select_from(Alert).join(
-            NetworkFlow, Alert.flow_id == NetworkFlow.id
-        ).join(
-            IPGeolocation, NetworkFlow.src_ip == IPGeolocation.ip_address
+            Alert.src_country_code, func.count(Alert.id).label('count')
         ).where(
             Alert.timestamp >= start_time,
             Alert.timestamp <= end_time,
-            Alert.decision.in_(["confirmed_attack", "suspicious"])
-        ).group_by(IPGeolocation.country).order_by(desc('count')).limit(5)
+            Alert.decision.in_(["confirmed_attack", "suspicious"]),
+            Alert.src_country_code.isnot(None)
+        ).group_by(Alert.src_country_code).order_by(desc('count')).limit(5)
         
         try:
-            top_countries_result = await session.execute(query_top_countries)
-            top_countries = [{"country": row.country or "Unknown", "count": row.count} for row in top_countries_result]
+            top_countries_rows = (await session.execute(query_top_countries)).all()
+            # Noms de pays : petite recherche sur les seuls codes retenus
+            codes = [row.src_country_code for row in top_countries_rows]
+            names = {}
+            if codes:
+                names_result = await session.execute(
+                    select(IPGeolocation.country_code, func.max(IPGeolocation.country))
+                    .where(IPGeolocation.country_code.in_(codes))
+                    .group_by(IPGeolocation.country_code)
+                )
+                names = {code: name for code, name in names_result.all()}
+            top_countries = [
+                {
+                    "country": names.get(row.src_country_code) or row.src_country_code,
+                    "country_code": row.src_country_code,
+                    "count": row.count,
+                }
+                for row in top_countries_rows
+            ]
         except Exception as e:
-            logger.warning(f"Impossible de récupérer les pays (peut-être pas de liaison join directe) : {e}")
+            logger.warning(f"Impossible de récupérer les pays : {e}")
             top_countries = []
 
         return {
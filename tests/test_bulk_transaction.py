@@ -0,0 +1,104 @@
+"""
+Atomicité de repository.bulk_create_results en mode COPY.
+
+Un COPY sur la connexion asyncpg brute n'est dans la transaction de la
+session que si BEGIN a déjà été envoyé ; sinon un échec sur une table fille
+laisserait les flux validés.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from backend.database import repository
+
+
+class _FakeDriver:
+    def __init__(self, calls, fail_table=None):
+        self.calls = calls
+        self.fail_table = fail_table
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.calls.append(("copy", table))
+        if table == self.fail_table:
+            raise RuntimeError(f"COPY {table} en échec")
+
+
+class _FakeSession:
+    """Session minimale : trace l'ordre des execute SQLAlchemy et des COPY."""
+
+    def __init__(self, fail_table=None):
+        self.calls = []
+        self._driver = _FakeDriver(self.calls, fail_table)
+
+    async def execute(self, statement, params=None):
+        self.calls.append(("execute", str(statement)))
+
+    async def connection(self):
+        session = self
+
+        class _Connection:
+            async def get_raw_connection(self):
+                class _Raw:
+                    driver_connection = session._driver
+                return _Raw()
+
+        return _Connection()
+
+
+def _rows():
+    flow_id = repository.new_id()
+    now = datetime.utcnow()
+    flow = {"id": flow_id, "timestamp": now, "src_ip": "192.0.2.1", "dst_ip": "192.0.2.2",
+            "src_port": 1234, "dst_port": 80, "protocol": 6}
+    alert = {"id": repository.new_id(), "flow_id": flow_id, "timestamp": now, "severity": "high",
+             "decision": "confirmed_attack", "status": "open", "threat_score": 0.9, "alert_metadata": {}}
+    return flow, alert
+
+
+def test_copy_starts_transaction_before_first_copy():
+    session = _FakeSession()
+    flow, alert = _rows()
+    asyncio.run(repository.bulk_create_results(session, [flow], alerts=[alert], use_copy=True))
+
+    first_copy = next(i for i, call in enumerate(session.calls) if call[0] == "copy")
+    assert any(call[0] == "execute" for call in session.calls[:first_copy])
+
+
+def _database_available() -> bool:
+    from backend.database.connection import engine
+
+    async def probe():
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+        await engine.dispose()
+
+    try:
+        asyncio.run(asyncio.wait_for(probe(), timeout=3))
+        return True
+    except Exception:
+        return False
+
+
+@pytest.mark.skipif(not _database_available(), reason="PostgreSQL indisponible")
+def test_failed_alerts_copy_rolls_back_flows(monkeypatch):
+    from sqlalchemy import text
+    from backend.database.connection import async_session_factory, engine
+
+    flow, alert = _rows()
+    # Colonne inexistante : le COPY des alertes échoue après celui des flux
+    monkeypatch.setitem(repository.BULK_COLUMNS, "alerts", repository.BULK_COLUMNS["alerts"] + ("no_such_column",))
+
+    async def scenario():
+        async with async_session_factory() as db:
+            with pytest.raises(Exception):
+                await repository.bulk_create_results(db, [flow], alerts=[alert], use_copy=True)
+            await db.rollback()
+        async with async_session_factory() as db:
+            result = await db.execute(text("SELECT COUNT(*) FROM network_flows WHERE id = :id"), {"id": flow["id"]})
+            count = result.scalar_one()
+        await engine.dispose()
+        return count
+
+    assert asyncio.run(scenario()) == 0